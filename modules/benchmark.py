@@ -0,0 +1,302 @@
+"""
+Benchmark headless do pipeline de composição/renderização.
+
+Gera clipes sintéticos localmente e renderiza cada estilo de borda com e sem
+legendas/emojis/logo/marca d'água, medindo frames/s, tempo por etapa e pico de memória.
+A saída é JSON, para comparar otimizações e regressões entre commits.
+
+Uso:
+    python -m modules.benchmark --duration 3 --output bench.json
+    python -m modules.benchmark --styles "Blur" "Sem moldura" --features full
+    python -m modules.benchmark --outline    # só compara os motores de contorno das legendas
+
+Etapas medidas (tempos inclusivos, "composite" já contém "subtitle_raster"):
+    decode           decodificação de um frame da fonte (FFMPEG_VideoReader.get_frame)
+    resize           redimensionamento do frame (vídeo interno e fundo blur)
+    blur             VideoRenderer.apply_blur_opencv
+    composite        VideoRenderer.render_frame
+    subtitle_raster  RenderizadorLegendas._render_to_cache (acertos de cachê incluídos)
+    encode_write     envio do frame ao ffmpeg (só no encoder "ffmpeg_pipe"; bloqueia
+                     quando o x264 não dá conta)
+    render_video     tempo total do job (abertura, áudio, encode e fechamento incluídos)
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import contextlib
+import tempfile
+import subprocess
+import numpy as np
+from PIL import Image, ImageDraw
+from moviepy.video.VideoClip import VideoClip
+from moviepy.audio.AudioClip import AudioClip
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+
+from modules import frame_stream
+from modules import ffmpeg_encoder
+from modules.config_global import global_config
+from modules.editar_com_legendas import VideoRenderer
+from modules.subiitels.renderizador_legendas import RenderizadorLegendas
+from modules.subiitels.gerenciador_emojis import GerenciadorEmojis
+from modules.subiitels.contorno_texto import OUTLINE_METHODS
+from modules.subiitels.cache_sprites import sprite_cache
+from modules.render_metrics import StageTimer, PeakRssSampler
+
+# Estilos de borda (os mesmos da lista da UI, ui/borders.py) e a cor usada em cada um
+STYLES = {
+    "Sem moldura": "#FFFFFF",
+    "Moldura": "#FFFFFF",
+    "Blur": "#FFFFFF",
+    "Blur + Moldura": "#FFFFFF",
+    "black": "#000000",
+    "black + Moldura": "#FFFFFF",
+    "White": "#FFFFFF",
+}
+
+# Conjuntos de recursos sobrepostos ao vídeo
+FEATURES = ("plain", "full")
+
+BENCH_EMOJI = "bench_star.png"
+
+
+def make_synthetic_clip(path, width=1280, height=720, duration=3.0, fps=30):
+    """Grava um clipe sintético (gradiente + barra em movimento + tom de áudio)"""
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+    base[..., 0] = x * 255 // width
+    base[..., 1] = y * 255 // height
+
+    def make_frame(t):
+        frame = base.copy()
+        frame[..., 2] = int(t * 80) % 255
+        bar = int((t * 200) % width)
+        frame[:, max(0, bar - 12):bar + 12] = 255
+        return frame
+
+    def make_audio(t):
+        tone = 0.2 * np.sin(440 * 2 * np.pi * np.asarray(t))
+        return np.stack([tone, tone], axis=-1) if np.ndim(t) else [tone, tone]
+
+    clip = VideoClip(make_frame, duration=duration).set_fps(fps)
+    clip = clip.set_audio(AudioClip(make_audio, duration=duration, fps=44100))
+    clip.write_videofile(path, codec="libx264", audio_codec="aac", preset="ultrafast", logger=None)
+    clip.close()
+    return path
+
+
+def make_assets(folder):
+    """Cria emoji e logo sintéticos e retorna (pasta_emojis, caminho_logo)"""
+    emoji_folder = os.path.join(folder, "emojis")
+    os.makedirs(emoji_folder, exist_ok=True)
+
+    emoji = Image.new("RGBA", (72, 72), (0, 0, 0, 0))
+    ImageDraw.Draw(emoji).ellipse((4, 4, 68, 68), fill=(255, 200, 0, 255), outline=(200, 80, 0, 255), width=4)
+    emoji.save(os.path.join(emoji_folder, BENCH_EMOJI))
+
+    logo_path = os.path.join(folder, "logo.png")
+    logo = Image.new("RGBA", (400, 200), (0, 0, 0, 0))
+    ImageDraw.Draw(logo).rounded_rectangle((0, 0, 399, 199), radius=40, fill=(20, 120, 220, 200))
+    logo.save(logo_path)
+    return emoji_folder, logo_path
+
+
+def build_overlays(logo_path):
+    """Legendas (uma com emoji) e marca d'água/logo do cenário "full" (coordenadas do preview 360x640)"""
+    subtitles = [
+        {"text": f"Legenda de teste [EMOJI:{BENCH_EMOJI}]", "font": "Arial", "size": 18,
+         "color": "#FFFFFF", "border": "#000000", "bg": "", "border_thickness": 2,
+         "align": "center", "italic": False, "x": 180, "y": 460,
+         "start_time": 0.0, "end_time": 1000.0},
+        {"text": "Segunda linha\ncom fundo", "font": "Arial", "size": 14,
+         "color": "#FFFF00", "border": "", "bg": "#202020", "border_thickness": 0,
+         "align": "left", "italic": False, "x": 60, "y": 120,
+         "start_time": 0.5, "end_time": 2.5},
+    ]
+    watermark_data = {
+        "add_text_mark": True, "text_mark": "@benchmark", "x": 180, "y": 320,
+        "font": "Arial", "font_size": 20, "text_color": "#FFFFFF", "opacity": 50,
+        "logo_path": logo_path, "logo_x": 20, "logo_y": 30, "logo_scale": 0.3,
+    }
+    return subtitles, watermark_data
+
+
+def run_scenario(clip_path, output_folder, style, color, features, emoji_manager, logo_path, threads):
+    """Renderiza um cenário e retorna o dicionário de resultados"""
+    subtitles, watermark_data = build_overlays(logo_path) if features == "full" else ([], None)
+    style_lower = style.lower()
+    border_enabled = "moldura" in style_lower or "black" in style_lower or "white" in style_lower or "blur" in style_lower
+
+    timer = StageTimer()
+    renderer = VideoRenderer(emoji_manager)
+    # Os cachês de degradê e de sprites são compartilhados entre renderers: limpar para medir o custo real
+    VideoRenderer._gradient_cache.clear()
+    sprite_cache.clear()
+
+    with timer.instrument(FFMPEG_VideoReader, "get_frame", "decode"), \
+            timer.instrument(frame_stream, "resize_frame", "resize"), \
+            timer.instrument(VideoRenderer, "apply_blur_opencv", "blur"), \
+            timer.instrument(VideoRenderer, "render_frame", "composite"), \
+            timer.instrument(RenderizadorLegendas, "_render_to_cache", "subtitle_raster"), \
+            timer.instrument(ffmpeg_encoder.FFmpegPipeEncoder, "write_frame", "encode_write"), \
+            PeakRssSampler() as rss:
+        start = time.perf_counter()
+        success, result = renderer.render_video(
+            clip_path, output_folder, border_enabled, 14, color, style, subtitles,
+            threads=threads, watermark_data=watermark_data
+        )
+        wall = time.perf_counter() - start
+    timer.add("render_video", wall)
+
+    if not success:
+        return {"style": style, "features": features, "error": result}
+
+    # Frames enviados ao encoder; no encoder MoviePy, os compostos (inclui a chamada extra em t=0)
+    frames = timer.counts.get("encode_write") or timer.counts.get("composite", 0)
+    return {
+        "style": style,
+        "features": features,
+        "frames": frames,
+        "wall_s": round(wall, 3),
+        "fps": round(frames / wall, 2) if wall else 0.0,
+        "stages": timer.report(),
+        "peak_rss_mb": rss.peak_mb,
+        "sprite_cache": sprite_cache.stats(),
+    }
+
+
+def run_outline_benchmark(thicknesses=(1, 2, 4), sizes=(18, 30), repeat=5, scale_factor=3.0):
+    """
+    Compara os motores de contorno com o método antigo (laço de deslocamentos):
+    tempo médio por sprite e diferença média/máxima do alfa em relação ao antigo.
+    """
+    emoji_manager = GerenciadorEmojis()
+    results = []
+    for thickness in thicknesses:
+        for size in sizes:
+            sub = {
+                "text": "Legenda de Teste gjpq 123\nSegunda linha", "font": "Arial", "size": size,
+                "color": "#FFFFFF", "border": "#000000", "bg": "", "border_thickness": thickness,
+                "align": "center", "italic": False,
+            }
+            sprites = {}
+            row = {"border_thickness": thickness, "size": size, "methods": {}}
+            for method in ("legacy",) + tuple(m for m in OUTLINE_METHODS if m != "legacy"):
+                renderer = RenderizadorLegendas(emoji_manager)
+                renderer.outline_method = method
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    sprite = renderer._rasterize(sub, scale_factor, 1.0)[0]
+                elapsed = (time.perf_counter() - start) / repeat
+                sprites[method] = np.asarray(sprite).astype(np.int16)
+
+                alpha_diff = np.abs(sprites[method][..., 3] - sprites["legacy"][..., 3])
+                row["methods"][method] = {
+                    "avg_ms": round(1000 * elapsed, 3),
+                    "speedup": round(row["methods"]["legacy"]["avg_ms"] / (1000 * elapsed), 1) if method != "legacy" else 1.0,
+                    "alpha_mean_diff": round(float(alpha_diff.mean()), 3),
+                    "alpha_max_diff": int(alpha_diff.max()),
+                }
+            results.append(row)
+    return {"meta": {"commit": _git_commit(), "scale_factor": scale_factor, "repeat": repeat}, "outline": results}
+
+
+def _git_commit():
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(styles=None, features=FEATURES, width=1280, height=720, duration=3.0, fps=30, encoder=None, threads=None, keep_files=False):
+    """Roda todos os cenários e retorna o relatório (dicionário serializável em JSON)"""
+    styles = styles or list(STYLES)
+    if encoder:
+        global_config.settings["encoder_backend"] = encoder
+    # Medir um job isolado: sem segmentação paralela
+    global_config.settings["segment_parallel"] = False
+    threads = threads or global_config.get("num_threads")
+
+    work_dir = tempfile.mkdtemp(prefix="render_bench_")
+    try:
+        clip_path = make_synthetic_clip(os.path.join(work_dir, "synthetic.mp4"), width, height, duration, fps)
+        emoji_folder, logo_path = make_assets(work_dir)
+        emoji_manager = GerenciadorEmojis()
+        emoji_manager.load_emojis(emoji_folder)
+
+        scenarios = []
+        for style in styles:
+            for feature_set in features:
+                print(f"[Benchmark] {style} / {feature_set}...", file=sys.stderr)
+                scenarios.append(run_scenario(
+                    clip_path, os.path.join(work_dir, "out"), style, STYLES.get(style, "#FFFFFF"),
+                    feature_set, emoji_manager, logo_path, threads
+                ))
+    finally:
+        if keep_files:
+            print(f"[Benchmark] Arquivos mantidos em {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "source": {"width": width, "height": height, "duration": duration, "fps": fps},
+            "settings": {
+                key: global_config.get(key)
+                for key in ("encoder_backend", "blur_scale", "blur_reuse_interval", "subtitle_outline", "num_threads")
+            },
+            "threads": threads,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de renderização")
+    parser.add_argument("--styles", nargs="+", choices=list(STYLES), help="Estilos a medir (padrão: todos)")
+    parser.add_argument("--features", nargs="+", choices=FEATURES, default=list(FEATURES))
+    parser.add_argument("--size", default="1280x720", help="Resolução do clipe sintético (LxA)")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--encoder", choices=("moviepy", "ffmpeg_pipe"), help="Encoder (padrão: o do config global)")
+    parser.add_argument("--threads", type=int, help="Threads do encoder (padrão: num_threads)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--keep-files", action="store_true", help="Não apagar clipes e vídeos gerados")
+    parser.add_argument("--outline", action="store_true", help="Comparar apenas os motores de contorno das legendas")
+    args = parser.parse_args(argv)
+
+    # Logs do render ([DEBUG], MoviePy, avisos de fontes) vão para o stderr: o stdout fica
+    # só com o relatório JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.outline:
+            report = run_outline_benchmark()
+        else:
+            width, height = (int(v) for v in args.size.lower().split("x"))
+            report = run_benchmark(
+                styles=args.styles, features=args.features, width=width, height=height,
+                duration=args.duration, fps=args.fps, encoder=args.encoder,
+                threads=args.threads, keep_files=args.keep_files
+            )
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[Benchmark] Relatório salvo em {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,25 @@ CONFIG_FILE = "global_settings.json"
 DEFAULT_SETTINGS = {
     "num_threads": 4,
     "parallel_jobs": 1,
+    "adaptive_scheduling": False,  # Escolhe jobs simultâneos e threads por job automaticamente
+    "executor_mode": "thread",  # "thread" (ThreadPoolExecutor) ou "process" (ProcessPoolExecutor, escapa do GIL)
+    "blur_scale": 0.25,  # Fração da resolução usada no blur do fundo (1.0 = resolução cheia)
+    "blur_reuse_interval": 1,  # Reaproveita o fundo blur por até N frames (1 = recalcula todo frame)
+    "blur_reuse_threshold": 6.0,  # Diferença média (0-255) entre frames que força recalcular o blur
+    "segment_parallel": False,  # Divide vídeos longos em segmentos renderizados em paralelo
+    "segment_workers": 0,  # Segmentos simultâneos (0 = automático, metade das threads do job)
+    "segment_min_duration": 20.0,  # Duração mínima (s) de cada segmento
+    "sprite_cache_mb": 256,  # Limite (MB) do cachê de sprites de legenda compartilhado pelo processo
+    "subtitle_outline": "dilate",  # Contorno das legendas: "dilate" (visual clássico), "stroke" (arredondado) ou "legacy"
+    "enhancement_batch_size": 4,  # Frames por lote no worker de inferência do GFPGAN
+    "enhancement_mode": "full",  # "full" (GFPGAN no frame inteiro) ou "tracked" (experimental: só as faces, rastreadas entre detecções)
+    "enhancement_detect_interval": 5,  # No modo "tracked", detecta faces a cada N frames
+    "enhancement_backend": "auto",  # Rede do GFPGAN: "auto" (ONNX em CPU se exportado), "torch", "onnx" ou "onnx_int8"
+    "enhancement_cache": False,  # Guarda em disco os frames melhorados (renders da mesma fonte pulam o GFPGAN)
+    "enhancement_cache_dir": "",  # Pasta do cachê de enhancement ("" = pasta temporária do sistema)
+    "enhancement_cache_gb": 5,  # Limite (GB) do cachê de enhancement; remove as fontes usadas há mais tempo
+    "encoder_backend": "moviepy",  # "moviepy" (write_videofile) ou "ffmpeg_pipe" (frames direto no stdin do ffmpeg)
+    "render_metrics": False,  # Grava <vídeo>.metrics.json com o tempo de cada etapa do render
     "default_output_path": "",
     "export_format": "mp4",
     "image_to_video_duration": 5,  # Duração padrão em segundos para conversão de imagens
@@ -1,14 +1,26 @@
 import os
+import time
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import cv2
 import moviepy.editor as mp
 from moviepy.video.VideoClip import VideoClip
 from modules.subiitels.renderizador_legendas import RenderizadorLegendas
+from modules.subiitels.indice_temporal import SubtitleTimeline
 from modules.audio.gerenciador_audio import GerenciadorAudio
 from modules import video_enhancement
 from modules import mesclagem_back
+from modules import ffmpeg_encoder
+from modules import segment_renderer
+from modules import alpha_blend
+from modules.frame_pool import FrameBufferPool, copy_into
+from modules.frame_stream import SourceFrameStream, resize_frame
+from modules.enhancement_stage import EnhancedFrameStream
+from modules.enhancement_cache import EnhancementCache
+from modules.global_executor import claim_job_threads
+from modules.blur_engine import blur_background, TemporalBlurCache
 from modules.config_global import global_config
+from modules.render_metrics import StageTimer, measure, write_report
 from modules.process_image import is_image_file, auto_convert_if_image
 
 class VideoRenderer:
@@ -21,27 +33,31 @@ class VideoRenderer:
     BASE_WIDTH = 360.0  # Base usada no preview para cálculos de escala (360x640)
     ASPECT_RATIO = 9 / 16
     
+    # Fundos degradê já calculados, compartilhados entre renderers: (cor, tamanho, largura do degradê) -> Image
+    _gradient_cache = {}
+    
     def __init__(self, emoji_manager):
         self.emoji_manager = emoji_manager
         self.subtitle_renderer = RenderizadorLegendas(emoji_manager)
         self.audio_manager = GerenciadorAudio()
         self.blur_intensity = 25
+        # Reaproveitamento temporal do fundo blur (intervalo 1 = recalcula todo frame)
+        self.blur_reuse_interval = global_config.get("blur_reuse_interval")
+        self.blur_reuse_threshold = global_config.get("blur_reuse_threshold")
         self.enhancement_enabled = False
         self.logo_cache = {}
         
+        # Camadas estáticas (fundo, moldura, marca d'água, logo) montadas uma vez por job
+        self._static_layers = None
+        self._static_layers_key = None
+        
         # Proporções dinâmicas do vídeo interno
         self.video_width_ratio = 0.78
         self.video_height_ratio = 0.70
 
-    def apply_blur_opencv(self, frame):
-        """Aplica blur em um frame usando OpenCV"""
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        blurred = cv2.GaussianBlur(
-            frame_bgr,
-            (self.blur_intensity * 2 + 1, self.blur_intensity * 2 + 1),
-            0
-        )
-        return cv2.cvtColor(blurred, cv2.COLOR_BGR2RGB)
+    def apply_blur_opencv(self, frame, out=None):
+        """Aplica blur em um frame usando OpenCV (em resolução reduzida, conforme "blur_scale")"""
+        return blur_background(frame, self.blur_intensity, out=out)
 
     def get_scale_factor(self):
         """Retorna o fator de escala entre o preview (270p) e o output (1080p)"""
@@ -68,6 +84,10 @@ class VideoRenderer:
             
         return video_width, video_height, scaled_border_size
 
+    def fills_output(self, border_enabled, border_style):
+        """True quando o vídeo ocupa a tela inteira 1080x1920 (sem borda ou estilo "Sem moldura")"""
+        return not border_enabled or border_style == "Sem moldura"
+
     def get_offsets(self, v_w, v_h):
         """Retorna os offsets X e Y para centralizar o vídeo no fundo 1080x1920"""
         offset_x = (self.OUTPUT_WIDTH - v_w) // 2
@@ -94,30 +114,30 @@ class VideoRenderer:
         
         return Image.new('RGB', (self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT), bg_color)
 
-    def create_gradient_background(self, base_color):
-        """Cria um fundo com degradê nas bordas"""
-        color = base_color.lstrip('#')
-        r, g, b = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-        
-        image = Image.new('RGB', (self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT))
-        pixels = image.load()
+    def create_gradient_background(self, base_color, gradient_area=50):
+        """Cria um fundo com degradê nas bordas (gradient_area: pixels de degradê)"""
+        size = (self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT)
+        cache_key = (base_color, size, gradient_area)
+        if cache_key not in VideoRenderer._gradient_cache:
+            color = base_color.lstrip('#')
+            rgb = np.array([int(color[i:i+2], 16) for i in (0, 2, 4)], dtype=np.float64)
+            
+            # Campo de distância até a borda mais próxima (equivalente ao laço pixel a pixel)
+            width, height = size
+            xs = np.arange(width)
+            ys = np.arange(height)
+            dist_x = np.minimum(xs, width - xs - 1)
+            dist_y = np.minimum(ys, height - ys - 1)
+            min_dist = np.minimum(dist_x[np.newaxis, :], dist_y[:, np.newaxis])
+            
+            intensity = np.minimum(min_dist, gradient_area) / float(gradient_area)
+            pixels = (intensity[:, :, np.newaxis] * rgb).astype(np.uint8)
+            VideoRenderer._gradient_cache[cache_key] = Image.fromarray(pixels)
         
-        gradient_area = 50  # Pixels de degradê
-        
-        for x in range(self.OUTPUT_WIDTH):
-            for y in range(self.OUTPUT_HEIGHT):
-                dist_x = min(x, self.OUTPUT_WIDTH - x - 1)
-                dist_y = min(y, self.OUTPUT_HEIGHT - y - 1)
-                min_dist = min(dist_x, dist_y)
-                
-                if min_dist < gradient_area:
-                    intensity = min_dist / float(gradient_area)
-                    pixels[x, y] = (int(r * intensity), int(g * intensity), int(b * intensity))
-                else:
-                    pixels[x, y] = (r, g, b)
-        return image
+        # Devolve uma cópia: quem chama pode colar moldura/vídeo por cima
+        return VideoRenderer._gradient_cache[cache_key].copy()
 
-    def render_frame(self, video_frame, subtitles, border_enabled, border_size_preview, border_color, border_style, emoji_scale=1.0, background_frame=None, is_preview=False, watermark_data=None, current_time=0.0, video_duration=None):
+    def render_frame(self, video_frame, subtitles, border_enabled, border_size_preview, border_color, border_style, emoji_scale=1.0, background_frame=None, is_preview=False, watermark_data=None, current_time=0.0, video_duration=None, subtitle_index=None, out=None):
         """
         Renderiza um único frame com bordas, legendas e marca d'água.
         video_frame: numpy array do frame do vídeo (já redimensionado para a área interna)
@@ -125,25 +145,97 @@ class VideoRenderer:
         watermark_data: dicionário com as configurações da marca d'água
         current_time: tempo atual do vídeo para filtragem de legendas
         video_duration: duração total do vídeo (usado para end_time padrão dinâmico)
+        subtitle_index: SubtitleTimeline com os mesmos tempos de `subtitles` (o render monta um por job);
+            os índices ativos são resolvidos contra `subtitles`
+        out: buffer uint8 1080x1920x3 onde montar o frame (do FrameBufferPool do job); None aloca um novo
         """
-        video_image = Image.fromarray(video_frame.astype(np.uint8))
+        video_frame = np.asarray(video_frame, dtype=np.uint8)
         
+        layers = self._get_static_layers(border_enabled, border_size_preview, border_color, border_style, is_preview, watermark_data)
+        scale_factor = layers["scale_factor"]
+        offset_x = layers["offset_x"]
+        offset_y = layers["offset_y"]
+
+        # O frame é montado direto em um array uint8 (sem Image.fromarray/np.array por frame)
+        if layers["border_enabled"]:
+            # Fundo (Background): o blur muda a cada frame, os demais vêm prontos da placa estática
+            if background_frame is not None and "blur" in (border_style or "").lower():
+                final_frame = copy_into(out, background_frame)
+                if layers["frame_rect"] is not None:
+                    alpha_blend.fill(final_frame, layers["frame_rect"], layers["frame_color"])
+            else:
+                final_frame = copy_into(out, layers["plate"])
+            
+            # O vídeo já está centralizado via paste_x, paste_y
+            alpha_blend.paste(final_frame, video_frame, layers["video_pos"])
+        else:
+            # Sem borda: o vídeo preenche toda a tela 1080x1920 (o render já entrega nesse tamanho)
+            output_size = (self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT)
+            if video_frame.shape[:2] == (self.OUTPUT_HEIGHT, self.OUTPUT_WIDTH):
+                final_frame = copy_into(out, video_frame)
+            else:
+                if out is not None and out.shape != (self.OUTPUT_HEIGHT, self.OUTPUT_WIDTH, 3):
+                    out = None
+                final_frame = resize_frame(video_frame, output_size, out=out)
+
+        # 2. Desenhar legendas ativas em current_time ([início, fim); fim 1000.0 = duração do vídeo)
+        if subtitles:
+            if subtitle_index is None or len(subtitle_index) != len(subtitles):
+                subtitle_index = SubtitleTimeline(subtitles, video_duration)
+            # O índice guarda só posições (depende apenas dos tempos); o conteúdo vem sempre da
+            # lista atual, então um índice reaproveitado pelo preview nunca desenha texto antigo
+            for idx in subtitle_index.active_indices(current_time):
+                sub = subtitles[idx]
+                layer, pos = self.subtitle_renderer.get_subtitle_layer(
+                    sub, 
+                    scale_factor=scale_factor,
+                    emoji_scale=emoji_scale,
+                    offset_x=offset_x,
+                    offset_y=offset_y
+                )
+                alpha_blend.blend(final_frame, layer, pos)
+                
+        # 3. Marca d'água em texto e 4. Logo (imagem), já rasterizadas, pré-multiplicadas e posicionadas
+        for overlay_layer, overlay_pos in layers["overlays"]:
+            alpha_blend.blend(final_frame, overlay_layer, overlay_pos)
+                
+        return final_frame
+
+    def _get_static_layers(self, border_enabled, border_size_preview, border_color, border_style, is_preview, watermark_data):
+        """
+        Monta as camadas que não mudam entre frames (fundo, moldura, offsets, marca d'água e logo).
+        O resultado fica em cachê e só é refeito quando algum parâmetro muda.
+        """
+        watermark_key = None
+        if watermark_data:
+            watermark_key = tuple(sorted((k, repr(v)) for k, v in watermark_data.items()))
+        key = (
+            border_enabled, border_size_preview, repr(border_color), border_style, is_preview,
+            self.video_width_ratio, self.video_height_ratio, watermark_key
+        )
+        if self._static_layers is not None and self._static_layers_key == key:
+            return self._static_layers
+
         # Se o estilo for "Sem moldura", forçamos border_enabled para False para garantir
-        if border_style == "Sem moldura":
+        if self.fills_output(border_enabled, border_style):
             border_enabled = False
 
+        # O scale_factor é sempre OUTPUT_WIDTH / BASE_WIDTH (1080 / 360 = 3.0)
+        scale_factor = self.get_scale_factor()
+        plate = None
+        frame_rect = None
+        frame_color = None
+        video_pos = None
+
         if border_enabled:
-            # Com bordas: usa o scale_factor padrão baseado em BASE_WIDTH (360)
-            scale_factor = self.get_scale_factor()
-            
             # 1. Calcular dimensões
             v_w, v_h, scaled_border = self.calculate_video_dimensions(border_enabled, border_size_preview, is_preview=is_preview)
             
-            # Fundo (Background)
-            final_image = self.create_background(border_style, border_color, 0, background_frame=background_frame)
+            # Fundo (Background) sólido ou degradê
+            plate = self.create_background(border_style, border_color, 0)
             
             # Centralizar vídeo no fundo (ou na moldura)
-            paste_x, paste_y = self.get_offsets(v_w, v_h)
+            video_pos = self.get_offsets(v_w, v_h)
 
             if border_style and "Moldura" in border_style:
                 # O tamanho da moldura é o tamanho do vídeo + border_size em cada lado
@@ -158,80 +250,64 @@ class VideoRenderer:
                     frame_color = border_color
 
                 frame_image = Image.new('RGB', (frame_width, frame_height), frame_color)
+                frame_color = np.array(frame_image.getpixel((0, 0)), dtype=np.uint8)
                 
                 # Centralizar moldura no fundo
-                frame_x = (self.OUTPUT_WIDTH - frame_width) // 2
-                frame_y = (self.OUTPUT_HEIGHT - frame_height) // 2
-                final_image.paste(frame_image, (frame_x, frame_y))
-                
-                # O vídeo já está centralizado via paste_x, paste_y
-                final_image.paste(video_image, (paste_x, paste_y))
-            else:
-                # Sem moldura, apenas centraliza o vídeo no fundo
-                final_image.paste(video_image, (paste_x, paste_y))
+                frame_pos = ((self.OUTPUT_WIDTH - frame_width) // 2, (self.OUTPUT_HEIGHT - frame_height) // 2)
+                frame_rect = (*frame_pos, frame_width, frame_height)
+                plate.paste(frame_image, frame_pos)
             
             # O offset para as legendas deve ser relativo ao canto superior esquerdo da imagem final
-            offset_x = paste_x
-            offset_y = paste_y
+            offset_x, offset_y = video_pos
         else:
-            # Sem borda: o vídeo preenche toda a tela 1080x1920
-            # O scale_factor deve ser calculado como OUTPUT_WIDTH / BASE_WIDTH (1080 / 360 = 3.0)
-            # mas as legendas devem ser posicionadas diretamente na imagem final sem offset
-            scale_factor = self.get_scale_factor()
-            final_image = video_image.resize((self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT), Image.Resampling.LANCZOS)
+            # Sem borda: as legendas devem ser posicionadas diretamente na imagem final sem offset
             # Simula as dimensões com borda para calcular o offset correto
             # v_w = OUTPUT_WIDTH * video_width_ratio
             v_w_dummy = int(self.OUTPUT_WIDTH * self.video_width_ratio)
             v_h_dummy = int(self.OUTPUT_HEIGHT * self.video_height_ratio)
             offset_x, offset_y = self.get_offsets(v_w_dummy, v_h_dummy)
 
-        # 2. Desenhar legendas
-        if subtitles:
-            draw = ImageDraw.Draw(final_image)
-            for sub in subtitles:
-                # Filtragem por tempo
-                start = sub.get("start_time", 0.0)
-                end = sub.get("end_time", 1000.0)
-                
-                # CORREÇÃO: Se end_time for o valor padrão (1000.0), usar a duração do vídeo
-                # Isso torna o end_time dinâmico baseado no vídeo atual
-                if end >= 1000.0 and video_duration is not None:
-                    end = video_duration
-                
-                # Verificar se está no intervalo de tempo
-                if current_time < start:
-                    continue  # Ainda não começou
-                    
-                # Verificar se já passou do end_time
-                if current_time >= end:
-                    continue  # Já terminou
-
-                self.subtitle_renderer.draw_subtitle(
-                    draw, 
-                    sub, 
-                    scale_factor=scale_factor,
-                    emoji_scale=emoji_scale,
-                    offset_x=offset_x,
-                    offset_y=offset_y
-                )
-                
-        # 3. Desenhar marca d'água em texto
+        # Marca d'água e logo não dependem do tempo: rasterizar e posicionar uma única vez
+        overlays = []
         if watermark_data and watermark_data.get("add_text_mark"):
-            draw = ImageDraw.Draw(final_image)
-            self._draw_watermark(draw, watermark_data, scale_factor, offset_x, offset_y)
-            
-        # 4. Desenhar Logo (Imagem)
+            sub_format = self._get_watermark_sub_format(watermark_data)
+            if sub_format:
+                overlays.append(self.subtitle_renderer.get_subtitle_layer(
+                    sub_format, scale_factor=scale_factor, offset_x=offset_x, offset_y=offset_y
+                ))
         if watermark_data and watermark_data.get("logo_path"):
-            draw = ImageDraw.Draw(final_image)
-            self._draw_logo(final_image, watermark_data, scale_factor, offset_x, offset_y)
-                
-        return np.array(final_image)
+            logo_sprite = self._get_logo_sprite(watermark_data, scale_factor, offset_x, offset_y)
+            if logo_sprite:
+                logo, logo_pos = logo_sprite
+                overlays.append((alpha_blend.AlphaLayer(logo), logo_pos))
+
+        self._static_layers = {
+            "border_enabled": border_enabled,
+            "scale_factor": scale_factor,
+            "offset_x": offset_x,
+            "offset_y": offset_y,
+            "plate": np.array(plate) if plate is not None else None,
+            "frame_rect": frame_rect,
+            "frame_color": frame_color,
+            "video_pos": video_pos,
+            "overlays": overlays,
+        }
+        self._static_layers_key = key
+        return self._static_layers
 
     def _draw_logo(self, final_image, data, scale_factor, offset_x, offset_y):
         """Desenha a logo (imagem) sobre o frame final"""
+        logo_sprite = self._get_logo_sprite(data, scale_factor, offset_x, offset_y)
+        if logo_sprite:
+            logo, pos = logo_sprite
+            # Colar logo (com transparência)
+            final_image.paste(logo, pos, logo)
+
+    def _get_logo_sprite(self, data, scale_factor, offset_x, offset_y):
+        """Retorna a logo redimensionada (do cachê) e sua posição no frame final"""
         logo_path = data.get("logo_path")
         if not logo_path or not os.path.exists(logo_path):
-            return
+            return None
 
         try:
             base_scale = data.get("logo_scale", 0.2)
@@ -242,13 +318,12 @@ class VideoRenderer:
                 logo = self.logo_cache[cache_key]
             else:
                 # Carregar e redimensionar logo (apenas uma vez)
-                from PIL import Image
                 logo = Image.open(logo_path).convert("RGBA")
                 new_w = int(logo.width * final_scale)
                 new_h = int(logo.height * final_scale)
                 
                 if new_w < 1 or new_h < 1:
-                    return
+                    return None
                     
                 logo = logo.resize((new_w, new_h), Image.Resampling.LANCZOS)
                 self.logo_cache[cache_key] = logo
@@ -260,11 +335,11 @@ class VideoRenderer:
             final_x = int((user_x * scale_factor) + offset_x)
             final_y = int((user_y * scale_factor) + offset_y)
             
-            # Colar logo (com transparência)
-            final_image.paste(logo, (final_x, final_y), logo)
+            return logo, (final_x, final_y)
             
         except Exception as e:
             print(f"Erro ao desenhar logo: {e}")
+            return None
 
     def get_logo_bbox(self, data, scale_factor, offset_x, offset_y):
         """Calcula o bounding box da logo para interação no preview"""
@@ -292,11 +367,24 @@ class VideoRenderer:
 
     def _draw_watermark(self, draw, data, scale_factor, offset_x, offset_y):
         """Desenha a marca d'água de texto usando o mesmo renderer das legendas"""
+        sub_format = self._get_watermark_sub_format(data)
+        if not sub_format:
+            return
+
+        self.subtitle_renderer.draw_subtitle(
+            draw, 
+            sub_format, 
+            scale_factor=scale_factor, 
+            offset_x=offset_x, 
+            offset_y=offset_y
+        )
+
+    def _get_watermark_sub_format(self, data):
+        """Converte os dados da marca d'água para o formato de legenda esperado pelo renderer"""
         text = data.get("text_mark", "")
         if not text:
-            return
+            return None
 
-        # Converter dados da marca d'água para o formato de legenda esperado pelo renderer
         hex_color = data.get("text_color", "#FFFFFF")
         opacity = data.get("opacity", 100) / 100.0
         
@@ -305,7 +393,7 @@ class VideoRenderer:
         rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
         rgba_color = (*rgb, int(255 * opacity))
 
-        sub_format = {
+        return {
             "text": text,
             "x": data.get("x", 135),
             "y": data.get("y", 400),
@@ -317,14 +405,6 @@ class VideoRenderer:
             "border_thickness": 0
         }
 
-        self.subtitle_renderer.draw_subtitle(
-            draw, 
-            sub_format, 
-            scale_factor=scale_factor, 
-            offset_x=offset_x, 
-            offset_y=offset_y
-        )
-
     def get_watermark_bbox(self, data, scale_factor, offset_x, offset_y):
         """Calcula o bounding box da marca d'água usando o mesmo renderer das legendas"""
         text = data.get("text_mark", "")
@@ -346,15 +426,128 @@ class VideoRenderer:
             offset_y=offset_y
         )
 
-    def render_video(self, input_path, output_folder, border_enabled, border_size_preview, border_color, border_style, subtitles, emoji_scale=1.0, threads=None, audio_settings=None, watermark_data=None, mesclagem_data=None, tab_number=None, enable_enhancement=False):
+    def prepare_sprites(self, subtitles, emoji_scale=1.0, watermark_data=None):
+        """Rasteriza todas as legendas (e a marca d'água em texto) do job em um SpriteAtlas"""
+        subs = list(subtitles or [])
+        if watermark_data and watermark_data.get("add_text_mark"):
+            sub_format = self._get_watermark_sub_format(watermark_data)
+            if sub_format:
+                subs.append(sub_format)
+        return self.subtitle_renderer.build_atlas(subs, self.get_scale_factor(), emoji_scale)
+
+    def create_frame_maker(self, clip, v_w, v_h, subtitles, border_enabled, border_size_preview, border_color, border_style, emoji_scale=1.0, watermark_data=None, enable_enhancement=False, fps=30.0, original_main_duration=None, progress_callback=None, metrics=None):
+        """
+        Monta a função make_frame(t) do vídeo principal.
+        t é sempre o tempo global do vídeo, então a mesma função serve para o render
+        completo e para cada segmento da renderização segmentada.
+        metrics: StageTimer opcional (etapas frame, decode, resize, enhancement, blur, composite)
+        """
+        if original_main_duration is None:
+            original_main_duration = clip.duration
+        total_frames_main = int(original_main_duration * fps)
+        # Índice temporal das legendas montado uma única vez para o job inteiro
+        subtitle_index = SubtitleTimeline(subtitles, original_main_duration)
+        # Sprites de legenda/marca d'água rasterizados antes do loop (sem picos no meio do encode)
+        with measure(metrics, "sprite_atlas"):
+            self.prepare_sprites(subtitles, emoji_scale, watermark_data)
+
+        # Uma única leitura sequencial da fonte, distribuída para o vídeo interno e o fundo blur
+        frame_stream = SourceFrameStream(clip, metrics=metrics)
+        # Tamanho do vídeo planejado uma vez: sem borda, a fonte vai direto para 1080x1920 em
+        # uma só passada (nenhuma se já estiver nesse tamanho), em vez de v_w x v_h + ampliação
+        if self.fills_output(border_enabled, border_style):
+            video_size = (self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT)
+        else:
+            video_size = (v_w, v_h)
+        # Enhancement em lote: frames enviados antecipadamente ao worker de inferência do GFPGAN
+        enhanced_stream = None
+        if enable_enhancement and video_enhancement.get_enhancer() is not None:
+            # Frames melhorados em renders anteriores da mesma fonte (outras abas/lotes) vêm do disco
+            enhancement_cache = EnhancementCache.for_source(getattr(clip, "filename", None), video_size, video_enhancement.result_tag())
+            enhanced_stream = EnhancedFrameStream(frame_stream, fps, video_size, metrics=metrics, cache=enhancement_cache)
+        use_blur_background = "blur" in (border_style or "").lower()
+        blur_cache = None
+        if use_blur_background and self.blur_reuse_interval > 1:
+            blur_cache = TemporalBlurCache(self.blur_reuse_interval, self.blur_reuse_threshold)
+
+        # Buffers reaproveitados a cada frame: frame final (anel entregue ao encoder) e fundo blur
+        output_shape = (self.OUTPUT_HEIGHT, self.OUTPUT_WIDTH, 3)
+        frame_pool = FrameBufferPool(output_shape)
+        blur_buffer = np.empty(output_shape, dtype=np.uint8) if use_blur_background else None
+
+        # Progresso do vídeo principal (0-100), reportado apenas quando o percentual muda
+        last_progress = [-1]
+
+        def make_frame(t):
+            with measure(metrics, "frame"):
+                return compose_frame(t)
+
+        def compose_frame(t):
+            if progress_callback:
+                percent = min(100, int(100 * t / clip.duration)) if clip.duration else 100
+                if percent != last_progress[0]:
+                    last_progress[0] = percent
+                    progress_callback(percent)
+
+            if enhanced_stream is not None:
+                # Frame já melhorado pelo worker (GFPGAN), lido antecipadamente em lotes
+                frame = enhanced_stream.get(t)
+            else:
+                frame = frame_stream.resized(t, video_size)
+
+            bg_frame = None
+            if use_blur_background:
+                def compute_blur():
+                    raw_bg = frame_stream.resized(t, (self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT))
+                    with measure(metrics, "blur"):
+                        return self.apply_blur_opencv(raw_bg, out=blur_buffer)
+
+                if blur_cache:
+                    bg_frame = blur_cache.get(frame_stream.frame(t), compute_blur)
+                else:
+                    bg_frame = compute_blur()
+
+            # CORREÇÃO: Ocultar legendas se estiver nos vídeos de mesclagem/CTA
+            # Usar duração ORIGINAL capturada antes de modificações (sync_duration, etc)
+            # Calcular frame atual e comparar com total de frames do vídeo principal
+            current_frame = int(t * fps)
+            subs_to_render = subtitles if current_frame < total_frames_main else []
+
+            with measure(metrics, "composite"):
+                return self.render_frame(
+                    frame, 
+                    subs_to_render, 
+                    border_enabled, 
+                    border_size_preview, 
+                    border_color, 
+                    border_style,
+                    emoji_scale,
+                    background_frame=bg_frame,
+                    watermark_data=watermark_data,
+                    current_time=t,
+                    video_duration=original_main_duration,
+                    subtitle_index=subtitle_index,
+                    out=frame_pool.next()
+                )
+
+        return make_frame
+
+    def render_video(self, input_path, output_folder, border_enabled, border_size_preview, border_color, border_style, subtitles, emoji_scale=1.0, threads=None, audio_settings=None, watermark_data=None, mesclagem_data=None, tab_number=None, enable_enhancement=False, progress_callback=None):
         # Usar threads do config global se não for especificado
         if threads is None:
             threads = global_config.get("num_threads")
         """Renderiza o vídeo completo"""
+        if enable_enhancement:
+            # Modelo carregando em segundo plano enquanto a fonte é aberta e o áudio preparado
+            video_enhancement.warmup_async()
+        # Tempo por etapa (opcional): relatório <saída>.metrics.json ao lado do vídeo
+        metrics = StageTimer() if global_config.get("render_metrics") else None
+        job_start = time.perf_counter()
         try:
             # 0. Detectar e converter imagem em vídeo automaticamente
             original_input_path = input_path
-            input_path = auto_convert_if_image(input_path)
+            with measure(metrics, "image_to_video"):
+                input_path = auto_convert_if_image(input_path)
             
             # Se foi convertido, registrar no log
             if input_path != original_input_path:
@@ -365,7 +558,8 @@ class VideoRenderer:
             if mesclagem_data and mesclagem_data.get("hide_subtitles"):
                 actual_subtitles = []
 
-            clip = mp.VideoFileClip(input_path)
+            with measure(metrics, "open"):
+                clip = mp.VideoFileClip(input_path)
             
             # IMPORTANTE: Capturar duração ORIGINAL do vídeo principal ANTES de qualquer modificação
             # Isso garante que as legendas sejam renderizadas até o último frame do vídeo original
@@ -376,6 +570,7 @@ class VideoRenderer:
             print(f"[DEBUG] Vídeo principal: {original_main_duration:.2f}s, {fps} fps, {total_frames_main} frames")
             
             # 1. Lógica de Áudio
+            audio_start = time.perf_counter()
             final_audio = clip.audio
             if audio_settings:
                 remove_audio = audio_settings.get('remove_audio', False)
@@ -404,61 +599,14 @@ class VideoRenderer:
                         final_audio = None
                 elif remove_audio:
                     final_audio = None
+            if metrics:
+                metrics.add("audio", time.perf_counter() - audio_start)
 
             # 2. Dimensões do vídeo interno
             v_w, v_h, _ = self.calculate_video_dimensions(border_enabled, border_size_preview)
-            video_resized = clip.resize((v_w, v_h))
-            
-            # Preparar fundo se for blur
-            background_clip = None
-            if "blur" in (border_style or "").lower():
-                background_clip = clip.resize((self.OUTPUT_WIDTH, self.OUTPUT_HEIGHT))
 
-            def make_frame(t):
-                frame = video_resized.get_frame(t)
-                
-                # Aplicar enhancement se ativado
-                if enable_enhancement:
-                    # Converter RGB para BGR (OpenCV format)
-                    frame_bgr = cv2.cvtColor(frame.astype(np.uint8), cv2.COLOR_RGB2BGR)
-                    # Aplicar GFPGAN
-                    enhanced_bgr = video_enhancement.enhance_frame(frame_bgr)
-                    # Converter de volta para RGB
-                    frame = cv2.cvtColor(enhanced_bgr, cv2.COLOR_BGR2RGB)
-                
-                bg_frame = None
-                if background_clip:
-                    raw_bg = background_clip.get_frame(t)
-                    bg_frame = self.apply_blur_opencv(raw_bg)
-                
-                # CORREÇÃO: Ocultar legendas se estiver nos vídeos de mesclagem/CTA
-                # Usar duração ORIGINAL capturada antes de modificações (sync_duration, etc)
-                # Calcular frame atual e comparar com total de frames do vídeo principal
-                current_frame = int(t * fps)
-                subs_to_render = actual_subtitles if current_frame < total_frames_main else []
-                
-                return self.render_frame(
-                    frame, 
-                    subs_to_render, 
-                    border_enabled, 
-                    border_size_preview, 
-                    border_color, 
-                    border_style,
-                    emoji_scale,
-                    background_frame=bg_frame,
-                    watermark_data=watermark_data,
-                    current_time=t,
-                    video_duration=original_main_duration
-                )
-            
-            final_clip = VideoClip(make_frame=make_frame, duration=clip.duration)
-            final_clip = final_clip.set_fps(fps)
-            
-            if final_audio:
-                final_clip = final_clip.set_audio(final_audio)
-
-            # 3. Adicionar Vídeos Sequenciais (Mesclagem e CTA)
-            sequence = [final_clip]
+            # 3. Vídeos Sequenciais (Mesclagem e CTA)
+            extra_clips = []
             
             # 3.1 Vídeo de Mesclagem (Logo após o principal)
             if mesclagem_data and mesclagem_data.get("use_merge"):
@@ -466,7 +614,7 @@ class VideoRenderer:
                 if merge_path and os.path.exists(merge_path):
                     merge_clip = mesclagem_back.preparar_video_extra(merge_path)
                     if merge_clip:
-                        sequence.append(merge_clip)
+                        extra_clips.append(merge_clip)
 
             # 3.2 Vídeo de CTA (Final)
             if mesclagem_data and mesclagem_data.get("use_cta"):
@@ -474,11 +622,48 @@ class VideoRenderer:
                 if cta_path and os.path.exists(cta_path):
                     cta_video_clip = mesclagem_back.preparar_video_extra(cta_path)
                     if cta_video_clip:
-                        sequence.append(cta_video_clip)
-            
-            # Se houver mais de um vídeo, concatenar
-            if len(sequence) > 1:
-                final_clip = mp.concatenate_videoclips(sequence, method="compose") # compose ajuda com disparidade de FPS/Size
+                        extra_clips.append(cta_video_clip)
+
+            # Threads finais do job: o AdaptiveScheduler pode ter repassado núcleos de jobs que
+            # terminaram desde o despacho; daqui em diante ficam fixas
+            threads = claim_job_threads(threads)
+
+            # Segmentação decidida antes de montar o frame maker: os segmentos montam o seu
+            # próprio em cada worker, então o deste processo (enhancer, atlas) seria desperdiçado
+            segmented = not extra_clips and segment_renderer.should_render_segmented(
+                clip.duration, threads=threads, enable_enhancement=enable_enhancement
+            )
+
+            final_clip = None
+            if not segmented:
+                make_frame = self.create_frame_maker(
+                    clip,
+                    v_w,
+                    v_h,
+                    actual_subtitles,
+                    border_enabled,
+                    border_size_preview,
+                    border_color,
+                    border_style,
+                    emoji_scale=emoji_scale,
+                    watermark_data=watermark_data,
+                    enable_enhancement=enable_enhancement,
+                    fps=fps,
+                    original_main_duration=original_main_duration,
+                    progress_callback=progress_callback,
+                    metrics=metrics
+                )
+                
+                final_clip = VideoClip(make_frame=make_frame, duration=clip.duration)
+                final_clip = final_clip.set_fps(fps)
+                
+                if final_audio:
+                    final_clip = final_clip.set_audio(final_audio)
+                
+                # Se houver mais de um vídeo, concatenar
+                if extra_clips:
+                    with measure(metrics, "concat"):
+                        final_clip = mp.concatenate_videoclips([final_clip] + extra_clips, method="compose") # compose ajuda com disparidade de FPS/Size
             
             # Garantir que o diretório de saída exista
             os.makedirs(output_folder, exist_ok=True)
@@ -495,23 +680,75 @@ class VideoRenderer:
             else:
                 output_path = os.path.join(output_folder, f"{base_name}_render.mp4")
             
-            final_clip.write_videofile(
-                output_path,
-                codec="libx264",
-                audio_codec="aac",
-                fps=fps,
-                threads=threads,
-                preset="medium",
-                temp_audiofile=os.path.join(temp_dir, f"{base_name}_temp_audio.m4a"),
-                remove_temp=True
-            )
+            temp_audiofile = os.path.join(temp_dir, f"{base_name}_temp_audio.m4a")
+            # Fase de escrita: o que não for geração de frame é encode/mux (inclui mesclagem/CTA)
+            write_start = time.perf_counter()
+            frame_time_before = metrics.totals.get("frame", 0.0) if metrics else 0.0
+            if segmented:
+                # Vídeo longo sem mesclagem/CTA: segmentos em paralelo + concatenação sem recodificar
+                task_template = segment_renderer.SegmentTask(
+                    input_path=input_path,
+                    fps=fps,
+                    v_w=v_w,
+                    v_h=v_h,
+                    border_enabled=border_enabled,
+                    border_size_preview=border_size_preview,
+                    border_color=border_color,
+                    border_style=border_style,
+                    original_main_duration=original_main_duration,
+                    subtitles=actual_subtitles,
+                    emoji_scale=emoji_scale,
+                    emoji_folder=getattr(self.emoji_manager, "folder", None),
+                    watermark_data=watermark_data,
+                    enable_enhancement=enable_enhancement,
+                    video_width_ratio=self.video_width_ratio,
+                    video_height_ratio=self.video_height_ratio,
+                    threads=threads
+                )
+                segment_renderer.render_segmented(
+                    task_template,
+                    clip.duration,
+                    output_path,
+                    temp_dir,
+                    audio_clip=final_audio,
+                    emoji_manager=self.emoji_manager,
+                    progress_callback=progress_callback
+                )
+            elif global_config.get("encoder_backend") == "ffmpeg_pipe":
+                # Frames crus direto no stdin do ffmpeg (sem o loop de escrita do MoviePy)
+                ffmpeg_encoder.write_clip(
+                    final_clip,
+                    output_path,
+                    fps=fps,
+                    threads=threads,
+                    preset="medium",
+                    temp_audiofile=temp_audiofile,
+                    remove_temp=True
+                )
+            else:
+                final_clip.write_videofile(
+                    output_path,
+                    codec="libx264",
+                    audio_codec="aac",
+                    fps=fps,
+                    threads=threads,
+                    preset="medium",
+                    temp_audiofile=temp_audiofile,
+                    remove_temp=True
+                )
+            
+            if metrics:
+                write_time = time.perf_counter() - write_start
+                if segmented:
+                    # Os segmentos rodam em outros processos: só o tempo total é conhecido aqui
+                    metrics.add("segments", write_time)
+                else:
+                    metrics.add("encode", write_time - (metrics.totals.get("frame", 0.0) - frame_time_before))
             
             clip.close()
-            video_resized.close()
-            if background_clip:
-                background_clip.close()
 
-            final_clip.close()
+            if final_clip is not None:
+                final_clip.close()
 
             # Tentar remover a pasta temp se estiver vazia
             try:
@@ -520,6 +757,21 @@ class VideoRenderer:
             except:
                 pass
             
+            if metrics:
+                wall = time.perf_counter() - job_start
+                frames = metrics.counts.get("frame", 0) or int(clip.duration * fps)
+                write_report(output_path, {
+                    "input": original_input_path,
+                    "output": output_path,
+                    "style": border_style,
+                    "encoder": "segments" if segmented else global_config.get("encoder_backend"),
+                    "threads": threads,
+                    "frames": frames,
+                    "wall_s": round(wall, 3),
+                    "fps": round(frames / wall, 2) if wall else 0.0,
+                    "stages": metrics.report(),
+                })
+            
             return True, output_path
         except Exception as e:
             return False, str(e)
@@ -0,0 +1,225 @@
+"""
+Cachê em disco dos frames já melhorados pelo GFPGAN.
+
+A mesma fonte renderizada em várias abas (render_all_tabs_core) ou em lotes seguidos passava
+pelo GFPGAN de novo a cada render, mesmo com frames idênticos. Os frames melhorados ficam
+em PNG (sem perdas), endereçados pelo conteúdo da fonte:
+
+    <pasta>/<hash da fonte>/<modelo e modo>_<largura>x<altura>/<índice do frame>.png
+
+Bordas, legendas e marca d'água são aplicadas depois do enhancement, então renders da mesma
+fonte com outros estilos reaproveitam os frames. Frames sem faces viram só um marcador vazio
+(<índice>.noface): o render seguinte usa a fonte redimensionada sem passar pelo GFPGAN.
+
+A pasta é limitada por "enhancement_cache_gb": ao abrir o cachê de um job, as fontes usadas
+há mais tempo são removidas (nunca as de jobs em andamento), e durante o job as gravações
+param quando a pasta chega ao limite.
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from modules.config_global import global_config
+
+# Bytes lidos do início e do fim do arquivo para o hash (com o tamanho, identifica a fonte
+# sem ler vídeos inteiros)
+HASH_CHUNK = 4 * 1024 * 1024
+# Compressão PNG rápida: o custo de gravar fica bem abaixo do de um frame de GFPGAN
+PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+# Gravações pendentes no máximo (~6 MB por frame 1080x1920 na memória): com mais que isso,
+# store() espera o gravador em vez de acumular frames sem limite
+MAX_PENDING_WRITES = 8
+# Resultado de load() para frames sem faces (usar a fonte redimensionada)
+NO_FACES = "no_faces"
+
+_hash_cache = {}
+_hash_lock = threading.Lock()
+
+
+def source_hash(path):
+    """Hash do conteúdo do vídeo (tamanho + início + fim), memorizado por (caminho, mtime, tamanho)"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    with _hash_lock:
+        if memo_key in _hash_cache:
+            return _hash_cache[memo_key]
+
+    digest = hashlib.sha1(str(stat.st_size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(HASH_CHUNK))
+        if stat.st_size > HASH_CHUNK:
+            f.seek(max(HASH_CHUNK, stat.st_size - HASH_CHUNK))
+            digest.update(f.read(HASH_CHUNK))
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[memo_key] = value
+    return value
+
+
+def get_cache_limit():
+    """Limite da pasta em bytes ("enhancement_cache_gb"; 0 = sem limite)"""
+    return int(float(global_config.get("enhancement_cache_gb") or 0) * 1024 ** 3)
+
+
+def get_cache_dir():
+    """Pasta do cachê ("enhancement_cache_dir"; vazio = pasta temporária do sistema)"""
+    return global_config.get("enhancement_cache_dir") or os.path.join(tempfile.gettempdir(), "editor_enhancement_cache")
+
+
+class EnhancementCache:
+    """Frames melhorados de uma fonte, para um modelo/modo (tag) e tamanho"""
+
+    _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="EnhancementCache")
+    _pending_writes = threading.BoundedSemaphore(MAX_PENDING_WRITES)
+    # Cachês de jobs em andamento (somem quando o job libera o frame maker e as gravações terminam)
+    _active = weakref.WeakSet()
+    _active_lock = threading.Lock()
+    # Tamanho da pasta (medido por prune_cache, somado a cada gravação)
+    _bytes = 0
+    _full_warned = False
+
+    def __init__(self, source_path, video_size, tag):
+        self.source_dir = os.path.join(get_cache_dir(), source_hash(source_path))
+        self.folder = os.path.join(self.source_dir, f"{tag}_{video_size[0]}x{video_size[1]}")
+        self.video_size = tuple(video_size)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.folder, exist_ok=True)
+        # Marca a fonte como usada agora (a limpeza remove as mais antigas)
+        os.utime(self.source_dir)
+        with EnhancementCache._active_lock:
+            EnhancementCache._active.add(self)
+
+    @classmethod
+    def active_sources(cls):
+        """Pastas das fontes com jobs em andamento (protegidas da limpeza)"""
+        with cls._active_lock:
+            return {cache.source_dir for cache in list(cls._active)}
+
+    @classmethod
+    def for_source(cls, source_path, video_size, tag):
+        """Cachê da fonte, ou None se desligado ("enhancement_cache") ou sem arquivo de origem"""
+        if not global_config.get("enhancement_cache") or not source_path or not os.path.exists(source_path):
+            return None
+        try:
+            cache = cls(source_path, video_size, tag)
+            # Limpeza entre jobs: antes de este job gravar, sem tocar nas fontes em uso
+            prune_cache(exclude=cls.active_sources())
+            return cache
+        except OSError as e:
+            print(f"[EnhancementCache] Cachê indisponível: {e}")
+            return None
+
+    def _path(self, index, extension="png"):
+        return os.path.join(self.folder, f"{index:07d}.{extension}")
+
+    def load(self, index):
+        """Frame BGR melhorado do índice, NO_FACES (frame sem faces) ou None"""
+        if os.path.exists(self._path(index, "noface")):
+            self.hits += 1
+            return NO_FACES
+        path = self._path(index)
+        frame = cv2.imread(path, cv2.IMREAD_COLOR) if os.path.exists(path) else None
+        if frame is None or (frame.shape[1], frame.shape[0]) != self.video_size:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return frame
+
+    def store(self, index, frame_bgr):
+        """
+        Grava o frame em segundo plano (arquivo temporário + rename: nunca um PNG pela metade).
+        Bloqueia enquanto houver MAX_PENDING_WRITES gravações na fila; com a pasta no limite
+        ("enhancement_cache_gb") o frame não é gravado.
+        """
+        limit = get_cache_limit()
+        if limit > 0 and EnhancementCache._bytes >= limit:
+            if not EnhancementCache._full_warned:
+                EnhancementCache._full_warned = True
+                print(f"[EnhancementCache] Limite de {limit / 1024 ** 3:.1f} GB atingido: novos frames não serão gravados")
+            return
+        self._submit_write(self._path(index), frame_bgr)
+
+    def store_no_faces(self, index):
+        """Marca o frame como sem faces (arquivo vazio)"""
+        self._submit_write(self._path(index, "noface"), None)
+
+    def _submit_write(self, path, frame_bgr):
+        EnhancementCache._pending_writes.acquire()
+        try:
+            self._writer.submit(self._write, path, frame_bgr)
+        except BaseException:
+            EnhancementCache._pending_writes.release()
+            raise
+
+    def _write(self, path, frame_bgr):
+        try:
+            if os.path.exists(path):
+                return
+            data = b""
+            if frame_bgr is not None:
+                ok, encoded = cv2.imencode(".png", frame_bgr, PNG_PARAMS)
+                if not ok:
+                    return
+                data = encoded.tobytes()
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            EnhancementCache._bytes += len(data)
+        except OSError as e:
+            print(f"[EnhancementCache] Erro ao gravar {path}: {e}")
+        finally:
+            EnhancementCache._pending_writes.release()
+
+
+def prune_cache(max_bytes=None, exclude=()):
+    """
+    Remove as fontes usadas há mais tempo até a pasta caber em "enhancement_cache_gb".
+    exclude: pastas de fontes que não podem ser removidas (jobs em andamento)
+    """
+    if max_bytes is None:
+        max_bytes = get_cache_limit()
+    root = get_cache_dir()
+    if max_bytes <= 0 or not os.path.isdir(root):
+        return
+
+    sources = []
+    total = 0
+    for name in os.listdir(root):
+        source_dir = os.path.join(root, name)
+        if not os.path.isdir(source_dir):
+            continue
+        size = 0
+        for folder, _, files in os.walk(source_dir):
+            for file_name in files:
+                try:
+                    size += os.path.getsize(os.path.join(folder, file_name))
+                except OSError:
+                    pass
+        sources.append((os.path.getmtime(source_dir), size, source_dir))
+        total += size
+
+    protected = {os.path.abspath(path) for path in exclude}
+    for _, size, source_dir in sorted(sources):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(source_dir) in protected:
+            continue
+        _remove_tree(source_dir)
+        total -= size
+
+    EnhancementCache._bytes = total
+    EnhancementCache._full_warned = False
+
+
+def _remove_tree(path):
+    try:
+        shutil.rmtree(path)
+    except OSError as e:
+        print(f"[EnhancementCache] Erro ao limpar {path}: {e}")
@@ -0,0 +1,197 @@
+"""
+Exportação da rede do GFPGAN para ONNX e verificação de paridade com o PyTorch.
+
+Em CPU o PyTorch roda a rede em fp32 eager; o ONNX Runtime (fp32 com o grafo otimizado, ou
+int8 com pesos quantizados) costuma ser bem mais rápido. video_enhancement.get_face_backend
+escolhe o modelo exportado automaticamente quando o enhancer roda em CPU.
+
+Uso:
+    python -m modules.enhancement_export export            # models/GFPGANv1.4.onnx
+    python -m modules.enhancement_export export --int8     # + models/GFPGANv1.4.int8.onnx
+    python -m modules.enhancement_export parity --input rosto.jpg
+    python -m modules.enhancement_export parity --input video.mp4 --output paridade.json
+
+A paridade compara a saída de cada modelo exportado com a do PyTorch nas mesmas faces
+alinhadas (de uma imagem/vídeo com rostos, ou sintéticas), com o ruído fixo do StyleGAN nos
+dois lados. Sai com código 1 se algum modelo ficar abaixo do PSNR mínimo.
+"""
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from modules import video_enhancement
+
+# PSNR mínimo (dB) das faces restauradas em relação ao PyTorch
+MIN_PSNR = {"onnx": 40.0, "onnx_int8": 30.0}
+OPSET = 17
+
+
+def _load_torch():
+    """GFPGANer em CPU (a exportação e a referência da paridade usam o PyTorch)"""
+    enhancer = video_enhancement.get_enhancer('cpu')
+    if enhancer is None:
+        raise SystemExit(f"GFPGAN indisponível (torch/gfpgan instalados e {video_enhancement.MODEL_PATH}?)")
+    return enhancer
+
+
+def export_network(net, path):
+    """
+    Exporta a rede do GFPGAN (ruído fixo) para `path` com lote fixo de 1: a convolução
+    modulada usa groups=lote, que o tracing grava como constante (um eixo de lote dinâmico
+    quebraria com mais de uma face). O OnnxFaceBackend roda uma face por chamada.
+    """
+    import torch
+
+    class ExportWrapper(torch.nn.Module):
+        def __init__(self, net):
+            super().__init__()
+            self.net = net
+
+        def forward(self, x):
+            return self.net(x, return_rgb=False, randomize_noise=False)[0]
+
+    wrapper = ExportWrapper(net).eval()
+    dummy = torch.zeros(1, 3, 512, 512)
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            dummy,
+            path,
+            input_names=["input"],
+            output_names=["output"],
+            opset_version=OPSET,
+            # Exportador por tracing (torch >= 2.5; o padrão novo exige o onnxscript)
+            dynamo=False,
+        )
+
+
+def quantize_model(path, int8_path):
+    """Versão do modelo exportado com pesos int8 (quantização dinâmica)"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+
+
+def export_onnx(int8=False):
+    """Exporta a rede do GFPGANer e, se pedido, a versão com pesos int8"""
+    enhancer = _load_torch()
+    export_network(enhancer.gfpgan, video_enhancement.ONNX_MODEL_PATH)
+    print(f"[Export] {video_enhancement.ONNX_MODEL_PATH}")
+
+    if int8:
+        quantize_model(video_enhancement.ONNX_MODEL_PATH, video_enhancement.ONNX_INT8_MODEL_PATH)
+        print(f"[Export] {video_enhancement.ONNX_INT8_MODEL_PATH}")
+
+
+def _aligned_faces(enhancer, input_path, count):
+    """Faces alinhadas 512x512 BGR de uma imagem ou vídeo; sintéticas se não houver rostos"""
+    import cv2
+
+    frames = []
+    if input_path:
+        image = cv2.imread(input_path, cv2.IMREAD_COLOR)
+        if image is not None:
+            frames.append(image)
+        else:
+            capture = cv2.VideoCapture(input_path)
+            total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+            for position in np.linspace(0, total - 1, count).astype(int):
+                capture.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+                ok, frame = capture.read()
+                if ok:
+                    frames.append(frame)
+            capture.release()
+
+    faces = []
+    helper = enhancer.face_helper
+    for frame in frames:
+        helper.clean_all()
+        helper.read_image(frame)
+        helper.get_face_landmarks_5(only_center_face=False, eye_dist_threshold=5)
+        helper.align_warp_face()
+        faces.extend(helper.cropped_faces)
+    if faces:
+        return faces[:count], "input"
+
+    # Sem rostos: gradientes suaves com ruído (ainda exercitam a rede inteira)
+    rng = np.random.default_rng(0)
+    ramp = np.linspace(0, 255, 512, dtype=np.float32)
+    synthetic = []
+    for _ in range(count):
+        base = np.stack([np.add.outer(ramp, ramp[::-1]) / 2] * 3, axis=-1) * rng.uniform(0.5, 1.0, 3)
+        noise = rng.normal(0, 12, base.shape)
+        synthetic.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return synthetic, "synthetic"
+
+
+def _psnr(a, b):
+    mse = float(np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def check_parity(input_path=None, count=4):
+    """Compara cada modelo ONNX exportado com o PyTorch; devolve (relatório, aprovado)"""
+    enhancer = _load_torch()
+    faces, source = _aligned_faces(enhancer, input_path, count)
+    batch = video_enhancement.faces_to_batch(faces)
+
+    reference_backend = video_enhancement.TorchFaceBackend(enhancer)
+    start = time.perf_counter()
+    reference = reference_backend.restore(batch, randomize_noise=False)
+    torch_seconds = time.perf_counter() - start
+    reference_faces = video_enhancement.batch_to_faces(reference)
+
+    report = {"faces": len(faces), "source": source, "torch_seconds": round(torch_seconds, 3), "backends": {}}
+    passed = True
+    for name in ("onnx", "onnx_int8"):
+        backend = video_enhancement._load_onnx_backend(name)
+        if backend is None:
+            report["backends"][name] = {"status": "not exported"}
+            continue
+        start = time.perf_counter()
+        output = backend.restore(batch)
+        seconds = time.perf_counter() - start
+        restored = video_enhancement.batch_to_faces(output)
+        psnr = min(_psnr(a, b) for a, b in zip(reference_faces, restored))
+        ok = psnr >= MIN_PSNR[name]
+        passed = passed and ok
+        report["backends"][name] = {
+            "status": "ok" if ok else "fail",
+            "min_psnr_db": round(psnr, 2),
+            "max_abs_error": round(float(np.abs(output - reference).max()), 5),
+            "mean_abs_error_uint8": round(float(np.mean([np.abs(a.astype(np.int16) - b).mean() for a, b in zip(reference_faces, restored)])), 4),
+            "seconds": round(seconds, 3),
+            "speedup": round(torch_seconds / seconds, 2) if seconds else None,
+        }
+    return report, passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportação ONNX da rede do GFPGAN e paridade com o PyTorch")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Exportar models/GFPGANv1.4.onnx")
+    export_parser.add_argument("--int8", action="store_true", help="Também gerar a versão com pesos int8")
+    parity_parser = commands.add_parser("parity", help="Comparar os modelos exportados com o PyTorch")
+    parity_parser.add_argument("--input", help="Imagem ou vídeo com rostos (padrão: faces sintéticas)")
+    parity_parser.add_argument("--faces", type=int, default=4, help="Faces no lote de teste")
+    parity_parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_onnx(int8=args.int8)
+        return
+
+    report, passed = check_parity(args.input, args.faces)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[Paridade] Relatório salvo em {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Etapa de enhancement (GFPGAN) do loop de render, com leitura antecipada.
+
+O make_frame pede um frame por vez; se cada pedido fosse direto ao enhancer, o worker de
+inferência nunca teria mais de um frame do job para montar um lote. Aqui os próximos frames
+da grade de tempo (t = i / fps) são decodificados e enviados ao worker antes de serem
+pedidos, e o render só espera pelo resultado do instante atual. Enquanto a rede processa
+um lote, a thread de render segue decodificando, compondo e codificando.
+
+Com um EnhancementCache, frames já melhorados em renders anteriores da mesma fonte saem do
+disco sem passar pelo worker (frames marcados sem faces usam a própria fonte), e os novos
+resultados são gravados para os próximos renders.
+"""
+import cv2
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future
+from modules import video_enhancement
+from modules.enhancement_cache import NO_FACES
+from modules.render_metrics import measure
+
+
+class EnhancedFrameStream:
+    """
+    Frames do vídeo interno já melhorados, para os instantes da grade i / fps.
+
+    Também repassa ao SourceFrameStream o frame original do instante servido, para que o
+    fundo blur use o mesmo frame sem voltar o decoder.
+    """
+
+    def __init__(self, frame_stream, fps, video_size, lookahead=None, metrics=None, cache=None):
+        self.frame_stream = frame_stream
+        self.fps = fps
+        self.step = 1.0 / fps
+        self.video_size = video_size
+        self.lookahead = lookahead or 2 * video_enhancement.get_batch_size()
+        self.metrics = metrics
+        self.duration = frame_stream.clip.duration
+        self._pending = OrderedDict()  # índice -> (t, frame original, Future)
+        self._next_index = 0
+        self._last = None  # (índice, frame original, frame melhorado RGB)
+        # Faces rastreadas entre frames (modo "tracked"; None = GFPGAN completo em cada frame)
+        self.tracker = video_enhancement.create_tracker()
+        # Frames melhorados em disco (EnhancementCache), ou None
+        self.cache = cache
+
+    def _submit(self, index):
+        t = index * self.step
+        source = self.frame_stream.frame(t)
+        cached = self.cache.load(index) if self.cache is not None else None
+        if cached is not None:
+            # Já melhorado em um render anterior: resultado pronto, sem passar pelo worker.
+            # O tracker perde a continuidade e detecta de novo no próximo frame enviado
+            if cached is NO_FACES:
+                # Sem faces: o resultado é a própria fonte redimensionada
+                cached = cv2.cvtColor(self.frame_stream.resized(t, self.video_size), cv2.COLOR_RGB2BGR)
+            future = Future()
+            future.set_result(cached)
+            self._pending[index] = (t, source, future)
+            return
+
+        video = self.frame_stream.resized(t, self.video_size)
+        video_bgr = cv2.cvtColor(video, cv2.COLOR_RGB2BGR)
+        future = video_enhancement.get_worker().submit(video_bgr, self.tracker, index)
+        if self.cache is not None:
+            future.add_done_callback(lambda done: self._store(index, video_bgr, done))
+        self._pending[index] = (t, source, future)
+
+    def _store(self, index, video_bgr, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if future.no_faces:
+            self.cache.store_no_faces(index)
+        elif result is not video_bgr:
+            # O próprio frame de volta sem no_faces: a inferência falhou, nada a guardar
+            self.cache.store(index, result)
+
+    def _reset(self, index):
+        """Reposiciona a leitura antecipada (pedido fora de ordem)"""
+        for _, _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._next_index = index
+
+    def get(self, t):
+        """Frame RGB (video_size) melhorado no instante t"""
+        index = int(round(t * self.fps))
+        if abs(index * self.step - t) > 1e-6:
+            # Fora da grade: processa só este instante, sem antecipação
+            return self._enhance_now(t)
+
+        if self._last is not None and self._last[0] == index:
+            self.frame_stream.feed(t, self._last[1])
+            return self._last[2]
+
+        if index not in self._pending and index < self._next_index:
+            self._reset(index)
+        if index >= self._next_index + self.lookahead:
+            self._reset(index)
+
+        # Completar a janela de antecipação (a fila do worker limitada segura o ritmo)
+        last_index = int(np.ceil(self.duration * self.fps)) - 1
+        while self._next_index <= min(index + self.lookahead, last_index) or self._next_index <= index:
+            self._submit(self._next_index)
+            self._next_index += 1
+
+        # Descartar o que ficou para trás (saltos para frente)
+        while self._pending and next(iter(self._pending)) < index:
+            _, (_, _, future) = self._pending.popitem(last=False)
+            future.cancel()
+
+        _, source, future = self._pending.pop(index)
+        with measure(self.metrics, "enhancement"):
+            enhanced = cv2.cvtColor(future.result(), cv2.COLOR_BGR2RGB)
+
+        self.frame_stream.feed(t, source)
+        self._last = (index, source, enhanced)
+        return enhanced
+
+    def _enhance_now(self, t):
+        video = self.frame_stream.resized(t, self.video_size)
+        with measure(self.metrics, "enhancement"):
+            enhanced_bgr = video_enhancement.enhance_frame(cv2.cvtColor(video, cv2.COLOR_RGB2BGR))
+        return cv2.cvtColor(enhanced_bgr, cv2.COLOR_BGR2RGB)
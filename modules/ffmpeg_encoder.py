@@ -0,0 +1,157 @@
+"""
+Encoder alternativo: envia os frames RGB crus direto para um processo ffmpeg via stdin.
+
+Evita o caminho VideoClip/write_videofile do MoviePy (overhead por frame e cópias extras
+entre MoviePy, PIL e NumPy). O áudio é gravado antes em um arquivo temporário e
+multiplexado na mesma chamada do ffmpeg que codifica o vídeo.
+"""
+import os
+import subprocess as sp
+import numpy as np
+from moviepy.config import get_setting
+
+
+class FFmpegPipeEncoder:
+    """Processo ffmpeg de longa duração que recebe frames rgb24 pelo stdin"""
+
+    def __init__(self, output_path, size, fps, codec="libx264", preset="medium", threads=None, audio_path=None):
+        self.output_path = output_path
+        self.width, self.height = size
+        self.fps = fps
+        self.codec = codec
+        self.preset = preset
+        self.threads = threads
+        self.audio_path = audio_path
+        self.proc = None
+
+        # Buffer reutilizado quando o frame precisa de conversão (dtype/contiguidade)
+        self._buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def _build_command(self):
+        cmd = [
+            get_setting("FFMPEG_BINARY"),
+            '-y',
+            '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-vcodec', 'rawvideo',
+            '-s', f'{self.width}x{self.height}',
+            '-pix_fmt', 'rgb24',
+            '-r', '%.02f' % self.fps,
+            '-an', '-i', '-'
+        ]
+        if self.audio_path:
+            cmd.extend(['-i', self.audio_path, '-acodec', 'copy'])
+        cmd.extend(['-vcodec', self.codec, '-preset', self.preset])
+        if self.threads is not None:
+            cmd.extend(['-threads', str(self.threads)])
+        if self.codec == 'libx264' and self.width % 2 == 0 and self.height % 2 == 0:
+            cmd.extend(['-pix_fmt', 'yuv420p'])
+        cmd.append(self.output_path)
+        return cmd
+
+    def open(self):
+        popen_params = {"stdout": sp.DEVNULL, "stderr": sp.PIPE, "stdin": sp.PIPE}
+        # Evita abrir uma janela de console extra no Windows
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000  # CREATE_NO_WINDOW
+        self.proc = sp.Popen(self._build_command(), **popen_params)
+        return self
+
+    def write_frame(self, frame):
+        """Escreve um frame (H x W x 3) no stdin do ffmpeg"""
+        if frame.dtype != np.uint8 or not frame.flags['C_CONTIGUOUS']:
+            np.copyto(self._buffer, frame, casting='unsafe')
+            frame = self._buffer
+        try:
+            self.proc.stdin.write(frame)
+        except IOError as err:
+            _, ffmpeg_error = self.proc.communicate()
+            raise IOError(
+                f"ffmpeg falhou ao gravar '{self.output_path}': {err}\n"
+                f"{ffmpeg_error.decode(errors='ignore') if ffmpeg_error else ''}"
+            )
+
+    def close(self):
+        if self.proc is None:
+            return
+        _, ffmpeg_error = self.proc.communicate()
+        returncode = self.proc.returncode
+        self.proc = None
+        if returncode != 0:
+            raise IOError(
+                f"ffmpeg terminou com código {returncode} ao gravar '{self.output_path}':\n"
+                f"{ffmpeg_error.decode(errors='ignore') if ffmpeg_error else ''}"
+            )
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self.proc is not None:
+            # Em caso de erro, não mascarar a exceção original
+            try:
+                self.proc.stdin.close()
+                self.proc.wait()
+            except Exception:
+                pass
+            self.proc = None
+            return False
+        self.close()
+        return False
+
+
+def write_clip(clip, output_path, fps, threads=None, preset="medium", temp_audiofile=None, remove_temp=True):
+    """
+    Equivalente a clip.write_videofile(codec="libx264", audio_codec="aac") usando o pipe direto.
+    """
+    audio_path = None
+    if clip.audio is not None:
+        audio_path = temp_audiofile or os.path.splitext(output_path)[0] + "_temp_audio.m4a"
+        clip.audio.write_audiofile(audio_path, fps=44100, nbytes=4, buffersize=2000, codec="aac", logger=None)
+
+    try:
+        with FFmpegPipeEncoder(output_path, clip.size, fps, preset=preset, threads=threads, audio_path=audio_path) as encoder:
+            for t in np.arange(0, clip.duration, 1.0 / fps):
+                encoder.write_frame(clip.get_frame(t))
+    finally:
+        if remove_temp and audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+
+def concat_segments(segment_paths, output_path, audio_path=None):
+    """
+    Junta segmentos de vídeo (mesmo codec/tamanho/fps) sem recodificar, usando o concat
+    demuxer do ffmpeg com -c copy. Se audio_path for informado, o áudio é multiplexado junto.
+    """
+    list_path = os.path.splitext(output_path)[0] + "_segments.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        '-y',
+        '-loglevel', 'error',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', list_path
+    ]
+    if audio_path:
+        cmd.extend(['-i', audio_path, '-map', '0:v', '-map', '1:a'])
+    cmd.extend(['-c', 'copy', output_path])
+
+    popen_params = {"stdout": sp.DEVNULL, "stderr": sp.PIPE}
+    if os.name == "nt":
+        popen_params["creationflags"] = 0x08000000  # CREATE_NO_WINDOW
+    try:
+        proc = sp.Popen(cmd, **popen_params)
+        _, ffmpeg_error = proc.communicate()
+        if proc.returncode != 0:
+            raise IOError(
+                f"ffmpeg falhou ao concatenar segmentos em '{output_path}':\n"
+                f"{ffmpeg_error.decode(errors='ignore') if ffmpeg_error else ''}"
+            )
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
@@ -0,0 +1,43 @@
+"""
+Buffers de frame pré-alocados para o loop de render.
+
+Sem isso, cada frame 1080x1920 alocava o fundo, a cópia do vídeo redimensionado, o blur e o
+array final (~25 MB por frame), fragmentando a memória com vários jobs em paralelo. Cada
+frame maker (um por job ou segmento) tem o seu anel: em regime, o compositor escreve sempre
+nos mesmos arrays e entrega o buffer direto ao encoder.
+"""
+import numpy as np
+
+# Frames em uso ao mesmo tempo: o encoder consome cada frame antes de pedir o próximo,
+# então 3 deixa folga para quem ainda estiver lendo o anterior
+FRAME_POOL_SIZE = 3
+
+
+class FrameBufferPool:
+    """
+    Anel de `count` arrays do mesmo formato. O buffer devolvido por next() continua
+    válido até `count - 1` chamadas seguintes; quem precisar guardá-lo por mais tempo copia.
+    """
+
+    def __init__(self, shape, count=FRAME_POOL_SIZE, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self._buffers = [np.empty(self.shape, dtype=dtype) for _ in range(max(1, count))]
+        self._next = 0
+
+    def next(self):
+        """Próximo buffer do anel (conteúdo anterior não é limpo)"""
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        return buffer
+
+    def __len__(self):
+        return len(self._buffers)
+
+
+def copy_into(out, src):
+    """Copia src para out quando os formatos batem; senão devolve uma cópia nova de src"""
+    if out is not None and out.shape == src.shape:
+        np.copyto(out, src, casting='unsafe')
+        return out
+    return np.array(src, dtype=np.uint8)
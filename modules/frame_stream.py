@@ -0,0 +1,93 @@
+"""
+Leitura sequencial dos frames da fonte com distribuição (fan-out) para vários tamanhos.
+
+Antes, o vídeo interno e o fundo blur eram dois clip.resize() independentes, cada um
+chamando get_frame(t) na fonte. Aqui cada frame é decodificado uma única vez e os
+redimensionamentos pedidos para o mesmo instante reaproveitam esse frame.
+"""
+import cv2
+import numpy as np
+from modules.render_metrics import measure
+
+
+def plan_interpolation(src_size, dst_size):
+    """
+    Interpolação de um redimensionamento (largura, altura) -> (largura, altura): None quando
+    o tamanho já bate (nada a fazer), LINEAR para ampliar e AREA para reduzir (mesma regra do
+    fx.resize do MoviePy). O SourceFrameStream planeja uma vez por par de tamanhos.
+    """
+    src_w, src_h = int(src_size[0]), int(src_size[1])
+    dst_w, dst_h = int(dst_size[0]), int(dst_size[1])
+    if (src_w, src_h) == (dst_w, dst_h):
+        return None
+    if dst_w > src_w or dst_h > src_h:
+        return cv2.INTER_LINEAR
+    return cv2.INTER_AREA
+
+
+def resize_frame(frame, size, out=None, interpolation=None):
+    """
+    Redimensiona como o fx.resize do MoviePy (LINEAR para ampliar, AREA para reduzir).
+    Se o frame já tem o tamanho pedido, devolve o próprio frame (sem cópia).
+    out: array (altura, largura, 3) uint8 reaproveitado como destino
+    interpolation: já planejada (plan_interpolation); None decide pelo tamanho
+    """
+    width, height = int(size[0]), int(size[1])
+    if interpolation is None:
+        interpolation = plan_interpolation((frame.shape[1], frame.shape[0]), (width, height))
+        if interpolation is None:
+            return frame.astype(np.uint8, copy=False)
+    return cv2.resize(frame.astype(np.uint8, copy=False), (width, height), dst=out, interpolation=interpolation)
+
+
+class SourceFrameStream:
+    """
+    Decodifica cada frame da fonte uma vez (em ordem, sem seeks quando t é crescente)
+    e entrega versões redimensionadas para quem pedir no mesmo instante.
+    """
+
+    def __init__(self, clip, metrics=None):
+        self.clip = clip
+        self.metrics = metrics  # StageTimer opcional ("decode" e "resize")
+        self._t = None
+        self._frame = None
+        self._resized = {}
+        # Um destino por tamanho, reaproveitado a cada frame (válido até o próximo instante)
+        self._buffers = {}
+        # Interpolação planejada uma vez por (tamanho da fonte, tamanho pedido)
+        self._plans = {}
+
+    def frame(self, t):
+        """Frame original da fonte no instante t (decodificado apenas uma vez)"""
+        if self._t != t:
+            with measure(self.metrics, "decode"):
+                self._frame = self.clip.get_frame(t)
+            self._t = t
+            self._resized = {}
+        return self._frame
+
+    def feed(self, t, frame):
+        """Define o frame original do instante t já decodificado por outra etapa (ex.: leitura antecipada)"""
+        if self._t != t or self._frame is not frame:
+            self._t = t
+            self._frame = frame
+            self._resized = {}
+
+    def resized(self, t, size):
+        """Frame no instante t redimensionado para size=(largura, altura)"""
+        frame = self.frame(t)
+        size = (int(size[0]), int(size[1]))
+        if size not in self._resized:
+            plan_key = ((frame.shape[1], frame.shape[0]), size)
+            if plan_key not in self._plans:
+                self._plans[plan_key] = plan_interpolation(*plan_key)
+            interpolation = self._plans[plan_key]
+            if interpolation is None:
+                # Fonte já no tamanho pedido: nenhum redimensionamento
+                self._resized[size] = frame.astype(np.uint8, copy=False)
+            else:
+                with measure(self.metrics, "resize"):
+                    self._resized[size] = self._buffers[size] = resize_frame(
+                        frame, size, out=self._buffers.get(size), interpolation=interpolation
+                    )
+        return self._resized[size]
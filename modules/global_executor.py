@@ -3,22 +3,235 @@ Executor Global Compartilhado para Renderização Paralela
 
 Este módulo centraliza o pool de workers para garantir que múltiplas abas
 possam processar seus vídeos simultaneamente, respeitando o limite de parallel_jobs.
+
+Há dois modos (chave "executor_mode" do global_config):
+- "thread": ThreadPoolExecutor, compartilha memória (emoji_manager etc.) com a UI.
+- "process": ProcessPoolExecutor, cada worker tem seu próprio VideoRenderer e cachê de
+  emojis e escapa do GIL. Os jobs viajam como RenderJob (picklable) e o progresso volta
+  para a UI por uma fila lida em uma thread dedicada.
+
+Com "adaptive_scheduling" ativo, parallel_jobs/num_threads deixam de ser fixos: o
+AdaptiveScheduler decide quando cada job entra no pool e com quantas threads de encoder.
+Quando a fila esvazia, os núcleos liberados por jobs que terminam vão para os jobs em
+andamento que ainda não abriram o encoder (claim_job_threads); quem já está codificando
+mantém as suas threads.
 """
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import itertools
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Callable
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+import cv2
+import psutil
 from modules.config_global import global_config
+from modules.process_image import is_image_file
+
+
+@dataclass
+class RenderJob:
+    """Descrição picklable de um job de renderização (enviada aos workers)"""
+    video_path: str
+    output_folder: str
+    style: str
+    color: str
+    subtitles: List[Dict] = field(default_factory=list)
+    emoji_folder: Optional[str] = None
+    audio_settings: Optional[Dict] = None
+    watermark_data: Optional[Dict] = None
+    mesclagem_data: Optional[Dict] = None
+    tab_number: Optional[int] = None
+    enable_enhancement: bool = False
+    video_width_ratio: float = 0.78
+    video_height_ratio: float = 0.70
+    threads: Optional[int] = None  # Threads do encoder (None = num_threads do config global)
+    job_id: Optional[int] = None
+    thread_slot: Optional[int] = None  # Posição do job em _THREAD_GRANTS (agendamento adaptativo)
+
+
+# Estado de cada processo worker (modo "process")
+_PROGRESS_QUEUE = None
+_WORKER_EMOJI_MANAGERS = {}
+# Threads concedidas a cada job em andamento, por posição (RenderJob.thread_slot), em memória
+# compartilhada com os processos workers: > 0 = concessão que o scheduler ainda pode aumentar,
+# < 0 = fixada pelo job ao abrir o encoder, 0 = posição livre
+_THREAD_GRANTS = None
+# Job executado pela thread atual (para claim_job_threads)
+_CURRENT_JOB = threading.local()
+
+
+def _init_process_worker(progress_queue, thread_grants=None):
+    """Inicializador dos processos do pool: guarda a fila de progresso e as concessões de threads"""
+    global _PROGRESS_QUEUE, _THREAD_GRANTS
+    _PROGRESS_QUEUE = progress_queue
+    _THREAD_GRANTS = thread_grants
+
+
+def claim_job_threads(threads):
+    """
+    Threads finais do job em andamento nesta thread, chamado logo antes de o render dividir
+    o trabalho (segmentos/encoder): a concessão atual do AdaptiveScheduler (que pode ter
+    crescido desde o despacho), fixada a partir daqui. Fora de um job agendado devolve threads.
+    """
+    slot = getattr(_CURRENT_JOB, "slot", None)
+    if _THREAD_GRANTS is None or slot is None:
+        return threads
+    with _THREAD_GRANTS.get_lock():
+        granted = _THREAD_GRANTS[slot]
+        if granted > 0:
+            _THREAD_GRANTS[slot] = -granted
+    return abs(granted) or threads
+
+
+def _get_worker_emoji_manager(folder):
+    """Cada processo carrega a pasta de emojis uma única vez"""
+    from modules.subiitels.gerenciador_emojis import GerenciadorEmojis
+
+    if folder not in _WORKER_EMOJI_MANAGERS:
+        manager = GerenciadorEmojis()
+        manager.load_emojis(folder)
+        _WORKER_EMOJI_MANAGERS[folder] = manager
+    return _WORKER_EMOJI_MANAGERS[folder]
+
+
+def run_render_job(job: RenderJob, emoji_manager=None, progress_callback: Optional[Callable] = None):
+    """
+    Executa um RenderJob. Roda tanto em thread (emoji_manager compartilhado com a UI)
+    quanto em processo worker (emoji_manager recriado a partir de job.emoji_folder).
+    """
+    from modules.video_editor import VideoEditor
+
+    if emoji_manager is None:
+        emoji_manager = _get_worker_emoji_manager(job.emoji_folder)
+
+    if progress_callback is None and _PROGRESS_QUEUE is not None:
+        def progress_callback(percent):
+            _PROGRESS_QUEUE.put((job.job_id, percent))
+
+    _CURRENT_JOB.slot = job.thread_slot
+    try:
+        return VideoEditor().render_video(
+            job.video_path,
+            job.output_folder,
+            job.style,
+            job.color,
+            job.subtitles,
+            emoji_manager,
+            job.audio_settings,
+            watermark_data=job.watermark_data,
+            mesclagem_data=job.mesclagem_data,
+            tab_number=job.tab_number,
+            enable_enhancement=job.enable_enhancement,
+            video_width_ratio=job.video_width_ratio,
+            video_height_ratio=job.video_height_ratio,
+            threads=job.threads,
+            progress_callback=progress_callback
+        )
+    except Exception as e:
+        return False, str(e)
+    finally:
+        _CURRENT_JOB.slot = None
+
+
+class AdaptiveScheduler:
+    """
+    Decide quantos jobs rodam ao mesmo tempo e quantas threads de encoder cada um recebe,
+    a partir dos núcleos, da memória disponível e da resolução/duração de cada entrada.
+
+    Um job só entra se houver memória para ele e núcleos livres para o seu mínimo de
+    threads; as threads livres são divididas entre os jobs que ainda estão na fila.
+    Quando um job termina, os núcleos liberados vão primeiro para a fila; com a fila vazia,
+    são divididos (rebalance) entre os jobs em andamento que ainda não abriram o encoder. As
+    threads de um encoder já aberto não mudam.
+    """
+    BASE_JOB_MEMORY = 400 * 1024 ** 2  # Bibliotecas, camadas estáticas e buffers de saída 1080x1920
+    PROCESS_OVERHEAD = 300 * 1024 ** 2  # Interpretador + imports de cada processo worker
+    MEMORY_RESERVE = 1024 ** 3  # Memória mantida livre para o sistema e a UI
+    SOURCE_FRAME_BUFFERS = 30  # Frames da fonte vivos por job (decoder, resizes, blur)
+    SHORT_VIDEO_SECONDS = 15
+
+    def __init__(self, cores=None):
+        self.cores = cores or psutil.cpu_count(logical=True) or os.cpu_count() or 1
+
+    def probe(self, video_path):
+        """Retorna (largura, altura, duração) da entrada; valores padrão se não der para ler"""
+        if is_image_file(video_path):
+            image = cv2.imread(video_path)
+            height, width = image.shape[:2] if image is not None else (1920, 1080)
+            return width, height, global_config.get("image_to_video_duration")
+
+        capture = cv2.VideoCapture(video_path)
+        try:
+            width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1920
+            height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 1080
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+            frames = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        finally:
+            capture.release()
+        return width, height, frames / fps if frames > 0 else 60.0
+
+    def estimate_memory(self, info, process_mode):
+        """Memória estimada (bytes) de um job com a entrada info=(largura, altura, duração)"""
+        width, height, _ = info
+        memory = self.BASE_JOB_MEMORY + width * height * 3 * self.SOURCE_FRAME_BUFFERS
+        if process_mode:
+            memory += self.PROCESS_OVERHEAD
+        return memory
+
+    def min_threads(self, info):
+        """Menor número de threads que vale a pena dar a um job"""
+        width, height, duration = info
+        if duration < self.SHORT_VIDEO_SECONDS:
+            return 1  # Clipes curtos são dominados pela abertura/fechamento, não pelo encoder
+        if width * height >= 1920 * 1080:
+            return 3  # Decodificar/reduzir fontes Full HD+ também pesa
+        return 2
+
+    def can_start(self, info, running_jobs, used_threads, process_mode):
+        """Há núcleos e memória para iniciar mais um job agora?"""
+        if running_jobs == 0:
+            return True  # Sempre deixar ao menos um job andar
+        if self.cores - used_threads < self.min_threads(info):
+            return False
+        available = psutil.virtual_memory().available - self.MEMORY_RESERVE
+        return available >= self.estimate_memory(info, process_mode)
+
+    def threads_for(self, info, used_threads, pending_jobs):
+        """Threads do encoder para o próximo job, dividindo os núcleos livres com a fila"""
+        free = max(1, self.cores - used_threads)
+        minimum = self.min_threads(info)
+        slots = max(1, min(pending_jobs, free // minimum))
+        return max(1, free // slots)
+
+    def rebalance(self, grants, used_threads):
+        """
+        Divide os núcleos livres entre os jobs que ainda podem receber mais threads.
+        grants: {job_id: threads atuais}; retorna {job_id: threads a acrescentar}
+        """
+        free = self.cores - used_threads
+        if free <= 0 or not grants:
+            return {}
+        share, extra = divmod(free, len(grants))
+        increments = {}
+        for position, job_id in enumerate(sorted(grants)):
+            increment = share + (1 if position < extra else 0)
+            if increment:
+                increments[job_id] = increment
+        return increments
 
 
 class GlobalRenderExecutor:
     """
-    Singleton que gerencia um ThreadPoolExecutor compartilhado por toda a aplicação.
-    
+    Singleton que gerencia um pool de workers compartilhado por toda a aplicação.
+
     Isso permite que múltiplas abas submetam seus vídeos para renderização simultânea,
     respeitando o limite global de parallel_jobs configurado pelo usuário.
     """
     _instance = None
     _lock = threading.Lock()
-    
+
     def __new__(cls):
         if cls._instance is None:
             with cls._lock:
@@ -26,41 +239,250 @@ class GlobalRenderExecutor:
                     cls._instance = super().__new__(cls)
                     cls._instance._initialized = False
         return cls._instance
-    
+
     def __init__(self):
         if self._initialized:
             return
-        
+
         self._executor = None
+        self._executor_mode = None
         self._executor_lock = threading.Lock()
+
+        # Progresso vindo dos processos workers: job_id -> callback(percent)
+        self._progress_queue = None
+        self._progress_thread = None
+        self._progress_callbacks = {}
+        self._job_ids = itertools.count(1)
+
+        # Agendamento adaptativo: fila de espera e threads em uso por job_id
+        self._scheduler = AdaptiveScheduler()
+        self._schedule_lock = threading.RLock()
+        self._pending = deque()
+        self._running_threads = {}
+        # Concessões de threads compartilhadas com os workers (uma posição por job em andamento)
+        self._thread_grants = None
+        self._free_slots = deque()
+        self._job_slots = {}
         self._initialized = True
-    
-    def get_executor(self) -> ThreadPoolExecutor:
+
+    def _get_thread_grants(self):
+        """Array compartilhado das concessões (criado uma vez; sobrevive a reset_executor)"""
+        global _THREAD_GRANTS
+        if self._thread_grants is None:
+            self._thread_grants = multiprocessing.get_context("spawn").Array("i", self._scheduler.cores)
+            self._free_slots = deque(range(self._scheduler.cores))
+            _THREAD_GRANTS = self._thread_grants
+        return self._thread_grants
+
+    def get_executor(self):
         """
         Retorna o executor global, criando-o se necessário.
-        O número de workers é definido por parallel_jobs do global_config.
+        O número de workers é definido por parallel_jobs do global_config e o tipo
+        de pool (threads ou processos) por executor_mode.
         """
         if self._executor is None:
             with self._executor_lock:
                 if self._executor is None:
                     max_workers = global_config.get("parallel_jobs")
-                    print(f"[GlobalExecutor] Criando pool com {max_workers} workers")
-                    self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="RenderWorker")
-        
+                    if global_config.get("adaptive_scheduling"):
+                        # O AdaptiveScheduler controla quantos jobs entram; o pool só define o teto
+                        max_workers = self._scheduler.cores
+                    mode = global_config.get("executor_mode")
+                    if mode == "process":
+                        print(f"[GlobalExecutor] Criando pool com {max_workers} processos")
+                        # "spawn" evita herdar o estado do Tk/threads da UI via fork
+                        ctx = multiprocessing.get_context("spawn")
+                        self._progress_queue = ctx.Queue()
+                        self._progress_thread = threading.Thread(
+                            target=self._progress_listener,
+                            args=(self._progress_queue,),
+                            name="RenderProgress",
+                            daemon=True
+                        )
+                        self._progress_thread.start()
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=max_workers,
+                            mp_context=ctx,
+                            initializer=_init_process_worker,
+                            initargs=(self._progress_queue, self._get_thread_grants())
+                        )
+                    else:
+                        mode = "thread"
+                        print(f"[GlobalExecutor] Criando pool com {max_workers} workers")
+                        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="RenderWorker")
+                    self._executor_mode = mode
+
         return self._executor
-    
+
+    def submit_render(self, job: RenderJob, emoji_manager=None, progress_callback: Optional[Callable] = None):
+        """
+        Submete um RenderJob ao pool global e retorna o Future com (success, result).
+        progress_callback(percent) é chamado (fora da thread da UI) conforme o job avança.
+        Com "adaptive_scheduling", o job espera na fila até o AdaptiveScheduler liberá-lo.
+        """
+        return self.submit_batch([(job, progress_callback)], emoji_manager=emoji_manager)[0]
+
+    def submit_batch(self, jobs, emoji_manager=None):
+        """
+        Submete vários jobs de uma vez: jobs é uma lista de (RenderJob, progress_callback).
+        Com "adaptive_scheduling", a fila inteira é conhecida antes da divisão dos núcleos,
+        então o primeiro job não fica com todas as threads. Retorna os Futures na mesma ordem.
+        """
+        for job, _ in jobs:
+            job.job_id = next(self._job_ids)
+
+        if not global_config.get("adaptive_scheduling"):
+            return [self._submit_now(job, emoji_manager, progress_callback) for job, progress_callback in jobs]
+
+        # Ler resolução/duração antes de pegar o lock (abre cada arquivo)
+        entries = [(job, progress_callback, self._scheduler.probe(job.video_path)) for job, progress_callback in jobs]
+        futures = []
+        with self._schedule_lock:
+            for job, progress_callback, info in entries:
+                future = Future()
+                self._pending.append((job, emoji_manager, progress_callback, future, info))
+                futures.append(future)
+            self._dispatch()
+        return futures
+
+    def _submit_now(self, job, emoji_manager, progress_callback):
+        """Envia o job direto para o pool"""
+        executor = self.get_executor()
+
+        if self._executor_mode == "process":
+            if progress_callback:
+                self._progress_callbacks[job.job_id] = progress_callback
+            future = executor.submit(run_render_job, job)
+            future.add_done_callback(lambda _f, job_id=job.job_id: self._progress_callbacks.pop(job_id, None))
+            return future
+
+        return executor.submit(run_render_job, job, emoji_manager, progress_callback)
+
+    def _dispatch(self):
+        """Inicia os jobs da fila que o AdaptiveScheduler permitir (chamado com _schedule_lock)"""
+        process_mode = global_config.get("executor_mode") == "process"
+        while self._pending:
+            job, emoji_manager, progress_callback, future, info = self._pending[0]
+            used_threads = sum(self._running_threads.values())
+            if not self._scheduler.can_start(info, len(self._running_threads), used_threads, process_mode):
+                break
+
+            self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue  # Cancelado enquanto esperava na fila
+
+            job.threads = self._scheduler.threads_for(info, used_threads, len(self._pending) + 1)
+            self._running_threads[job.job_id] = job.threads
+            grants = self._get_thread_grants()
+            if self._free_slots:
+                job.thread_slot = self._free_slots.popleft()
+                self._job_slots[job.job_id] = job.thread_slot
+                grants[job.thread_slot] = job.threads
+            print(f"[GlobalExecutor] Iniciando {os.path.basename(job.video_path)} com {job.threads} thread(s) "
+                  f"({len(self._running_threads)} job(s) ativos, {len(self._pending)} na fila)")
+
+            try:
+                inner = self._submit_now(job, emoji_manager, progress_callback)
+            except Exception as e:
+                self._release_job(job.job_id, job.thread_slot)
+                future.set_exception(e)
+                continue
+            inner.add_done_callback(
+                lambda inner_future, job_id=job.job_id, slot=job.thread_slot, outer=future: self._on_job_done(job_id, slot, inner_future, outer)
+            )
+
+    def _release_job(self, job_id, slot):
+        """Devolve os núcleos e a posição de concessão de um job (chamado com _schedule_lock)"""
+        self._running_threads.pop(job_id, None)
+        self._job_slots.pop(job_id, None)
+        if slot is not None:
+            self._thread_grants[slot] = 0
+            self._free_slots.append(slot)
+
+    def _rebalance(self):
+        """
+        Com a fila vazia, entrega os núcleos livres aos jobs em andamento que ainda não
+        fixaram as threads (claim_job_threads). Chamado com _schedule_lock.
+        """
+        grants = self._thread_grants
+        if self._pending or grants is None:
+            return
+        with grants.get_lock():
+            # Só jobs cuja concessão ainda está aberta (> 0): os outros já abriram o encoder
+            open_jobs = {job_id: grants[slot] for job_id, slot in self._job_slots.items() if grants[slot] > 0}
+            increments = self._scheduler.rebalance(open_jobs, sum(self._running_threads.values()))
+            for job_id, increment in increments.items():
+                grants[self._job_slots[job_id]] += increment
+                self._running_threads[job_id] += increment
+        if increments:
+            print(f"[GlobalExecutor] Núcleos liberados redistribuídos: {increments}")
+
+    def _on_job_done(self, job_id, slot, inner_future, future):
+        """Repassa o resultado e redistribui os núcleos liberados (fila primeiro, depois jobs em andamento)"""
+        with self._schedule_lock:
+            self._release_job(job_id, slot)
+            self._dispatch()
+            self._rebalance()
+
+        if inner_future.cancelled():
+            future.set_exception(RuntimeError("Job cancelado"))
+        elif inner_future.exception() is not None:
+            future.set_exception(inner_future.exception())
+        else:
+            future.set_result(inner_future.result())
+
+    def _progress_listener(self, progress_queue):
+        """Thread que repassa o progresso dos processos workers para os callbacks registrados"""
+        while True:
+            try:
+                item = progress_queue.get()
+            except (EOFError, OSError):
+                break
+            if item is None:
+                break
+            job_id, percent = item
+            callback = self._progress_callbacks.get(job_id)
+            if callback:
+                try:
+                    callback(percent)
+                except Exception as e:
+                    print(f"[GlobalExecutor] Erro no callback de progresso: {e}")
+
+    def _detach_progress_listener(self):
+        """Desliga a fila/thread de progresso do executor atual e devolve a fila (ou None)"""
+        progress_queue = self._progress_queue
+        self._progress_queue = None
+        self._progress_thread = None
+        return progress_queue
+
+    @staticmethod
+    def _retire_pool(executor, progress_queue):
+        """Espera os jobs do pool antigo e só então encerra o listener do progresso deles"""
+        executor.shutdown(wait=True)
+        if progress_queue is not None:
+            progress_queue.put(None)
+
     def reset_executor(self):
         """
         Reseta o executor, forçando a criação de um novo pool na próxima renderização.
-        Útil quando o usuário muda parallel_jobs nas configurações.
+        Útil quando o usuário muda parallel_jobs ou executor_mode nas configurações.
         """
         if self._executor is not None:
             with self._executor_lock:
                 if self._executor is not None:
                     print("[GlobalExecutor] Resetando pool para aplicar novas configurações")
-                    self._executor.shutdown(wait=False)  # Não espera jobs pendentes terminarem
+                    old_executor = self._executor
+                    progress_queue = self._detach_progress_listener()
                     self._executor = None
-    
+                    # Os jobs já enviados terminam no pool antigo (com progresso e conclusão
+                    # chegando à UI); a espera fica em segundo plano para não travar a interface
+                    threading.Thread(
+                        target=self._retire_pool,
+                        args=(old_executor, progress_queue),
+                        name="RetireRenderPool",
+                        daemon=True
+                    ).start()
+
     def shutdown(self, wait=True):
         """Encerra o executor global"""
         if self._executor is not None:
@@ -69,6 +491,9 @@ class GlobalRenderExecutor:
                     print("[GlobalExecutor] Encerrando pool de workers")
                     self._executor.shutdown(wait=wait)
                     self._executor = None
+                    progress_queue = self._detach_progress_listener()
+                    if progress_queue is not None:
+                        progress_queue.put(None)
 
 
 # Instância singleton global
@@ -2,6 +2,7 @@ import os
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from modules.config_global import global_config
+from modules.render_metrics import load_summary
 
 class FolderProcessor:
     def __init__(self, editor):
@@ -30,7 +31,10 @@ class FolderProcessor:
         max_workers = global_config.get("parallel_jobs")
         num_threads = global_config.get("num_threads")
         
-        status_callback(f"🚀 Iniciando processamento de {len(videos)} arquivo(s) com {max_workers} job(s) simultâneo(s) e {num_threads} threads por job...")
+        if global_config.get("adaptive_scheduling"):
+            status_callback(f"🚀 Iniciando processamento de {len(videos)} arquivo(s) com jobs e threads automáticos...")
+        else:
+            status_callback(f"🚀 Iniciando processamento de {len(videos)} arquivo(s) com {max_workers} job(s) simultâneo(s) e {num_threads} threads por job...")
         
         # Processar em paralelo usando ThreadPoolExecutor (ao invés de ProcessPoolExecutor)
         # Threads compartilham memória, evitando problemas de serialização
@@ -49,7 +53,7 @@ class FolderProcessor:
                          video_height_ratio, status_callback, completion_callback, max_workers, num_threads):
         """Processa vídeos em paralelo usando o Executor Global Compartilhado"""
         
-        from modules.global_executor import global_executor
+        from modules.global_executor import global_executor, RenderJob
         
         success_count = 0
         error_count = 0
@@ -57,19 +61,30 @@ class FolderProcessor:
         
         # Usar o executor global compartilhado de toda a aplicação
         # Isso permite que múltiplas abas submetam jobs para o mesmo pool
-        executor = global_executor.get_executor()
-        
-        # Submeter todas as tasks para o pool global
-        future_to_video = {}
+        # (threads ou processos, conforme executor_mode)
+        # Submeter todas as tasks para o pool global (em lote, para o agendamento dividir os núcleos)
+        batch = []
         for video_path in videos:
-            future = executor.submit(
-                self._process_single_video,
-                video_path, output_folder, style, color, subtitles,
-                emoji_manager, audio_settings, watermark_data, mesclagem_data,
-                tab_number, enable_enhancement, video_width_ratio, 
-                video_height_ratio, num_threads
+            video_name = os.path.basename(video_path)
+            job = RenderJob(
+                video_path=video_path,
+                output_folder=output_folder,
+                style=style,
+                color=color,
+                subtitles=subtitles,
+                emoji_folder=getattr(emoji_manager, "folder", None),
+                audio_settings=audio_settings,
+                watermark_data=watermark_data,
+                mesclagem_data=mesclagem_data,
+                tab_number=tab_number,
+                enable_enhancement=enable_enhancement,
+                video_width_ratio=video_width_ratio,
+                video_height_ratio=video_height_ratio
             )
-            future_to_video[future] = os.path.basename(video_path)
+            batch.append((job, self._make_progress_callback(video_name, status_callback)))
+        
+        futures = global_executor.submit_batch(batch, emoji_manager=emoji_manager)
+        future_to_video = {future: os.path.basename(job.video_path) for future, (job, _) in zip(futures, batch)}
         
         # Processar resultados conforme completam
         from concurrent.futures import as_completed
@@ -79,7 +94,11 @@ class FolderProcessor:
                 success, result = future.result()
                 if success:
                     success_count += 1
-                    status_callback(f"✅ Concluído ({success_count}/{len(videos)}): {video_name}")
+                    summary = load_summary(result)
+                    if summary:
+                        status_callback(f"✅ Concluído ({success_count}/{len(videos)}): {video_name} — {summary}")
+                    else:
+                        status_callback(f"✅ Concluído ({success_count}/{len(videos)}): {video_name}")
                 else:
                     error_count += 1
                     errors.append(f"{video_name}: {result}")
@@ -92,27 +111,10 @@ class FolderProcessor:
         # Callback final
         completion_callback(success_count, error_count, errors)
 
-    def _process_single_video(self, video_path, output_folder, style, color, subtitles,
-                              emoji_manager, audio_settings, watermark_data, mesclagem_data,
-                              tab_number, enable_enhancement, video_width_ratio, 
-                              video_height_ratio, num_threads):
-        """Processa um único vídeo (executado em thread separada)"""
-        try:
-            success, result = self.editor.render_video(
-                video_path,
-                output_folder,
-                style,
-                color,
-                subtitles,
-                emoji_manager,
-                audio_settings,
-                watermark_data=watermark_data,
-                mesclagem_data=mesclagem_data,
-                tab_number=tab_number,
-                enable_enhancement=enable_enhancement,
-                video_width_ratio=video_width_ratio,
-                video_height_ratio=video_height_ratio
-            )
-            return success, result
-        except Exception as e:
-            return False, str(e)
+    def _make_progress_callback(self, video_name, status_callback):
+        """Cria o callback que mostra o percentual de um vídeo no status da aba"""
+        def on_progress(percent):
+            # Atualiza a cada 5% para não inundar a UI
+            if percent % 5 == 0:
+                status_callback(f"⏳ {video_name}: {percent}%")
+        return on_progress
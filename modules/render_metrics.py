@@ -0,0 +1,162 @@
+"""
+Medição de tempo por etapa e de memória da renderização.
+
+StageTimer acumula tempo total e número de chamadas por etapa (decode, blur, composição,
+encode...). PeakRssSampler acompanha o pico de memória residente do processo (e dos
+filhos, como o ffmpeg) enquanto um bloco roda.
+
+Com "render_metrics" ativo no config global, cada job grava um relatório
+<saída>.metrics.json ao lado do vídeo, e um resumo aparece no status da aba.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+import psutil
+
+
+class StageTimer:
+    """Tempo acumulado e contagem de chamadas por etapa"""
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, calls=1):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + calls
+
+    @contextmanager
+    def stage(self, stage):
+        """Mede o bloco: with timer.stage("blur"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def wrap(self, stage, func):
+        """Retorna func medida como `stage`"""
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    @contextmanager
+    def instrument(self, owner, attr, stage):
+        """
+        Substitui temporariamente owner.attr (método de classe ou função de módulo) por
+        uma versão medida. Usado pelo benchmark para medir o código sem alterá-lo.
+        """
+        original = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+        setattr(owner, attr, self.wrap(stage, original))
+        try:
+            yield
+        finally:
+            setattr(owner, attr, original)
+
+    def report(self):
+        """Dicionário {etapa: {"total_s", "calls", "avg_ms"}} pronto para JSON"""
+        with self._lock:
+            return {
+                stage: {
+                    "total_s": round(total, 4),
+                    "calls": self.counts[stage],
+                    "avg_ms": round(1000 * total / self.counts[stage], 3) if self.counts[stage] else 0.0,
+                }
+                for stage, total in sorted(self.totals.items(), key=lambda item: -item[1])
+            }
+
+
+def measure(metrics, stage):
+    """metrics.stage(stage) quando há StageTimer; senão um contexto que não faz nada"""
+    return metrics.stage(stage) if metrics is not None else nullcontext()
+
+
+def metrics_path(output_path):
+    """Caminho do relatório de um vídeo renderizado (video.mp4 -> video.metrics.json)"""
+    return os.path.splitext(output_path)[0] + ".metrics.json"
+
+
+def write_report(output_path, report):
+    """Grava o relatório ao lado do vídeo de saída"""
+    try:
+        with open(metrics_path(output_path), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"[Metrics] Erro ao salvar relatório de {output_path}: {e}")
+
+
+def summarize(report, top=4):
+    """Resumo curto para a UI: fps e as etapas mais caras em % do tempo total"""
+    wall = report.get("wall_s") or 0.0
+    stages = [
+        (stage, data["total_s"]) for stage, data in report.get("stages", {}).items()
+        if stage != "frame"  # "frame" engloba as demais etapas por frame
+    ]
+    stages.sort(key=lambda item: -item[1])
+    parts = [f"{stage} {100 * total / wall:.0f}%" for stage, total in stages[:top] if wall]
+    return f"{report.get('fps', 0):.1f} fps · " + " · ".join(parts)
+
+
+def load_summary(output_path):
+    """Resumo do relatório de output_path, ou None se não houver relatório"""
+    path = metrics_path(output_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return summarize(json.load(f))
+    except Exception as e:
+        print(f"[Metrics] Erro ao ler relatório {path}: {e}")
+        return None
+
+
+class PeakRssSampler:
+    """Amostra a memória residente (processo + filhos) em uma thread e guarda o pico"""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._process = psutil.Process()
+
+    def _current_rss(self):
+        rss = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._current_rss())
+            self._stop.wait(self.interval)
+
+    @property
+    def peak_mb(self):
+        return round(self.peak_bytes / (1024 ** 2), 1)
+
+    def __enter__(self):
+        self.peak_bytes = self._current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="RssSampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._current_rss())
+        return False
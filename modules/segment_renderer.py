@@ -0,0 +1,262 @@
+"""
+Renderização segmentada (paralela) de um único vídeo longo.
+
+O vídeo principal é dividido em intervalos de frames alinhados aos keyframes da fonte
+(o seek de cada worker cai direto em um keyframe), cada intervalo é renderizado por um
+worker com as mesmas configurações de legenda/marca d'água e os segmentos são
+concatenados sem recodificar (concat demuxer, -c copy).
+
+Os workers usam o tempo GLOBAL do vídeo (frame i -> t = i / fps), então o tempo das
+legendas continua correto nas fronteiras entre segmentos.
+"""
+import os
+import re
+import bisect
+import threading
+import multiprocessing
+import subprocess as sp
+from dataclasses import dataclass, field, replace
+from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import numpy as np
+from moviepy.config import get_setting
+from modules import ffmpeg_encoder
+from modules.config_global import global_config
+
+# Distância máxima (fração do tamanho ideal do segmento) para alinhar um corte ao keyframe
+KEYFRAME_TOLERANCE = 0.25
+
+
+@dataclass
+class SegmentTask:
+    """Descrição picklable de um segmento a renderizar"""
+    input_path: str
+    fps: float
+    v_w: int
+    v_h: int
+    border_enabled: bool
+    border_size_preview: int
+    border_color: str
+    border_style: str
+    original_main_duration: float
+    subtitles: List[Dict] = field(default_factory=list)
+    emoji_scale: float = 1.0
+    emoji_folder: Optional[str] = None
+    watermark_data: Optional[Dict] = None
+    enable_enhancement: bool = False
+    video_width_ratio: float = 0.78
+    video_height_ratio: float = 0.70
+    threads: Optional[int] = None
+    preset: str = "medium"
+    segment_path: str = ""
+    start_frame: int = 0
+    end_frame: int = 0
+
+
+def probe_keyframes(input_path):
+    """
+    Retorna os instantes (segundos) dos keyframes da fonte.
+    Decodifica apenas os keyframes (-skip_frame nokey), então é rápido. Lista vazia se falhar.
+    """
+    cmd = [
+        get_setting("FFMPEG_BINARY"),
+        '-hide_banner',
+        '-skip_frame', 'nokey',
+        '-i', input_path,
+        '-an',
+        '-vf', 'showinfo',
+        '-f', 'null', '-'
+    ]
+    popen_params = {"stdout": sp.DEVNULL, "stderr": sp.PIPE}
+    if os.name == "nt":
+        popen_params["creationflags"] = 0x08000000  # CREATE_NO_WINDOW
+    try:
+        proc = sp.Popen(cmd, **popen_params)
+        _, output = proc.communicate()
+    except Exception as e:
+        print(f"[Segmentos] Erro ao ler keyframes de {input_path}: {e}")
+        return []
+
+    times = [float(m) for m in re.findall(r"pts_time:\s*([0-9.]+)", output.decode(errors="ignore"))]
+    return sorted(set(times))
+
+
+def plan_segments(total_frames, fps, keyframe_times, num_segments, min_frames):
+    """
+    Divide [0, total_frames) em até num_segments intervalos (start, end) de pelo menos
+    min_frames frames, com cada início no keyframe mais próximo do corte ideal.
+    Se não houver keyframe perto do corte ideal (GOP longo), o corte fica na posição ideal
+    para não desequilibrar os segmentos.
+    """
+    num_segments = min(num_segments, total_frames // max(1, min_frames))
+    if num_segments <= 1:
+        return [(0, total_frames)]
+
+    keyframe_indices = sorted({int(round(t * fps)) for t in keyframe_times})
+    tolerance = total_frames / num_segments * KEYFRAME_TOLERANCE
+
+    cuts = []
+    for k in range(1, num_segments):
+        target = round(k * total_frames / num_segments)
+        cut = target
+        if keyframe_indices:
+            pos = bisect.bisect_left(keyframe_indices, target)
+            candidates = keyframe_indices[max(0, pos - 1):pos + 1]
+            nearest = min(candidates, key=lambda idx: abs(idx - target))
+            if abs(nearest - target) <= tolerance:
+                cut = nearest
+
+        previous = cuts[-1] if cuts else 0
+        if cut - previous >= min_frames and total_frames - cut >= min_frames:
+            cuts.append(cut)
+
+    bounds = [0] + cuts + [total_frames]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def render_segment(task: SegmentTask, emoji_manager=None):
+    """
+    Renderiza os frames [start_frame, end_frame) em task.segment_path (somente vídeo).
+    Roda em um processo worker (emojis recarregados de task.emoji_folder) ou em thread.
+    """
+    import moviepy.editor as mp
+    from modules.editar_com_legendas import VideoRenderer
+    from modules.global_executor import _get_worker_emoji_manager
+
+    if emoji_manager is None:
+        emoji_manager = _get_worker_emoji_manager(task.emoji_folder)
+
+    renderer = VideoRenderer(emoji_manager)
+    renderer.video_width_ratio = task.video_width_ratio
+    renderer.video_height_ratio = task.video_height_ratio
+
+    clip = mp.VideoFileClip(task.input_path, audio=False)
+    try:
+        make_frame = renderer.create_frame_maker(
+            clip,
+            task.v_w,
+            task.v_h,
+            task.subtitles,
+            task.border_enabled,
+            task.border_size_preview,
+            task.border_color,
+            task.border_style,
+            emoji_scale=task.emoji_scale,
+            watermark_data=task.watermark_data,
+            enable_enhancement=task.enable_enhancement,
+            fps=task.fps,
+            original_main_duration=task.original_main_duration
+        )
+
+        # Mesma grade de tempos do render completo (np.arange(0, duração, 1 / fps))
+        step = 1.0 / task.fps
+        size = (renderer.OUTPUT_WIDTH, renderer.OUTPUT_HEIGHT)
+        with ffmpeg_encoder.FFmpegPipeEncoder(task.segment_path, size, task.fps, preset=task.preset, threads=task.threads) as encoder:
+            for index in range(task.start_frame, task.end_frame):
+                encoder.write_frame(make_frame(index * step))
+    finally:
+        clip.close()
+
+    return task.segment_path, task.end_frame - task.start_frame
+
+
+def get_thread_budget(threads=None):
+    """Núcleos que o job pode usar (threads dadas pelo AdaptiveScheduler ou num_threads)"""
+    return max(1, int(threads or global_config.get("num_threads") or os.cpu_count() or 1))
+
+
+def get_segment_workers(threads=None):
+    """
+    Número de segmentos simultâneos ("segment_workers"; 0 = automático, metade do orçamento
+    de threads do job). Nunca passa do orçamento: os segmentos dividem os núcleos do job,
+    não somam a ele.
+    """
+    budget = get_thread_budget(threads)
+    workers = global_config.get("segment_workers")
+    if not workers:
+        workers = max(2, budget // 2)
+    return min(workers, budget)
+
+
+def should_render_segmented(duration, threads=None, enable_enhancement=False):
+    """Só vale a pena segmentar vídeos com pelo menos dois segmentos mínimos"""
+    if not global_config.get("segment_parallel"):
+        return False
+    if enable_enhancement:
+        # Cada segmento carregaria o próprio GFPGAN (memória de GPU/CPU multiplicada);
+        # o worker de inferência já processa o job em lotes
+        return False
+    return duration >= 2 * global_config.get("segment_min_duration") and get_segment_workers(threads) > 1
+
+
+def in_pool_worker():
+    """Rodando dentro de um worker do GlobalRenderExecutor (processo filho ou thread do pool)?"""
+    return multiprocessing.parent_process() is not None or threading.current_thread().name.startswith("RenderWorker")
+
+
+def render_segmented(task_template: SegmentTask, duration, output_path, temp_dir, audio_clip=None, emoji_manager=None, progress_callback=None):
+    """
+    Renderiza o vídeo principal em segmentos paralelos e concatena em output_path.
+
+    Args:
+        task_template: SegmentTask com as configurações comuns (sem intervalo/arquivo)
+        duration: Duração a renderizar (pode ser menor que a fonte, ex.: sync_duration)
+        audio_clip: Áudio final (já ajustado à duração) ou None
+        emoji_manager: Usado diretamente quando os segmentos rodam em threads
+    """
+    fps = task_template.fps
+    total_frames = len(np.arange(0, duration, 1.0 / fps))
+    budget = get_thread_budget(task_template.threads)
+    workers = get_segment_workers(budget)
+    min_frames = max(1, int(global_config.get("segment_min_duration") * fps))
+
+    keyframes = probe_keyframes(task_template.input_path)
+    segments = plan_segments(total_frames, fps, keyframes, workers, min_frames)
+    print(f"[Segmentos] {len(segments)} segmento(s) para {total_frames} frames ({len(keyframes)} keyframes na fonte)")
+
+    base_name = os.path.splitext(os.path.basename(output_path))[0]
+    encoder_threads = max(1, budget // len(segments))
+    tasks = [
+        replace(
+            task_template,
+            segment_path=os.path.join(temp_dir, f"{base_name}_seg{index:03d}.mp4"),
+            start_frame=start,
+            end_frame=end,
+            threads=encoder_threads
+        )
+        for index, (start, end) in enumerate(segments)
+    ]
+
+    audio_path = None
+    # Dentro de um job do pool global os segmentos usam threads: um pool de processos por
+    # job multiplicaria os processos sem que o AdaptiveScheduler visse esses núcleos
+    use_processes = not in_pool_worker()
+    try:
+        if audio_clip is not None:
+            audio_path = os.path.join(temp_dir, f"{base_name}_temp_audio.m4a")
+            audio_clip.write_audiofile(audio_path, fps=44100, nbytes=4, buffersize=2000, codec="aac", logger=None)
+
+        if use_processes:
+            executor = ProcessPoolExecutor(max_workers=len(tasks), mp_context=multiprocessing.get_context("spawn"))
+        else:
+            executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="SegmentWorker")
+
+        done_frames = 0
+        with executor:
+            if use_processes:
+                futures = [executor.submit(render_segment, task) for task in tasks]
+            else:
+                futures = [executor.submit(render_segment, task, emoji_manager) for task in tasks]
+            for future in as_completed(futures):
+                _, frames = future.result()
+                done_frames += frames
+                if progress_callback:
+                    progress_callback(min(100, int(100 * done_frames / total_frames)))
+
+        ffmpeg_encoder.concat_segments([task.segment_path for task in tasks], output_path, audio_path=audio_path)
+    finally:
+        for path in [task.segment_path for task in tasks] + [audio_path]:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    return output_path
@@ -0,0 +1,111 @@
+"""
+Cachê de sprites de legenda compartilhado pelo processo.
+
+Cada VideoRenderer (um por render e por chamada de preview) criava o seu próprio dicionário
+de sprites, sem limite: em sessões longas e lotes grandes a memória só crescia e nada era
+reaproveitado entre eles. Aqui há um único cachê LRU por processo, limitado em bytes
+("sprite_cache_mb" no config global), protegido por lock para as threads de render e o preview.
+O orçamento é relido a cada renderizador criado (início de render/preview) e ao salvar as
+configurações, então mudar "sprite_cache_mb" vale sem reiniciar.
+"""
+import threading
+from collections import OrderedDict
+from modules.config_global import global_config
+
+
+def get_budget():
+    """Orçamento do cachê em bytes ("sprite_cache_mb")"""
+    return int(global_config.get("sprite_cache_mb") or 256) * 1024 ** 2
+
+
+def sprite_nbytes(entry):
+    """Bytes ocupados por uma entrada (sub_img, margin, max_w, total_height, layer)"""
+    sub_img, layer = entry[0], entry[4]
+    return sub_img.width * sub_img.height * len(sub_img.getbands()) + layer.nbytes
+
+
+class SpriteCache:
+    """LRU limitado em bytes, com contadores de acerto/falta/remoção"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (entry, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Entrada de key (marcada como a mais recente) ou None"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, entry):
+        """Guarda entry e remove as menos usadas até caber no orçamento"""
+        nbytes = sprite_nbytes(entry)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return entry  # Maior que o cachê inteiro: não guarda
+            self._entries[key] = (entry, nbytes)
+            self.current_bytes += nbytes
+            self._evict()
+        return entry
+
+    def resize(self, max_bytes):
+        """Muda o orçamento (removendo o excedente na hora)"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def apply_config(self):
+        """Aplica o "sprite_cache_mb" atual do config global"""
+        max_bytes = get_budget()
+        if max_bytes != self.max_bytes:
+            self.resize(max_bytes)
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Contadores para log/benchmark"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "mb": round(self.current_bytes / (1024 ** 2), 1),
+                "max_mb": round(self.max_bytes / (1024 ** 2), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Instância única por processo
+sprite_cache = SpriteCache(get_budget())
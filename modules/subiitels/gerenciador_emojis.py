@@ -1,10 +1,17 @@
 import os
+import threading
 from PIL import Image
 
 class GerenciadorEmojis:
     def __init__(self):
+        # Imagens já carregadas (sob demanda, na primeira vez que o emoji é usado)
         self.emojis = {}
         self.folder = None
+        # nome -> caminho de todos os emojis da pasta
+        self._paths = {}
+        # (nome, tamanho) -> emoji redimensionado, compartilhado por todos os renderizadores
+        self._scaled = {}
+        self._lock = threading.Lock()
 
     def get_project_root(self):
         """Encontra a raiz do projeto onde está o run.py"""
@@ -40,31 +47,60 @@ class GerenciadorEmojis:
         return None
 
     def load_emojis(self, folder):
-        """Carrega emojis de uma pasta específica"""
-        self.folder = folder
-        self.emojis = {}
+        """Indexa os emojis de uma pasta; as imagens só são abertas quando usadas"""
+        with self._lock:
+            self.folder = folder
+            self.emojis = {}
+            self._paths = {}
+            self._scaled = {}
         if not folder or not os.path.exists(folder): 
             return 0
         
-        count = 0
         try:
-            for f in os.listdir(folder):
-                if f.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    try:
-                        img = Image.open(os.path.join(folder, f))
-                        if img.mode != 'RGBA':
-                            img = img.convert('RGBA')
-                        self.emojis[f] = img
-                        count += 1
-                    except: 
-                        pass
+            paths = {
+                f: os.path.join(folder, f) for f in os.listdir(folder)
+                if f.lower().endswith(('.png', '.jpg', '.jpeg'))
+            }
         except Exception:
-            pass
+            paths = {}
         
-        return count
+        with self._lock:
+            self._paths = paths
+        return len(paths)
 
     def get_emoji(self, name):
-        return self.emojis.get(name)
+        """Imagem RGBA do emoji (carregada na primeira chamada) ou None"""
+        img = self.emojis.get(name)
+        if img is not None or name not in self._paths:
+            return img
+        
+        with self._lock:
+            if name in self.emojis:
+                return self.emojis[name]
+            try:
+                img = Image.open(self._paths[name])
+                if img.mode != 'RGBA':
+                    img = img.convert('RGBA')
+                # Decodifica já: o load() preguiçoso do PIL não é thread-safe
+                img.load()
+            except Exception:
+                img = None
+            self.emojis[name] = img
+            return img
+
+    def get_scaled_emoji(self, name, size):
+        """Emoji redimensionado para size x size (LANCZOS), calculado uma vez por (nome, tamanho)"""
+        key = (name, size)
+        scaled = self._scaled.get(key)
+        if scaled is not None:
+            return scaled
+        
+        emoji_img = self.get_emoji(name)
+        if emoji_img is None:
+            return None
+        scaled = emoji_img.resize((size, size), Image.Resampling.LANCZOS)
+        with self._lock:
+            return self._scaled.setdefault(key, scaled)
 
     def get_emoji_list(self):
-        return sorted(list(self.emojis.keys()))
+        return sorted(list(self._paths.keys()))
@@ -0,0 +1,86 @@
+"""
+Índice temporal das legendas.
+
+A linha do tempo é cortada nos instantes em que alguma legenda começa ou termina
+(intervalos elementares). Cada intervalo guarda, já pronta, a tupla de índices das
+legendas ativas nele, então a consulta por tempo é uma busca binária: O(log n + k),
+em vez de percorrer todas as legendas a cada frame.
+"""
+import bisect
+
+# end_time padrão da UI: "até o fim do vídeo"
+DEFAULT_END_TIME = 1000.0
+
+
+def subtitle_interval(sub, video_duration=None):
+    """(início, fim) de uma legenda, aplicando o fim padrão (1000.0 -> duração do vídeo)"""
+    start = sub.get("start_time", 0.0)
+    end = sub.get("end_time", DEFAULT_END_TIME)
+    if end >= DEFAULT_END_TIME and video_duration is not None:
+        end = video_duration
+    return start, end
+
+
+def timing_signature(subtitles, video_duration=None):
+    """
+    Chave que muda sempre que os tempos (ou a ordem) das legendas mudam. Um índice com a
+    mesma chave só vale para consultas por posição (active_indices) contra a lista atual:
+    o texto/estilo das legendas pode ter mudado sem mudar a chave.
+    """
+    return (video_duration,) + tuple(
+        (sub.get("start_time", 0.0), sub.get("end_time", DEFAULT_END_TIME)) for sub in subtitles
+    )
+
+
+class SubtitleTimeline:
+    """
+    Índice das legendas ativas por instante, montado uma vez por render (ou por mudança
+    de tempos no preview).
+
+    inclusive_end=False: ativa em [início, fim) — usado no render final.
+    inclusive_end=True: ativa em [início, fim] — usado no preview do editor.
+    """
+
+    def __init__(self, subtitles, video_duration=None, inclusive_end=False):
+        self.subtitles = list(subtitles)
+        self.video_duration = video_duration
+        self.inclusive_end = inclusive_end
+
+        intervals = [subtitle_interval(sub, video_duration) for sub in self.subtitles]
+
+        # Fronteiras dos intervalos elementares
+        self._bounds = sorted({t for start, end in intervals if start <= end for t in (start, end)})
+        # _active[i]: legendas ativas em [_bounds[i], _bounds[i + 1])
+        active = [[] for _ in range(max(0, len(self._bounds) - 1))]
+        # _closing[t]: legendas que terminam exatamente em t (só contam com inclusive_end)
+        self._closing = {}
+
+        for idx, (start, end) in enumerate(intervals):
+            if start > end:
+                continue  # Intervalo inválido: nunca aparece
+            first = bisect.bisect_left(self._bounds, start)
+            last = bisect.bisect_left(self._bounds, end)
+            for i in range(first, last):
+                active[i].append(idx)
+            self._closing.setdefault(end, []).append(idx)
+
+        self._active = [tuple(indices) for indices in active]
+
+    def __len__(self):
+        return len(self.subtitles)
+
+    def active_indices(self, t):
+        """Índices (na ordem original, que é a ordem de desenho) das legendas ativas em t"""
+        pos = bisect.bisect_right(self._bounds, t) - 1
+        if pos < 0:
+            return ()
+
+        indices = self._active[pos] if pos < len(self._active) else ()
+        if self.inclusive_end and t == self._bounds[pos] and t in self._closing:
+            # Em t exatamente igual a um fim, o intervalo fechado ainda mostra quem termina ali
+            indices = tuple(sorted(set(indices).union(self._closing[t])))
+        return indices
+
+    def active(self, t):
+        """Legendas (dicionários da lista usada na montagem do índice) ativas em t"""
+        return [self.subtitles[idx] for idx in self.active_indices(t)]
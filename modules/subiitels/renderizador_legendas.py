@@ -1,30 +1,89 @@
 import re
-import platform
 import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from modules.text_formatter import TextFormatter
+from modules.config_global import global_config
+from modules.subiitels.contorno_texto import draw_outlined_text, DEFAULT_OUTLINE_METHOD
+from modules.subiitels.cache_sprites import sprite_cache
+from modules.alpha_blend import AlphaLayer
+
+class SpriteAtlas:
+    """
+    Sprites de legenda/marca d'água de um job, rasterizados antes do loop de frames.
+    Os sprites ficam no cachê compartilhado (dentro de "sprite_cache_mb"); o atlas só guarda
+    quais chaves são do job. Um sprite que o LRU descartar é rasterizado de novo no uso.
+    """
+
+    def __init__(self, keys, cache):
+        self._keys = frozenset(keys)
+        self._cache = cache
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
 
 class RenderizadorLegendas:
     def __init__(self, gerenciador_emojis):
         self.gerenciador_emojis = gerenciador_emojis
-        self.cache = {}
+        # Cachê LRU compartilhado por todos os renderizadores do processo (ver cache_sprites.py)
+        self.cache = sprite_cache
+        self.cache.apply_config()
+        self.atlas = None
+        # Motor do contorno do texto (ver contorno_texto.py)
+        self.outline_method = global_config.get("subtitle_outline") or DEFAULT_OUTLINE_METHOD
 
     def clear_cache(self):
-        self.cache = {}
+        """Descarta o atlas do job e esvazia o cachê compartilhado"""
+        self.cache.clear()
+        self.atlas = None
+
+    def build_atlas(self, subs, scale_factor, emoji_scale=1.0):
+        """
+        Rasteriza de uma vez, antes do loop de frames, todas as legendas de um job que ainda
+        não estão no cachê compartilhado. Legendas com o mesmo visual viram um único sprite.
+        Sequencial: o PIL segura o GIL ao desenhar texto, então threads quase não ganhavam.
+        """
+        unique = {}
+        for sub in subs:
+            key = self._get_cache_key(sub, scale_factor, emoji_scale)
+            if key not in unique:
+                unique[key] = sub
+
+        for key, sub in unique.items():
+            if key not in self.cache:
+                self.cache.put(key, self._rasterize(sub, scale_factor, emoji_scale))
+
+        self.atlas = SpriteAtlas(unique, self.cache)
+        return self.atlas
 
     def _get_cache_key(self, sub, scale_factor, emoji_scale):
         return (
             sub.get("text"), sub.get("font"), sub.get("size"),
             sub.get("color"), sub.get("border"), sub.get("bg"),
             sub.get("border_thickness"), sub.get("align"), sub.get("italic"),
-            scale_factor, emoji_scale
+            scale_factor, emoji_scale, self.outline_method,
+            self.gerenciador_emojis.folder  # Mesmo nome de emoji pode ser outra imagem em outra pasta
         )
 
     def _render_to_cache(self, sub, scale_factor, emoji_scale):
         key = self._get_cache_key(sub, scale_factor, emoji_scale)
-        if key in self.cache:
-            return self.cache[key]
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
 
+        return self.cache.put(key, self._rasterize(sub, scale_factor, emoji_scale))
+
+    def _rasterize(self, sub, scale_factor, emoji_scale):
+        """
+        Desenha a legenda em uma imagem RGBA: (sub_img, margin, max_w, total_height, layer),
+        onde layer é a mesma imagem pré-multiplicada para a composição em NumPy.
+        """
         # Calcular dimensões necessárias para a imagem da legenda
         italic = sub.get("italic", False)
         font = TextFormatter.get_font(sub["font"], int(sub["size"] * scale_factor), italic=italic)
@@ -96,30 +155,34 @@ class RenderizadorLegendas:
                 if j % 2 == 0:
                     if part:
                         border = sub.get("border")
-                        if border and border != "" and border_thickness > 0:
-                            t = max(1, int(border_thickness * scale_factor))
-                            for dx in range(-t, t+1):
-                                for dy in range(-t, t+1):
-                                    if dx!=0 or dy!=0: draw.text((curr_x+dx, curr_y+dy), part, font=font, fill=border, anchor="lm")
-                        draw.text((curr_x, curr_y), part, font=font, fill=sub["color"], anchor="lm")
+                        t = max(1, int(border_thickness * scale_factor)) if border_thickness > 0 else 0
+                        draw_outlined_text(
+                            draw, (curr_x, curr_y), part, font, sub["color"],
+                            outline=border, thickness=t, anchor="lm", method=self.outline_method
+                        )
                         bbox = draw.textbbox((0, 0), part, font=font)
                         curr_x += bbox[2] - bbox[0]
                 else:
-                    emoji_img = self.gerenciador_emojis.get_emoji(part)
-                    if emoji_img:
-                        e_size = int(font.size * emoji_scale)
-                        e_img = emoji_img.resize((e_size, e_size), Image.Resampling.LANCZOS)
+                    e_size = int(font.size * emoji_scale)
+                    e_img = self.gerenciador_emojis.get_scaled_emoji(part, e_size)
+                    if e_img:
                         sub_img.paste(e_img, (int(curr_x), int(curr_y - e_size//2)), e_img if e_img.mode == 'RGBA' else None)
                         curr_x += e_size
             curr_y += line_height
 
-        self.cache[key] = (sub_img, margin, max_w, total_height)
-        return self.cache[key]
+        return (sub_img, margin, max_w, total_height, AlphaLayer(sub_img))
 
-    def draw_subtitle(self, draw, sub, scale_factor=1.0, emoji_scale=1.0, offset_x=0, offset_y=0):
-        # Usar o cachê para obter a imagem da legenda
-        sub_img, margin, max_w, total_height = self._render_to_cache(sub, scale_factor, emoji_scale)
-        
+    def get_subtitle_sprite(self, sub, scale_factor=1.0, emoji_scale=1.0, offset_x=0, offset_y=0):
+        """Retorna a imagem RGBA da legenda (do cachê) e a posição de colagem no frame final"""
+        sub_img, margin, max_w, total_height, _ = self._render_to_cache(sub, scale_factor, emoji_scale)
+        return sub_img, self._paste_position(sub, scale_factor, offset_x, offset_y, margin, max_w, total_height)
+
+    def get_subtitle_layer(self, sub, scale_factor=1.0, emoji_scale=1.0, offset_x=0, offset_y=0):
+        """Como get_subtitle_sprite, mas com o AlphaLayer (para alpha_blend.blend no frame em NumPy)"""
+        _, margin, max_w, total_height, layer = self._render_to_cache(sub, scale_factor, emoji_scale)
+        return layer, self._paste_position(sub, scale_factor, offset_x, offset_y, margin, max_w, total_height)
+
+    def _paste_position(self, sub, scale_factor, offset_x, offset_y, margin, max_w, total_height):
         # Calcular posição de colagem (centralizado conforme sub["x"], sub["y"])
         # Originalmente: block_start_x = x - max_line_width // 2
         # start_y = y - total_height // 2
@@ -129,50 +192,18 @@ class RenderizadorLegendas:
         
         paste_x = int(x - max_w // 2 - margin)
         paste_y = int(y - total_height // 2 - margin)
-        
-        # Colar na imagem principal (o draw._image é a referência para o PIL.Image original)
-        draw._image.paste(sub_img, (paste_x, paste_y), sub_img)
+        return paste_x, paste_y
 
-    def _get_font(self, font_family, size):
-        """Carrega a fonte correta dependendo do Sistema Operacional"""
-        system = platform.system()
+    def draw_subtitle(self, draw, sub, scale_factor=1.0, emoji_scale=1.0, offset_x=0, offset_y=0):
+        # Usar o cachê para obter a imagem da legenda
+        sub_img, pos = self.get_subtitle_sprite(sub, scale_factor, emoji_scale, offset_x, offset_y)
         
-        try:
-            if system == "Windows":
-                # Mapeamento para Windows
-                font_map = {
-                    "Arial Black": "ariblk.ttf",
-                    "Arial": "arial.ttf",
-                    "Helvetica": "arial.ttf",
-                    "Times": "times.ttf",
-                    "Courier": "cour.ttf",
-                    "Verdana": "verdana.ttf",
-                    "Impact": "impact.ttf",
-                    "Comic Sans MS": "comic.ttf"
-                }
-                font_name = font_map.get(font_family, "arial.ttf")
-                font_path = os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts', font_name)
-            else:
-                # Mapeamento para Linux (Liberation/DejaVu)
-                font_map = {
-                    "Arial Black": "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-                    "Arial": "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-                    "Helvetica": "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-                    "Times": "/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf",
-                    "Courier": "/usr/share/fonts/truetype/liberation/LiberationMono-Regular.ttf",
-                    "Verdana": "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-                    "Impact": "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-                    "Comic Sans MS": "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
-                }
-                font_path = font_map.get(font_family, "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf")
-            
-            return ImageFont.truetype(font_path, size)
-        except:
-            return ImageFont.load_default()
+        # Colar na imagem principal (o draw._image é a referência para o PIL.Image original)
+        draw._image.paste(sub_img, pos, sub_img)
 
     def get_subtitle_bbox(self, sub, scale_factor=1.0, emoji_scale=1.0, offset_x=0, offset_y=0):
         # Usar o cachê para obter as dimensões rapidamente
-        _, _, max_w, total_height = self._render_to_cache(sub, scale_factor, emoji_scale)
+        _, _, max_w, total_height, _ = self._render_to_cache(sub, scale_factor, emoji_scale)
         
         x = sub["x"] * scale_factor + offset_x
         y = sub["y"] * scale_factor + offset_y
@@ -5,12 +5,28 @@ Gerencia alinhamento (esquerda, centro, direita) e estilo itálico.
 
 import platform
 import os
+import threading
 from PIL import ImageFont
 
 
 class TextFormatter:
     """Gerenciador de formatação de texto para legendas"""
     
+    # Sistema detectado uma vez (antes era consultado a cada fonte carregada)
+    SYSTEM = platform.system()
+    
+    # (família, itálico) -> caminho do arquivo, montado por discover_fonts() (abertura da UI ou primeiro uso)
+    _font_paths = {}
+    _discovered = False
+    _discover_lock = threading.Lock()
+    # Fontes sem arquivo já avisadas (o aviso sai uma vez só, não a cada legenda)
+    _missing_reported = set()
+    _registry_lock = threading.Lock()
+    # Objetos de fonte por (caminho, tamanho), compartilhados pelo processo inteiro: a
+    # rasterização de cada job (build_atlas) reaproveita as fontes dos jobs anteriores
+    _fonts = {}
+    _fonts_lock = threading.Lock()
+    
     # Constantes para alinhamento
     ALIGN_LEFT = 'left'
     ALIGN_CENTER = 'center'
@@ -64,10 +80,54 @@ class TextFormatter:
         "Comic Sans MS": "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
     }
     
+    @staticmethod
+    def _default_path(italic):
+        """Fonte usada quando a família não está no mapeamento"""
+        if TextFormatter.SYSTEM == "Windows":
+            return "ariali.ttf" if italic else "arial.ttf"
+        if italic:
+            return "/usr/share/fonts/truetype/liberation/LiberationSans-Italic.ttf"
+        return "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
+    
+    @staticmethod
+    def _resolve_path(font_family, italic):
+        """Caminho do arquivo da fonte para o sistema atual"""
+        if TextFormatter.SYSTEM == "Windows":
+            names = TextFormatter.ITALIC_FONTS_WINDOWS if italic else TextFormatter.NORMAL_FONTS_WINDOWS
+            font_name = names.get(font_family, TextFormatter._default_path(italic))
+            return os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts', font_name)
+        paths = TextFormatter.ITALIC_FONTS_LINUX if italic else TextFormatter.NORMAL_FONTS_LINUX
+        return paths.get(font_family, TextFormatter._default_path(italic))
+    
+    @staticmethod
+    def discover_fonts():
+        """
+        Resolve de uma vez os arquivos de todas as famílias conhecidas e avisa (uma única
+        vez) quais não existem nesta máquina.
+        
+        Returns:
+            list: Famílias/variantes sem arquivo, ex.: ["Impact (itálico)"]
+        """
+        families = set(TextFormatter.NORMAL_FONTS_WINDOWS) | set(TextFormatter.NORMAL_FONTS_LINUX)
+        missing = []
+        with TextFormatter._registry_lock:
+            TextFormatter._discovered = True
+            for family in sorted(families):
+                for italic in (False, True):
+                    path = TextFormatter._resolve_path(family, italic)
+                    TextFormatter._font_paths[(family, italic)] = path
+                    if not os.path.exists(path):
+                        TextFormatter._missing_reported.add((family, italic))
+                        missing.append(f"{family} (itálico)" if italic else family)
+        if missing:
+            print(f"Aviso: fontes não encontradas (usando a fonte padrão): {', '.join(missing)}")
+        return missing
+    
     @staticmethod
     def get_font(font_family, size, italic=False):
         """
         Carrega a fonte correta baseada no sistema operacional e estilo.
+        Cada (arquivo, tamanho) é aberto uma vez por processo e reaproveitado.
         
         Args:
             font_family: Nome da família da fonte
@@ -77,30 +137,36 @@ class TextFormatter:
         Returns:
             ImageFont: Objeto de fonte PIL
         """
-        system = platform.system()
+        if not TextFormatter._discovered:
+            # A interface descobre as fontes ao abrir; aqui cobre processos workers e scripts
+            with TextFormatter._discover_lock:
+                if not TextFormatter._discovered:
+                    TextFormatter.discover_fonts()
         
+        path = TextFormatter._font_paths.get((font_family, italic))
+        if path is None:
+            # Família fora do mapeamento: resolve e guarda (cai na fonte padrão do sistema)
+            path = TextFormatter._resolve_path(font_family, italic)
+            with TextFormatter._registry_lock:
+                TextFormatter._font_paths[(font_family, italic)] = path
+        
+        key = (path, size)
+        with TextFormatter._fonts_lock:
+            font = TextFormatter._fonts.get(key)
+            if font is None:
+                font = TextFormatter._fonts[key] = TextFormatter._load_font(path, font_family, size, italic)
+        return font
+    
+    @staticmethod
+    def _load_font(path, font_family, size, italic):
         try:
-            if system == "Windows":
-                if italic:
-                    font_name = TextFormatter.ITALIC_FONTS_WINDOWS.get(font_family, "ariali.ttf")
-                else:
-                    font_name = TextFormatter.NORMAL_FONTS_WINDOWS.get(font_family, "arial.ttf")
-                font_path = os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts', font_name)
-            else:  # Linux
-                if italic:
-                    font_path = TextFormatter.ITALIC_FONTS_LINUX.get(
-                        font_family, 
-                        "/usr/share/fonts/truetype/liberation/LiberationSans-Italic.ttf"
-                    )
-                else:
-                    font_path = TextFormatter.NORMAL_FONTS_LINUX.get(
-                        font_family, 
-                        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
-                    )
-            
-            return ImageFont.truetype(font_path, size)
+            return ImageFont.truetype(path, size)
         except Exception as e:
-            print(f"Erro ao carregar fonte {font_family} (italic={italic}): {e}")
+            with TextFormatter._registry_lock:
+                first_time = (font_family, italic) not in TextFormatter._missing_reported
+                TextFormatter._missing_reported.add((font_family, italic))
+            if first_time:
+                print(f"Erro ao carregar fonte {font_family} (italic={italic}): {e}")
             return ImageFont.load_default()
     
     @staticmethod
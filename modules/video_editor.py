@@ -5,6 +5,7 @@ from PIL import Image, ImageDraw
 from modules.subiitels.renderizador_legendas import RenderizadorLegendas
 from modules.subiitels.gerenciador_emojis import GerenciadorEmojis
 from modules.editar_com_legendas import VideoRenderer
+from modules.blur_engine import blur_background
 
 class VideoEditor:
     def __init__(self):
@@ -17,14 +18,7 @@ class VideoEditor:
         # O VideoRenderer será instanciado sob demanda ou no init se houver emoji_manager
 
     def apply_blur_opencv(self, get_frame, t):
-        frame = get_frame(t)
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        blurred = cv2.GaussianBlur(
-            frame_bgr,
-            (self.blur_intensity * 2 + 1, self.blur_intensity * 2 + 1),
-            0
-        )
-        return cv2.cvtColor(blurred, cv2.COLOR_BGR2RGB)
+        return blur_background(get_frame(t), self.blur_intensity)
 
     def create_composition(self, video_clip, style, border_color_name="white"):
         """
@@ -255,9 +249,10 @@ class VideoEditor:
                 print(f"Erro ao gerar preview: {e}")
                 return None
 
-    def render_video(self, input_path, output_path, style, border_color="white", subtitles=None, emoji_manager=None, audio_settings=None, watermark_data=None, mesclagem_data=None, tab_number=None, enable_enhancement=False, video_width_ratio=0.78, video_height_ratio=0.70):
+    def render_video(self, input_path, output_path, style, border_color="white", subtitles=None, emoji_manager=None, audio_settings=None, watermark_data=None, mesclagem_data=None, tab_number=None, enable_enhancement=False, video_width_ratio=0.78, video_height_ratio=0.70, threads=None, progress_callback=None):
         """
         Renderiza o vídeo final usando o VideoRenderer.
+        threads: threads do encoder (None = num_threads do config global)
         """
         renderer = VideoRenderer(emoji_manager)
         
@@ -281,6 +276,8 @@ class VideoEditor:
             watermark_data=watermark_data,
             mesclagem_data=mesclagem_data,
             tab_number=tab_number,
-            enable_enhancement=enable_enhancement
+            enable_enhancement=enable_enhancement,
+            threads=threads,
+            progress_callback=progress_callback
         )
         return success, result
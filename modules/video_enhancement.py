@@ -5,22 +5,57 @@ Adaptado do face_enhancer.py do projeto Deep-Live-Cam.
 """
 
 from typing import Optional
+from concurrent.futures import Future
 import cv2
+import queue
 import threading
+import time
 import os
 import platform
 import numpy as np
+from modules.config_global import global_config
+from modules.face_tracking import FaceTracker, face_roi
 
-# Variável global para o enhancer
+# Variável global para o enhancer (carregado em segundo plano, ver warmup_async)
 FACE_ENHANCER = None
-THREAD_SEMAPHORE = threading.Semaphore()
+ENHANCER_READY = threading.Event()
+WARMUP_THREAD = None
+# "idle", "loading", "ready" ou "unavailable" (exibido na interface)
+WARMUP_STATUS = "idle"
+# Depois de um carregamento que falhou, nova tentativa só após este intervalo (segundos)
+WARMUP_RETRY_SECONDS = 30
+WARMUP_FAILED_AT = None
+# Backend da rede de restauração (PyTorch ou ONNX Runtime, ver get_face_backend)
+FACE_BACKEND = None
+# Dispositivo em que o GFPGANer foi inicializado
+DEVICE_TYPE = None
 THREAD_LOCK = threading.Lock()
 NAME = "VIDEO-ENHANCEMENT"
 
+# Worker único de inferência (todas as threads de render enviam frames para ele)
+ENHANCEMENT_WORKER = None
+WORKER_LOCK = threading.Lock()
+# Tempo máximo (s) esperando mais frames para completar um lote
+BATCH_TIMEOUT = 0.02
+# Desligados na primeira falha de compatibilidade do caminho em lote (versão incompatível do
+# gfpgan/facexlib); outras falhas (ex.: falta de memória) só afetam o lote em que ocorreram
+BATCH_SUPPORTED = True
+TRACKING_SUPPORTED = True
+INCOMPATIBLE_ERRORS = (AttributeError, TypeError)
+# Modos de enhancement: GFPGAN em todo o frame ou só nas faces rastreadas (ver face_tracking.py)
+ENHANCEMENT_MODES = ("full", "tracked")
+# Estado do face_helper (facexlib) de um frame, guardado entre detecção e colagem no lote
+HELPER_STATE = ("input_img", "is_gray", "affine_matrices", "cropped_faces", "det_faces", "all_landmarks_5", "pad_input_imgs")
+
 # Caminhos
 SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
 MODEL_PATH = os.path.join(MODELS_DIR, "GFPGANv1.4.pth")
+# Modelos exportados por `python -m modules.enhancement_export export [--int8]`
+ONNX_MODEL_PATH = os.path.join(MODELS_DIR, "GFPGANv1.4.onnx")
+ONNX_INT8_MODEL_PATH = os.path.join(MODELS_DIR, "GFPGANv1.4.int8.onnx")
+# Backends da rede: "auto" escolhe ONNX (int8 se exportado) quando o enhancer roda em CPU
+INFERENCE_BACKENDS = ("auto", "torch", "onnx", "onnx_int8")
 
 
 def is_available() -> bool:
@@ -74,9 +109,9 @@ def get_device_type() -> str:
         return 'cpu'
 
 
-def get_enhancer(device_type: str = 'auto') -> Optional[any]:
+def _load_enhancer(device_type: str = 'auto') -> Optional[any]:
     """
-    Inicializa e retorna a instância do GFPGAN.
+    Inicializa a instância do GFPGAN (lento: importa o torch e carrega os pesos).
     
     Args:
         device_type: 'auto', 'cuda', 'rocm', 'mps', ou 'cpu'
@@ -84,80 +119,143 @@ def get_enhancer(device_type: str = 'auto') -> Optional[any]:
     Returns:
         Instância do GFPGANer ou None se falhar
     """
-    global FACE_ENHANCER
+    global DEVICE_TYPE
     
-    with THREAD_LOCK:
-        if FACE_ENHANCER is None:
-            # Verificar disponibilidade
-            if not is_available():
-                return None
-            
+    # Verificar disponibilidade
+    if not is_available():
+        return None
+    
+    try:
+        import torch
+        import gfpgan
+        
+        # Determinar dispositivo
+        if device_type == 'auto':
+            device_type = get_device_type()
+        
+        # Criar dispositivo torch
+        if device_type == 'cuda':
+            device = torch.device('cuda')
+            print(f"{NAME}: Usando GPU NVIDIA (CUDA)")
+        elif device_type == 'rocm':
+            device = torch.device('cuda')  # ROCm usa 'cuda' como device
+            print(f"{NAME}: Usando GPU AMD (ROCm)")
+        elif device_type == 'mps':
+            device = torch.device('mps')
+            print(f"{NAME}: Usando GPU Apple Silicon (MPS)")
+        else:
+            device = torch.device('cpu')
+            print(f"{NAME}: Usando CPU")
+        
+        # Inicializar GFPGAN
+        enhancer = gfpgan.GFPGANer(
+            model_path=MODEL_PATH,
+            upscale=1,  # Apenas enhancement, sem upscale
+            arch='clean',
+            channel_multiplier=2,
+            bg_upsampler=None,
+            device=device
+        )
+        DEVICE_TYPE = device_type
+        
+        print(f"{NAME}: GFPGANer inicializado com sucesso em {device}")
+        
+    except Exception as e:
+        print(f"{NAME}: Erro ao inicializar GFPGANer: {e}")
+        
+        # Fallback para CPU se falhar com GPU
+        if device_type != 'cpu':
+            print(f"{NAME}: Tentando fallback para CPU...")
             try:
                 import torch
                 import gfpgan
                 
-                # Determinar dispositivo
-                if device_type == 'auto':
-                    device_type = get_device_type()
-                
-                # Criar dispositivo torch
-                if device_type == 'cuda':
-                    device = torch.device('cuda')
-                    print(f"{NAME}: Usando GPU NVIDIA (CUDA)")
-                elif device_type == 'rocm':
-                    device = torch.device('cuda')  # ROCm usa 'cuda' como device
-                    print(f"{NAME}: Usando GPU AMD (ROCm)")
-                elif device_type == 'mps':
-                    device = torch.device('mps')
-                    print(f"{NAME}: Usando GPU Apple Silicon (MPS)")
-                else:
-                    device = torch.device('cpu')
-                    print(f"{NAME}: Usando CPU")
-                
-                # Inicializar GFPGAN
-                FACE_ENHANCER = gfpgan.GFPGANer(
+                device = torch.device('cpu')
+                enhancer = gfpgan.GFPGANer(
                     model_path=MODEL_PATH,
-                    upscale=1,  # Apenas enhancement, sem upscale
+                    upscale=1,
                     arch='clean',
                     channel_multiplier=2,
                     bg_upsampler=None,
                     device=device
                 )
-                
-                print(f"{NAME}: GFPGANer inicializado com sucesso em {device}")
-                
-            except Exception as e:
-                print(f"{NAME}: Erro ao inicializar GFPGANer: {e}")
-                
-                # Fallback para CPU se falhar com GPU
-                if device_type != 'cpu':
-                    print(f"{NAME}: Tentando fallback para CPU...")
-                    try:
-                        import torch
-                        import gfpgan
-                        
-                        device = torch.device('cpu')
-                        FACE_ENHANCER = gfpgan.GFPGANer(
-                            model_path=MODEL_PATH,
-                            upscale=1,
-                            arch='clean',
-                            channel_multiplier=2,
-                            bg_upsampler=None,
-                            device=device
-                        )
-                        print(f"{NAME}: GFPGANer inicializado em CPU após fallback")
-                    except Exception as fallback_e:
-                        print(f"{NAME}: FATAL: Falha no fallback para CPU: {fallback_e}")
-                        FACE_ENHANCER = None
-                else:
-                    FACE_ENHANCER = None
+                DEVICE_TYPE = 'cpu'
+                print(f"{NAME}: GFPGANer inicializado em CPU após fallback")
+            except Exception as fallback_e:
+                print(f"{NAME}: FATAL: Falha no fallback para CPU: {fallback_e}")
+                enhancer = None
+        else:
+            enhancer = None
+    
+    return enhancer
+
+
+def _warmup(device_type: str):
+    """Thread de aquecimento: carrega o GFPGAN e o backend da rede e faz uma inferência inicial"""
+    global FACE_ENHANCER, WARMUP_STATUS, WARMUP_FAILED_AT
+    enhancer = None
+    try:
+        enhancer = _load_enhancer(device_type)
+        FACE_ENHANCER = enhancer
+        if enhancer is not None:
+            # Primeira inferência fora do render (alocações, seleção de kernels). O backend vem
+            # direto do enhancer: get_face_backend esperaria em get_enhancer por este aquecimento
+            _restore_faces(enhancer, [np.zeros((512, 512, 3), dtype=np.uint8)], 1, backend=_get_backend(enhancer))
+    except Exception as e:
+        print(f"{NAME}: Erro no aquecimento do enhancer: {e}")
+    finally:
+        # Renders esperando em get_enhancer seguem (com None) mesmo se o carregamento falhar;
+        # a falha não é definitiva: warmup_async tenta de novo após WARMUP_RETRY_SECONDS
+        with THREAD_LOCK:
+            if enhancer is None:
+                WARMUP_STATUS = "unavailable"
+                WARMUP_FAILED_AT = time.monotonic()
+            else:
+                WARMUP_STATUS = "ready"
+            ENHANCER_READY.set()
+
+
+def warmup_async(device_type: str = 'auto') -> threading.Event:
+    """
+    Começa a carregar o GFPGAN em segundo plano (na primeira chamada, ou de novo se o último
+    carregamento falhou há mais de WARMUP_RETRY_SECONDS) e devolve o Event sinalizado quando
+    o carregamento termina, com ou sem sucesso.
+    """
+    global WARMUP_THREAD, WARMUP_STATUS
+    with THREAD_LOCK:
+        if WARMUP_STATUS == "unavailable" and time.monotonic() - WARMUP_FAILED_AT >= WARMUP_RETRY_SECONDS:
+            WARMUP_THREAD = None
+            ENHANCER_READY.clear()
+        if WARMUP_THREAD is None:
+            WARMUP_STATUS = "loading"
+            WARMUP_THREAD = threading.Thread(target=_warmup, args=(device_type,), name="EnhancementWarmup", daemon=True)
+            WARMUP_THREAD.start()
+    return ENHANCER_READY
+
+
+def get_warmup_status() -> str:
+    """Estado do carregamento do modelo: "idle", "loading", "ready" ou "unavailable" """
+    return WARMUP_STATUS
+
+
+def get_enhancer(device_type: str = 'auto') -> Optional[any]:
+    """
+    Retorna a instância do GFPGAN, esperando o aquecimento (iniciado aqui se ninguém
+    chamou warmup_async antes). device_type só vale para quem inicia o carregamento.
+    Se o último carregamento falhou, tenta de novo (respeitando WARMUP_RETRY_SECONDS).
     
+    Returns:
+        Instância do GFPGANer ou None se indisponível
+    """
+    if not ENHANCER_READY.is_set() or WARMUP_STATUS == "unavailable":
+        warmup_async(device_type).wait()
     return FACE_ENHANCER
 
 
 def enhance_frame(frame: np.ndarray) -> np.ndarray:
     """
     Melhora a qualidade de um frame usando GFPGAN.
+    O frame passa pelo worker de inferência (junto com os de outras threads, em lote).
     
     Args:
         frame: Frame numpy array (BGR)
@@ -165,22 +263,22 @@ def enhance_frame(frame: np.ndarray) -> np.ndarray:
     Returns:
         Frame melhorado ou original se falhar
     """
-    # Obter enhancer
-    enhancer = get_enhancer()
-    
-    if enhancer is None:
+    if get_enhancer() is None:
         # Se não disponível, retornar frame original
         return frame
-    
+    return get_worker().submit(frame).result()
+
+
+def _enhance_single(enhancer, frame: np.ndarray) -> np.ndarray:
+    """Caminho frame a frame do GFPGANer (fallback do lote)"""
     try:
-        with THREAD_SEMAPHORE:
-            # GFPGAN enhance retorna: (_, restored_faces, restored_img)
-            _, _, restored_img = enhancer.enhance(
-                frame,
-                has_aligned=False,      # Faces não estão pré-alinhadas
-                only_center_face=False, # Melhorar todas as faces detectadas
-                paste_back=True         # Colar faces melhoradas de volta
-            )
+        # GFPGAN enhance retorna: (_, restored_faces, restored_img)
+        _, _, restored_img = enhancer.enhance(
+            frame,
+            has_aligned=False,      # Faces não estão pré-alinhadas
+            only_center_face=False, # Melhorar todas as faces detectadas
+            paste_back=True         # Colar faces melhoradas de volta
+        )
         
         # Se retornar None, usar frame original
         if restored_img is None:
@@ -193,11 +291,410 @@ def enhance_frame(frame: np.ndarray) -> np.ndarray:
         return frame
 
 
+def _capture_helper_state(helper):
+    """Cópia rasa do estado do face_helper para o frame atual (só atributos existentes)"""
+    state = {}
+    for attr in HELPER_STATE:
+        if hasattr(helper, attr):
+            value = getattr(helper, attr)
+            state[attr] = list(value) if isinstance(value, list) else value
+    return state
+
+
+def faces_to_batch(faces):
+    """Faces alinhadas 512x512 BGR uint8 -> lote Nx3x512x512 float32 RGB em [-1, 1] (img2tensor + normalize)"""
+    batch = np.stack([face[:, :, ::-1] for face in faces]) / 255.
+    batch = (batch.astype(np.float32) - 0.5) / 0.5
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+
+def batch_to_faces(output):
+    """Saída da rede (Nx3x512x512, [-1, 1], RGB) -> faces BGR uint8 (tensor2img)"""
+    output = (np.clip(np.asarray(output, dtype=np.float32), -1, 1) + 1) / 2
+    faces = (output.transpose(0, 2, 3, 1)[:, :, :, ::-1] * 255.0).round()
+    return [np.ascontiguousarray(face, dtype=np.uint8) for face in faces]
+
+
+class TorchFaceBackend:
+    """Rede do GFPGANer em PyTorch (eager, no dispositivo do enhancer)"""
+    name = "torch"
+
+    def __init__(self, enhancer):
+        self.enhancer = enhancer
+
+    def restore(self, batch, weight=0.5, randomize_noise=True):
+        """Lote normalizado (faces_to_batch) -> saída da rede, mesmo formato"""
+        import torch
+        with torch.no_grad():
+            tensor = torch.from_numpy(batch).to(self.enhancer.device)
+            output = self.enhancer.gfpgan(tensor, return_rgb=False, weight=weight, randomize_noise=randomize_noise)[0]
+            return output.float().cpu().numpy()
+
+
+class OnnxFaceBackend:
+    """
+    Rede exportada para ONNX (fp32 ou int8), executada no ONNX Runtime em CPU.
+    O modelo exportado usa o ruído fixo do StyleGAN (randomize_noise=False) e lote fixo de 1:
+    a convolução modulada do StyleGAN agrupa pelo tamanho do lote (groups=lote), valor que o
+    tracing grava como constante. Cada face do lote roda em uma chamada da sessão.
+    """
+
+    def __init__(self, model_path, name="onnx"):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.name = name
+
+    def restore(self, batch, weight=0.5, randomize_noise=False):
+        outputs = [self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))]
+        return np.concatenate(outputs)
+
+
+def _load_onnx_backend(name):
+    """OnnxFaceBackend do modelo `name` ("onnx" ou "onnx_int8"), ou None se não exportado/sem onnxruntime"""
+    model_path = ONNX_INT8_MODEL_PATH if name == "onnx_int8" else ONNX_MODEL_PATH
+    if not os.path.exists(model_path):
+        return None
+    try:
+        return OnnxFaceBackend(model_path, name)
+    except Exception as e:
+        print(f"{NAME}: Backend {name} indisponível ({e})")
+        return None
+
+
+def get_face_backend() -> Optional[any]:
+    """
+    Backend da rede de restauração ("enhancement_backend"). Em "auto", com o enhancer em
+    CPU usa o modelo ONNX int8 ou fp32 (o primeiro exportado), senão o PyTorch.
+    Detecção, alinhamento e colagem continuam no GFPGANer/facexlib.
+    """
+    enhancer = get_enhancer()
+    if enhancer is None:
+        return None
+    return _get_backend(enhancer)
+
+
+def _get_backend(enhancer):
+    global FACE_BACKEND
+    with THREAD_LOCK:
+        if FACE_BACKEND is None:
+            choice = global_config.get("enhancement_backend") or "auto"
+            if choice == "auto":
+                candidates = ["onnx_int8", "onnx"] if DEVICE_TYPE == 'cpu' else []
+            elif choice in ("onnx", "onnx_int8"):
+                candidates = [choice]
+            else:
+                candidates = []
+            for name in candidates:
+                FACE_BACKEND = _load_onnx_backend(name)
+                if FACE_BACKEND is not None:
+                    break
+            if FACE_BACKEND is None:
+                FACE_BACKEND = TorchFaceBackend(enhancer)
+            print(f"{NAME}: Backend de inferência: {FACE_BACKEND.name}")
+    return FACE_BACKEND
+
+
+def _fallback_to_torch(enhancer, failed, error):
+    """Troca o backend ONNX que falhou pelo PyTorch (avisa uma vez) e devolve o novo backend"""
+    global FACE_BACKEND
+    with THREAD_LOCK:
+        if FACE_BACKEND is failed:
+            print(f"{NAME}: Backend {failed.name} falhou ({error}); usando torch")
+            FACE_BACKEND = TorchFaceBackend(enhancer)
+        return FACE_BACKEND
+
+
+def _restore_faces(enhancer, faces, batch_size, weight=0.5, backend=None):
+    """
+    Faces alinhadas (512x512 BGR) -> faces restauradas, batch_size por forward da rede.
+    backend: None = o backend do enhancer (_get_backend; nunca espera o aquecimento).
+    Se o backend ONNX falhar, o lote é refeito no PyTorch; falhas do PyTorch sobem.
+    """
+    if backend is None:
+        backend = _get_backend(enhancer)
+    restored = []
+    batch_size = max(1, batch_size)
+    for start in range(0, len(faces), batch_size):
+        batch = faces_to_batch(faces[start:start + batch_size])
+        try:
+            output = backend.restore(batch, weight=weight)
+        except Exception as error:
+            if isinstance(backend, TorchFaceBackend):
+                raise
+            backend = _fallback_to_torch(enhancer, backend, error)
+            output = backend.restore(batch, weight=weight)
+        restored.extend(batch_to_faces(output))
+    return restored
+
+
+def _paste_back(helper, state, restored_faces):
+    """Restaura o estado do face_helper de uma imagem e cola as faces restauradas nela"""
+    helper.clean_all()
+    for attr, value in state.items():
+        setattr(helper, attr, value)
+    for restored_face in restored_faces:
+        helper.add_restored_face(restored_face)
+    helper.get_inverse_affine(None)
+    return helper.paste_faces_to_input_image(upsample_img=None)
+
+
+def _enhance_batch_gfpgan(enhancer, frames, weight=0.5):
+    """
+    Mesmo processamento do GFPGANer.enhance, mas com as faces de todos os frames do lote
+    passando juntas pela rede (um forward por lote em vez de um por face).
+    Detecção, alinhamento e colagem continuam por frame, com o estado do face_helper
+    guardado entre as etapas.
+    """
+    helper = enhancer.face_helper
+    states = []
+    faces = []
+    for frame in frames:
+        helper.clean_all()
+        helper.read_image(frame)
+        helper.get_face_landmarks_5(only_center_face=False, eye_dist_threshold=5)
+        helper.align_warp_face()
+        states.append(_capture_helper_state(helper))
+        faces.extend(helper.cropped_faces)
+
+    restored = _restore_faces(enhancer, faces, len(frames), weight) if faces else []
+
+    results = []
+    face_index = 0
+    for frame, state in zip(frames, states):
+        face_count = len(state["cropped_faces"])
+        if not face_count:
+            # Sem faces: o GFPGAN devolveria o próprio frame
+            results.append(frame)
+            continue
+        restored_img = _paste_back(helper, state, restored[face_index:face_index + face_count])
+        face_index += face_count
+        results.append(restored_img if restored_img is not None else frame)
+    return results
+
+
+def detect_face_landmarks(enhancer, frame):
+    """Pontos de referência (5x2, coordenadas do frame) de todas as faces do frame BGR"""
+    helper = enhancer.face_helper
+    helper.clean_all()
+    helper.read_image(frame)
+    helper.get_face_landmarks_5(only_center_face=False, eye_dist_threshold=5)
+    # Algumas versões do face_helper ampliam imagens pequenas em read_image
+    scale = frame.shape[1] / helper.input_img.shape[1]
+    return [np.asarray(landmarks, dtype=np.float32).reshape(5, 2) * scale for landmarks in helper.all_landmarks_5]
+
+
+def _enhance_tracked_gfpgan(enhancer, items, weight=0.5):
+    """
+    Modo "tracked": items = [(frame, tracker, índice)]. Faces vindas do FaceTracker
+    (detecção a cada N frames, fluxo óptico entre elas); cada face é alinhada, restaurada
+    (todas do lote em um forward) e colada só dentro do seu recorte.
+    """
+    helper = enhancer.face_helper
+    plans = []  # por frame: [(recorte, estado do helper)]
+    faces = []
+    for frame, tracker, index in items:
+        tracked = tracker.update(frame, index, lambda image: detect_face_landmarks(enhancer, image))
+        plan = []
+        for landmarks in tracked:
+            x0, y0, x1, y1 = face_roi(landmarks, frame.shape)
+            if x1 - x0 < 2 or y1 - y0 < 2:
+                continue
+            helper.clean_all()
+            # Recorte direto (sem read_image, que pode redimensionar a imagem)
+            helper.input_img = np.ascontiguousarray(frame[y0:y1, x0:x1])
+            if hasattr(helper, "is_gray"):
+                helper.is_gray = False
+            helper.all_landmarks_5 = [landmarks - np.array([x0, y0], dtype=np.float32)]
+            helper.align_warp_face()
+            plan.append(((x0, y0, x1, y1), _capture_helper_state(helper)))
+            faces.extend(helper.cropped_faces)
+        plans.append(plan)
+
+    restored = _restore_faces(enhancer, faces, len(items), weight) if faces else []
+
+    results = []
+    face_index = 0
+    for (frame, _, _), plan in zip(items, plans):
+        if not plan:
+            # Sem faces: nada passa pela rede
+            results.append(frame)
+            continue
+        result = frame.copy()
+        for (x0, y0, x1, y1), state in plan:
+            count = len(state["cropped_faces"])
+            # Colar sobre o resultado parcial (faces com recortes sobrepostos)
+            state["input_img"] = np.ascontiguousarray(result[y0:y1, x0:x1])
+            patch = _paste_back(helper, state, restored[face_index:face_index + count])
+            face_index += count
+            if patch is not None and patch.shape[:2] == (y1 - y0, x1 - x0):
+                result[y0:y1, x0:x1] = patch
+        results.append(result)
+    return results
+
+
+def enhance_batch(frames, trackers=None, indices=None, no_faces=None):
+    """
+    Melhora uma lista de frames BGR de uma vez.
+    trackers/indices: por frame, FaceTracker e posição no vídeo (modo "tracked"), ou None
+    (GFPGAN completo no frame).
+    no_faces: lista opcional preenchida por frame com True quando o frame não tinha faces (o
+    resultado é o próprio frame); False se restaurado, se falhou ou no caminho frame a frame. Se o caminho em lote falhar, processa frame a frame: de vez
+    quando a falha é de compatibilidade (INCOMPATIBLE_ERRORS, versão diferente do
+    gfpgan/facexlib), só neste lote nos outros casos (ex.: falta de memória na GPU).
+    """
+    global BATCH_SUPPORTED, TRACKING_SUPPORTED
+    if no_faces is not None:
+        no_faces[:] = [False] * len(frames)
+    enhancer = get_enhancer()
+    if enhancer is None:
+        return list(frames)
+
+    trackers = trackers or [None] * len(frames)
+    indices = indices or [None] * len(frames)
+    results = list(frames)
+
+    tracked = [i for i, tracker in enumerate(trackers) if tracker is not None] if TRACKING_SUPPORTED else []
+    if tracked:
+        try:
+            items = [(frames[i], trackers[i], indices[i]) for i in tracked]
+            for i, result in zip(tracked, _enhance_tracked_gfpgan(enhancer, items, weight=0.5)):
+                results[i] = result
+                if no_faces is not None:
+                    no_faces[i] = result is frames[i]
+        except INCOMPATIBLE_ERRORS as e:
+            TRACKING_SUPPORTED = False
+            tracked = []
+            print(f"{NAME}: Enhancement com rastreamento indisponível ({e}), usando o GFPGAN completo")
+        except Exception as e:
+            tracked = []
+            print(f"{NAME}: Falha no lote com rastreamento ({e}), usando o GFPGAN completo neste lote")
+
+    full = [i for i in range(len(frames)) if i not in set(tracked)]
+    if BATCH_SUPPORTED and full:
+        try:
+            for i, result in zip(full, _enhance_batch_gfpgan(enhancer, [frames[i] for i in full])):
+                results[i] = result
+                if no_faces is not None:
+                    no_faces[i] = result is frames[i]
+            return results
+        except INCOMPATIBLE_ERRORS as e:
+            BATCH_SUPPORTED = False
+            print(f"{NAME}: Enhancement em lote indisponível ({e}), processando frame a frame")
+        except Exception as e:
+            print(f"{NAME}: Falha no lote ({e}), processando este lote frame a frame")
+    for i in full:
+        results[i] = _enhance_single(enhancer, frames[i])
+    return results
+
+
+class EnhancementFuture(Future):
+    """Future de um frame do EnhancementWorker; no_faces=True se o frame não tinha faces"""
+    no_faces = False
+
+
+class EnhancementWorker:
+    """
+    Thread única de inferência alimentada por uma fila limitada.
+    Junta até batch_size frames (esperando no máximo BATCH_TIMEOUT) e roda o lote de uma vez.
+    Fila cheia bloqueia quem envia: o render não passa muito à frente do enhancement.
+    """
+
+    def __init__(self, batch_size, max_pending=None):
+        self.batch_size = max(1, int(batch_size))
+        self.queue = queue.Queue(maxsize=max_pending or self.batch_size * 2)
+        self.thread = threading.Thread(target=self._run, name="EnhancementWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, tracker=None, index=None):
+        """
+        Enfileira um frame BGR; devolve um EnhancementFuture com o frame melhorado.
+        tracker/index: FaceTracker do job e posição do frame (modo "tracked")
+        """
+        future = EnhancementFuture()
+        self.queue.put((frame, tracker, index, future))
+        return future
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + BATCH_TIMEOUT
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Frames cancelados (render reposicionado) saem do lote antes da inferência
+        return [item for item in batch if item[3].set_running_or_notify_cancel()]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            frames = [item[0] for item in batch]
+            no_faces = []
+            try:
+                results = enhance_batch(frames, [item[1] for item in batch], [item[2] for item in batch], no_faces)
+            except Exception as e:
+                print(f"{NAME}: Erro no worker de enhancement: {e}")
+                results = frames
+                no_faces = [False] * len(frames)
+            for item, result, empty in zip(batch, results, no_faces):
+                item[3].no_faces = empty
+                item[3].set_result(result)
+
+
+def get_batch_size() -> int:
+    """Frames por lote de inferência ("enhancement_batch_size")"""
+    return max(1, int(global_config.get("enhancement_batch_size") or 1))
+
+
+def create_tracker():
+    """FaceTracker para um fluxo de frames, ou None no modo "full" ("enhancement_mode")"""
+    if global_config.get("enhancement_mode") != "tracked":
+        return None
+    return FaceTracker(global_config.get("enhancement_detect_interval") or 1)
+
+
+def result_tag() -> str:
+    """Identifica o modelo e o modo do enhancement (frames com a mesma tag são intercambiáveis no cachê)"""
+    backend = get_face_backend()
+    model = os.path.splitext(os.path.basename(MODEL_PATH))[0]
+    if backend is not None and backend.name != "torch":
+        model = f"{model}_{backend.name}"
+    if global_config.get("enhancement_mode") == "tracked":
+        return f"{model}_tracked{global_config.get('enhancement_detect_interval') or 1}"
+    return f"{model}_full"
+
+
+def get_worker() -> EnhancementWorker:
+    """Worker de inferência do processo (criado na primeira chamada)"""
+    global ENHANCEMENT_WORKER
+    with WORKER_LOCK:
+        if ENHANCEMENT_WORKER is None:
+            ENHANCEMENT_WORKER = EnhancementWorker(get_batch_size())
+        return ENHANCEMENT_WORKER
+
+
 def reset_enhancer():
     """
     Reseta o enhancer global (útil para trocar de dispositivo).
     """
-    global FACE_ENHANCER
+    global FACE_ENHANCER, FACE_BACKEND, DEVICE_TYPE, WARMUP_THREAD, WARMUP_STATUS
+    if WARMUP_THREAD is not None:
+        # Não descartar um carregamento em andamento
+        ENHANCER_READY.wait()
     with THREAD_LOCK:
         FACE_ENHANCER = None
+        FACE_BACKEND = None
+        DEVICE_TYPE = None
+        WARMUP_THREAD = None
+        WARMUP_STATUS = "idle"
+        ENHANCER_READY.clear()
     print(f"{NAME}: Enhancer resetado")
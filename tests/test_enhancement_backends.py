@@ -0,0 +1,165 @@
+"""
+Backends da rede de restauração: conversão faces <-> lote igual à do GFPGANer (basicsr) e
+paridade do modelo ONNX exportado com o PyTorch, com uma e com várias faces por lote.
+"""
+import numpy as np
+import pytest
+
+from modules import video_enhancement
+from modules.video_enhancement import batch_to_faces, faces_to_batch
+
+
+def random_faces(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (512, 512, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def test_faces_to_batch_matches_basicsr():
+    pytest.importorskip("torch")
+    basicsr_utils = pytest.importorskip("basicsr.utils")
+    from torchvision.transforms.functional import normalize
+
+    faces = random_faces(2)
+    expected = []
+    for face in faces:
+        tensor = basicsr_utils.img2tensor(face / 255., bgr2rgb=True, float32=True)
+        normalize(tensor, (0.5, 0.5, 0.5), (0.5, 0.5, 0.5), inplace=True)
+        expected.append(tensor.numpy())
+
+    np.testing.assert_allclose(faces_to_batch(faces), np.stack(expected), atol=1e-6)
+
+
+def test_batch_to_faces_matches_basicsr():
+    torch = pytest.importorskip("torch")
+    basicsr_utils = pytest.importorskip("basicsr.utils")
+
+    output = np.random.default_rng(1).uniform(-1.2, 1.2, (2, 3, 512, 512)).astype(np.float32)
+    expected = [basicsr_utils.tensor2img(torch.from_numpy(face), rgb2bgr=True, min_max=(-1, 1)) for face in output]
+
+    for face, reference in zip(batch_to_faces(output), expected):
+        assert face.dtype == np.uint8
+        # tensor2img arredonda em float32 e o numpy em float32 também: no máximo 1 nível
+        assert np.abs(face.astype(np.int16) - reference).max() <= 1
+
+
+def test_round_trip_keeps_faces():
+    faces = random_faces(3)
+    for face, restored in zip(faces, batch_to_faces(faces_to_batch(faces))):
+        np.testing.assert_array_equal(face, restored)
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    """Rede GFPGANv1Clean (estreita, pesos aleatórios) e o modelo ONNX exportado dela"""
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    arch = pytest.importorskip("gfpgan.archs.gfpganv1_clean_arch")
+    from modules.enhancement_export import export_network
+
+    torch.manual_seed(0)
+    net = arch.GFPGANv1Clean(
+        out_size=512, num_style_feat=512, channel_multiplier=2, decoder_load_path=None,
+        fix_decoder=False, num_mlp=8, input_is_latent=True, different_w=True, narrow=0.25, sft_half=True,
+    ).eval()
+    path = str(tmp_path_factory.mktemp("onnx") / "gfpgan.onnx")
+    export_network(net, path)
+
+    class Enhancer:
+        gfpgan = net
+        device = "cpu"
+
+    return Enhancer(), path
+
+
+@pytest.mark.parametrize("faces", [1, 3])
+def test_onnx_matches_torch(exported, faces):
+    enhancer, path = exported
+    batch = faces_to_batch(random_faces(faces, seed=faces))
+
+    reference = video_enhancement.TorchFaceBackend(enhancer).restore(batch, randomize_noise=False)
+    output = video_enhancement.OnnxFaceBackend(path).restore(batch)
+
+    assert output.shape == reference.shape
+    np.testing.assert_allclose(output, reference, atol=1e-3)
+
+
+def test_failed_onnx_backend_falls_back_to_torch(monkeypatch, capsys):
+    class Broken:
+        name = "onnx"
+
+        def restore(self, batch, weight=0.5):
+            raise RuntimeError("sessão quebrada")
+
+    class Identity(video_enhancement.TorchFaceBackend):
+        def restore(self, batch, weight=0.5, randomize_noise=True):
+            return batch
+
+    broken = Broken()
+    monkeypatch.setattr(video_enhancement, "FACE_BACKEND", broken)
+    monkeypatch.setattr(video_enhancement, "_get_backend", lambda enhancer: video_enhancement.FACE_BACKEND)
+    monkeypatch.setattr(video_enhancement, "TorchFaceBackend", Identity)
+
+    faces = random_faces(2)
+    for _ in range(2):
+        restored = video_enhancement._restore_faces(object(), faces, batch_size=1)
+        assert all(np.array_equal(a, b) for a, b in zip(faces, restored))
+
+    assert isinstance(video_enhancement.FACE_BACKEND, Identity)
+    assert capsys.readouterr().out.count("usando torch") == 1
+
+
+def test_torch_backend_failures_are_raised(monkeypatch):
+    class Broken(video_enhancement.TorchFaceBackend):
+        def restore(self, batch, weight=0.5, randomize_noise=True):
+            raise RuntimeError("sem memória")
+
+    monkeypatch.setattr(video_enhancement, "_get_backend", lambda enhancer: Broken(None))
+    with pytest.raises(RuntimeError):
+        video_enhancement._restore_faces(object(), random_faces(1), batch_size=1)
+
+
+@pytest.mark.parametrize("error, disabled", [(RuntimeError("CUDA out of memory"), False), (AttributeError("face_helper"), True)])
+def test_batch_path_is_disabled_only_by_incompatibility(monkeypatch, error, disabled):
+    def broken_batch(enhancer, frames, weight=0.5):
+        raise error
+
+    monkeypatch.setattr(video_enhancement, "BATCH_SUPPORTED", True)
+    monkeypatch.setattr(video_enhancement, "get_enhancer", lambda: object())
+    monkeypatch.setattr(video_enhancement, "_enhance_batch_gfpgan", broken_batch)
+    monkeypatch.setattr(video_enhancement, "_enhance_single", lambda enhancer, frame: frame + 1)
+
+    frames = random_faces(2)
+    results = video_enhancement.enhance_batch(frames)
+
+    assert all(np.array_equal(result, frame + 1) for result, frame in zip(results, frames))
+    assert video_enhancement.BATCH_SUPPORTED is not disabled
+
+
+@pytest.mark.parametrize("error, disabled", [(RuntimeError("CUDA out of memory"), False), (TypeError("align_warp_face"), True)])
+def test_tracking_is_disabled_only_by_incompatibility(monkeypatch, error, disabled):
+    def broken_tracked(enhancer, items, weight=0.5):
+        raise error
+
+    monkeypatch.setattr(video_enhancement, "TRACKING_SUPPORTED", True)
+    monkeypatch.setattr(video_enhancement, "get_enhancer", lambda: object())
+    monkeypatch.setattr(video_enhancement, "_enhance_tracked_gfpgan", broken_tracked)
+    monkeypatch.setattr(video_enhancement, "_enhance_single", lambda enhancer, frame: frame + 1)
+
+    frames = random_faces(1)
+    results = video_enhancement.enhance_batch(frames, trackers=[object()], indices=[0])
+
+    np.testing.assert_array_equal(results[0], frames[0] + 1)
+    assert video_enhancement.TRACKING_SUPPORTED is not disabled
+
+
+def test_enhance_batch_reports_frames_without_faces(monkeypatch):
+    frames = random_faces(2)
+    monkeypatch.setattr(video_enhancement, "BATCH_SUPPORTED", True)
+    monkeypatch.setattr(video_enhancement, "get_enhancer", lambda: object())
+    # Primeiro frame sem faces (devolvido como veio), segundo restaurado
+    monkeypatch.setattr(video_enhancement, "_enhance_batch_gfpgan", lambda enhancer, batch, weight=0.5: [batch[0], batch[1] + 1])
+
+    no_faces = []
+    video_enhancement.enhance_batch(frames, no_faces=no_faces)
+    assert no_faces == [True, False]
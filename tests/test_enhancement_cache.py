@@ -0,0 +1,142 @@
+"""
+Cachê em disco dos frames melhorados: limpeza sem tocar nos jobs em andamento, gravação
+com fila limitada e frames sem face restaurada fora do cachê.
+"""
+import gc
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from modules.config_global import DEFAULT_SETTINGS, global_config
+from modules import video_enhancement
+from modules.enhancement_cache import NO_FACES, EnhancementCache, prune_cache
+from modules.enhancement_stage import EnhancedFrameStream
+from modules.frame_stream import SourceFrameStream
+from modules.video_enhancement import EnhancementFuture
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    folder = tmp_path / "cache"
+    settings = {"enhancement_cache": True, "enhancement_cache_dir": str(folder), "enhancement_cache_gb": 1}
+    monkeypatch.setattr(global_config, "settings", {**global_config.settings, **settings})
+    monkeypatch.setattr(EnhancementCache, "_bytes", 0)
+    return folder
+
+
+def make_source(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def fill(cache, size):
+    with open(os.path.join(cache.folder, "0000000.png"), "wb") as f:
+        f.write(b"\0" * size)
+
+
+def wait_writes():
+    EnhancementCache._writer.submit(lambda: None).result()
+
+
+def test_prune_skips_active_sources(tmp_path, cache_dir):
+    old = EnhancementCache(make_source(tmp_path, "old.mp4", b"old"), (8, 8), "tag")
+    fill(old, 100)
+    os.utime(old.source_dir, (1, 1))
+    new = EnhancementCache(make_source(tmp_path, "new.mp4", b"new"), (8, 8), "tag")
+    fill(new, 100)
+
+    # A fonte mais antiga está em uso: a limpeza remove a outra
+    prune_cache(max_bytes=150, exclude={old.source_dir})
+    assert os.path.isdir(old.source_dir)
+    assert not os.path.isdir(new.source_dir)
+
+
+def test_active_sources_released_with_the_job(tmp_path, cache_dir):
+    cache = EnhancementCache(make_source(tmp_path, "a.mp4", b"a"), (8, 8), "tag")
+    source_dir = cache.source_dir
+    assert source_dir in EnhancementCache.active_sources()
+
+    del cache
+    gc.collect()
+    assert source_dir not in EnhancementCache.active_sources()
+
+
+def test_store_blocks_when_writes_are_pending(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setattr(EnhancementCache, "_pending_writes", threading.BoundedSemaphore(2))
+    cache = EnhancementCache(make_source(tmp_path, "a.mp4", b"a"), (8, 8), "tag")
+    gate = threading.Event()
+    EnhancementCache._writer.submit(gate.wait)
+
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    cache.store(0, frame)
+    cache.store(1, frame)
+    third = threading.Thread(target=cache.store, args=(2, frame), daemon=True)
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+
+    gate.set()
+    third.join(5)
+    assert not third.is_alive()
+    wait_writes()
+    assert all(cache.load(index) is not None for index in range(3))
+
+
+def finished(result, no_faces=False):
+    future = EnhancementFuture()
+    future.no_faces = no_faces
+    future.set_result(result)
+    return future
+
+
+def test_frames_without_faces_are_marked(tmp_path, cache_dir):
+    cache = EnhancementCache(make_source(tmp_path, "a.mp4", b"a"), (8, 8), "tag")
+    stream = EnhancedFrameStream.__new__(EnhancedFrameStream)
+    stream.cache = cache
+    submitted = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    stream._store(0, submitted, finished(submitted, no_faces=True))
+    # O próprio frame sem no_faces: a inferência falhou
+    stream._store(1, submitted, finished(submitted))
+    stream._store(2, submitted, finished(submitted + 1))
+    wait_writes()
+
+    assert cache.load(0) is NO_FACES
+    assert os.path.getsize(cache._path(0, "noface")) == 0
+    assert cache.load(1) is None
+    assert cache.load(2) is not None
+
+
+def test_marked_frames_skip_the_worker(tmp_path, cache_dir, monkeypatch):
+    cache = EnhancementCache(make_source(tmp_path, "a.mp4", b"a"), (4, 2), "tag")
+    cache.store_no_faces(0)
+    wait_writes()
+
+    source = np.arange(2 * 4 * 3, dtype=np.uint8).reshape(2, 4, 3)
+
+    class Clip:
+        duration = 1.0
+
+        def get_frame(self, t):
+            return source
+
+    monkeypatch.setattr(video_enhancement, "get_worker", lambda: pytest.fail("frame sem faces foi ao worker"))
+    stream = EnhancedFrameStream(SourceFrameStream(Clip()), 1, (4, 2), lookahead=1, cache=cache)
+    np.testing.assert_array_equal(stream.get(0.0), source)
+
+
+def test_store_stops_at_the_size_limit(tmp_path, cache_dir, monkeypatch):
+    cache = EnhancementCache(make_source(tmp_path, "a.mp4", b"a"), (8, 8), "tag")
+    monkeypatch.setattr(EnhancementCache, "_bytes", 2 * 1024 ** 3)
+    monkeypatch.setattr(EnhancementCache, "_full_warned", False)
+
+    cache.store(0, np.zeros((8, 8, 3), dtype=np.uint8))
+    wait_writes()
+    assert cache.load(0) is None
+
+
+def test_cache_is_off_by_default():
+    assert DEFAULT_SETTINGS["enhancement_cache"] is False
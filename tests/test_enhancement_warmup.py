@@ -0,0 +1,95 @@
+"""
+Aquecimento do GFPGAN em segundo plano: o carregamento termina (sem esperar por si mesmo),
+quem espera segue mesmo com falha, e a falha não impede uma nova tentativa.
+"""
+import threading
+
+import pytest
+
+from modules import video_enhancement
+
+
+class FakeEnhancer:
+    device = "cpu"
+
+
+class IdentityBackend:
+    name = "torch"
+    calls = 0
+
+    def __init__(self, enhancer):
+        self.enhancer = enhancer
+
+    def restore(self, batch, weight=0.5, randomize_noise=True):
+        IdentityBackend.calls += 1
+        return batch
+
+
+@pytest.fixture
+def warmup_state(monkeypatch):
+    monkeypatch.setattr(video_enhancement, "FACE_ENHANCER", None)
+    monkeypatch.setattr(video_enhancement, "FACE_BACKEND", None)
+    monkeypatch.setattr(video_enhancement, "DEVICE_TYPE", None)
+    monkeypatch.setattr(video_enhancement, "WARMUP_THREAD", None)
+    monkeypatch.setattr(video_enhancement, "WARMUP_STATUS", "idle")
+    monkeypatch.setattr(video_enhancement, "WARMUP_FAILED_AT", None)
+    monkeypatch.setattr(video_enhancement, "ENHANCER_READY", threading.Event())
+    # A inferência inicial do aquecimento roda de verdade (_restore_faces/_get_backend),
+    # só a rede é trocada por uma identidade
+    monkeypatch.setattr(video_enhancement, "TorchFaceBackend", IdentityBackend)
+    IdentityBackend.calls = 0
+
+
+def test_successful_warmup_reaches_ready(warmup_state, monkeypatch):
+    enhancer = FakeEnhancer()
+    monkeypatch.setattr(video_enhancement, "_load_enhancer", lambda device_type: enhancer)
+
+    ready = video_enhancement.warmup_async('cpu')
+    assert ready.wait(5)
+    assert video_enhancement.get_warmup_status() == "ready"
+    assert IdentityBackend.calls == 1
+    video_enhancement.WARMUP_THREAD.join(5)
+    assert not video_enhancement.WARMUP_THREAD.is_alive()
+
+    assert video_enhancement.get_enhancer() is enhancer
+
+
+def test_failed_warmup_is_retried(warmup_state, monkeypatch):
+    attempts = []
+    gate = threading.Event()
+
+    def load(device_type):
+        attempts.append(device_type)
+        gate.wait(5)
+        return None if len(attempts) == 1 else FakeEnhancer()
+
+    monkeypatch.setattr(video_enhancement, "_load_enhancer", load)
+    monkeypatch.setattr(video_enhancement, "WARMUP_RETRY_SECONDS", 0)
+
+    # Quem estava esperando o carregamento que falhou recebe None
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(video_enhancement.get_enhancer('cpu')))
+    waiter.start()
+    gate.set()
+    waiter.join(5)
+    assert results == [None]
+    assert video_enhancement.get_warmup_status() == "unavailable"
+
+    assert isinstance(video_enhancement.get_enhancer('cpu'), FakeEnhancer)
+    assert video_enhancement.get_warmup_status() == "ready"
+    assert len(attempts) == 2
+
+
+def test_failed_warmup_waits_before_retrying(warmup_state, monkeypatch):
+    attempts = []
+
+    def load(device_type):
+        attempts.append(device_type)
+        return None
+
+    monkeypatch.setattr(video_enhancement, "_load_enhancer", load)
+    monkeypatch.setattr(video_enhancement, "WARMUP_RETRY_SECONDS", 3600)
+
+    assert video_enhancement.get_enhancer('cpu') is None
+    assert video_enhancement.get_enhancer('cpu') is None
+    assert len(attempts) == 1
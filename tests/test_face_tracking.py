@@ -0,0 +1,115 @@
+"""
+Modo "tracked" do enhancement: rastreamento dos pontos de referência e colagem das faces
+restauradas com a API real do face_helper (facexlib).
+"""
+import numpy as np
+import pytest
+import cv2
+
+from modules import video_enhancement
+from modules.face_tracking import FaceTracker, face_roi
+
+
+def textured_frame(width=400, height=400, seed=0):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    return cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+
+
+def face_landmarks(shift=(0.0, 0.0)):
+    """5 pontos (olhos, nariz, cantos da boca) de uma face ~100 px em um frame 400x400"""
+    points = np.array([[170, 170], [230, 170], [200, 205], [176, 240], [224, 240]], dtype=np.float32)
+    return points + np.array(shift, dtype=np.float32)
+
+
+def test_tracker_follows_translation_between_detections():
+    detections = []
+
+    def detect(frame):
+        detections.append(frame)
+        return [face_landmarks()]
+
+    tracker = FaceTracker(detect_interval=3)
+    frame = textured_frame()
+    tracker.update(frame, 0, detect)
+    moved = np.roll(frame, shift=(2, 3), axis=(0, 1))
+    faces = tracker.update(moved, 1, detect)
+
+    assert len(detections) == 1
+    np.testing.assert_allclose(faces[0], face_landmarks((3, 2)), atol=0.5)
+
+    tracker.update(moved, 2, detect)
+    tracker.update(moved, 3, detect)  # intervalo de detecção atingido
+    tracker.update(moved, 10, detect)  # salto no índice
+    assert len(detections) == 3
+
+
+def test_face_roi_is_clipped_to_frame():
+    x0, y0, x1, y1 = face_roi(face_landmarks((-180, -180)), (400, 400, 3))
+    assert (x0, y0) == (0, 0)
+    assert 0 < x1 <= 400 and 0 < y1 <= 400
+
+
+@pytest.fixture
+def face_helper(monkeypatch):
+    """
+    FaceRestoreHelper real do facexlib, sem os pesos do detector e do parsing (o modo tracked
+    fornece os pontos, e sem use_parse a colagem usa a máscara quadrada)
+    """
+    restoration_helper = pytest.importorskip("facexlib.utils.face_restoration_helper")
+    monkeypatch.setattr(restoration_helper, "init_detection_model", lambda *args, **kwargs: None)
+    monkeypatch.setattr(restoration_helper, "init_parsing_model", lambda *args, **kwargs: None)
+    return restoration_helper.FaceRestoreHelper(
+        1, face_size=512, crop_ratio=(1, 1), det_model="retinaface_resnet50",
+        save_ext="png", use_parse=False, device="cpu"
+    )
+
+
+def align(helper, frame, landmarks):
+    helper.clean_all()
+    helper.input_img = frame
+    helper.all_landmarks_5 = [landmarks]
+    helper.align_warp_face()
+    return video_enhancement._capture_helper_state(helper)
+
+
+def test_paste_back_uses_saved_helper_state(face_helper):
+    frame = textured_frame()
+    state = align(face_helper, frame, face_landmarks())
+    assert len(state["affine_matrices"]) == 1
+    assert state["cropped_faces"][0].shape == (512, 512, 3)
+
+    # Outro frame passa pelo helper entre o alinhamento e a colagem (como no lote)
+    align(face_helper, textured_frame(seed=1), face_landmarks((40, -30)))
+
+    restored = [255 - state["cropped_faces"][0]]
+    result = video_enhancement._paste_back(face_helper, state, restored)
+
+    assert result.shape == frame.shape
+    # A face colada troca o centro da face e não toca o canto do frame
+    assert np.abs(result[200:210, 195:205].astype(int) - frame[200:210, 195:205]).mean() > 50
+    np.testing.assert_array_equal(result[:20, :20], frame[:20, :20])
+
+
+def test_tracked_enhancement_only_changes_face_roi(face_helper, monkeypatch):
+    class InvertBackend:
+        name = "invert"
+
+        def restore(self, batch, weight=0.5):
+            return -batch
+
+    class FixedTracker:
+        def update(self, frame, index, detect):
+            return [face_landmarks()]
+
+    monkeypatch.setattr(video_enhancement, "_get_backend", lambda enhancer: InvertBackend())
+    enhancer = type("Enhancer", (), {"face_helper": face_helper})()
+    frame = textured_frame()
+
+    result = video_enhancement._enhance_tracked_gfpgan(enhancer, [(frame, FixedTracker(), 0)])[0]
+
+    x0, y0, x1, y1 = face_roi(face_landmarks(), frame.shape)
+    outside = np.ones(frame.shape[:2], dtype=bool)
+    outside[y0:y1, x0:x1] = False
+    np.testing.assert_array_equal(result[outside], frame[outside])
+    assert np.abs(result[200:210, 195:205].astype(int) - frame[200:210, 195:205]).mean() > 50
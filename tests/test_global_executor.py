@@ -0,0 +1,94 @@
+"""
+Agendamento adaptativo: com a fila vazia, os núcleos de um job que termina vão para os jobs
+em andamento que ainda não abriram o encoder.
+"""
+import threading
+
+import pytest
+
+from modules import global_executor as executor_module
+from modules import video_editor
+from modules.config_global import global_config
+from modules.global_executor import AdaptiveScheduler, GlobalRenderExecutor, RenderJob, claim_job_threads
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(global_config, "settings", {**global_config.settings, "adaptive_scheduling": True, "executor_mode": "thread"})
+    monkeypatch.setattr(GlobalRenderExecutor, "_instance", None)
+    monkeypatch.setattr(executor_module, "_THREAD_GRANTS", None)
+    instance = GlobalRenderExecutor()
+    instance._scheduler = AdaptiveScheduler(cores=4)
+    # Clipes curtos (mínimo de 1 thread), sem abrir arquivos
+    monkeypatch.setattr(instance._scheduler, "probe", lambda path: (640, 360, 5.0))
+    monkeypatch.setattr(instance._scheduler, "can_start", lambda *args: True)
+    yield instance
+    instance.shutdown()
+
+
+def test_rebalance_splits_free_cores():
+    scheduler = AdaptiveScheduler(cores=8)
+    assert scheduler.rebalance({1: 2, 2: 2}, used_threads=5) == {1: 2, 2: 1}
+    assert scheduler.rebalance({1: 2}, used_threads=8) == {}
+    assert scheduler.rebalance({}, used_threads=0) == {}
+
+
+def test_claim_outside_a_scheduled_job_keeps_threads():
+    assert claim_job_threads(3) == 3
+
+
+def test_freed_cores_go_to_jobs_that_have_not_claimed(executor, monkeypatch):
+    second_started = threading.Event()
+    first_done = threading.Event()
+    claimed = {}
+
+    def render_video(editor, video_path, *args, threads=None, **kwargs):
+        if video_path == "b.mp4":
+            second_started.set()
+            # Ainda preparando (fonte, áudio) quando o outro job termina
+            first_done.wait(5)
+        else:
+            second_started.wait(5)
+        claimed[video_path] = claim_job_threads(threads)
+        return True, video_path
+
+    monkeypatch.setattr(video_editor.VideoEditor, "render_video", render_video)
+
+    jobs = [(RenderJob(path, "out", "Blur", "#ffffff"), None) for path in ("a.mp4", "b.mp4")]
+    first, second = executor.submit_batch(jobs)
+    assert [job.threads for job, _ in jobs] == [2, 2]
+
+    assert first.result(5) == (True, "a.mp4")
+    first_done.set()
+    assert second.result(5) == (True, "b.mp4")
+
+    assert claimed == {"a.mp4": 2, "b.mp4": 4}
+    assert not executor._running_threads
+    assert sorted(executor._free_slots) == [0, 1, 2, 3]
+
+
+def test_claimed_jobs_are_not_rebalanced(executor, monkeypatch):
+    first_done = threading.Event()
+    second_claimed = threading.Event()
+    claimed = {}
+
+    def render_video(editor, video_path, *args, threads=None, **kwargs):
+        if video_path == "b.mp4":
+            claimed[video_path] = claim_job_threads(threads)
+            second_claimed.set()
+            first_done.wait(5)
+        else:
+            second_claimed.wait(5)
+            claimed[video_path] = claim_job_threads(threads)
+        return True, video_path
+
+    monkeypatch.setattr(video_editor.VideoEditor, "render_video", render_video)
+
+    jobs = [(RenderJob(path, "out", "Blur", "#ffffff"), None) for path in ("a.mp4", "b.mp4")]
+    first, second = executor.submit_batch(jobs)
+    first.result(5)
+    # O job B já fixou as threads: os núcleos de A ficam livres
+    assert executor._running_threads == {jobs[1][0].job_id: 2}
+    first_done.set()
+    second.result(5)
+    assert claimed == {"a.mp4": 2, "b.mp4": 2}
@@ -0,0 +1,51 @@
+"""
+Atlas de legendas de um job: sprites rasterizados antes do loop de frames, guardados no
+cachê compartilhado e dentro do seu orçamento.
+"""
+import pytest
+
+from modules.subiitels.cache_sprites import SpriteCache
+from modules.subiitels.gerenciador_emojis import GerenciadorEmojis
+from modules.subiitels.renderizador_legendas import RenderizadorLegendas
+
+
+def subtitle(text):
+    return {
+        "text": text, "font": "Arial", "size": 40, "color": "#ffffff", "border": "#000000",
+        "bg": "", "border_thickness": 2, "align": "center", "italic": False, "x": 540, "y": 960,
+    }
+
+
+@pytest.fixture
+def renderer():
+    renderer = RenderizadorLegendas(GerenciadorEmojis())
+    renderer.cache = SpriteCache(64 * 1024 ** 2)
+    return renderer
+
+
+def test_atlas_sprites_live_in_the_shared_cache(renderer):
+    subs = [subtitle("um"), subtitle("dois"), subtitle("um")]
+    atlas = renderer.build_atlas(subs, 1.0)
+
+    assert len(atlas) == 2
+    assert len(renderer.cache) == 2
+    key = renderer._get_cache_key(subs[0], 1.0, 1.0)
+    assert key in atlas
+    assert atlas.get(key) is renderer.cache.get(key)
+
+
+def test_atlas_respects_the_cache_budget(renderer):
+    subs = [subtitle(f"legenda {index}") for index in range(30)]
+    one_sprite = RenderizadorLegendas(renderer.gerenciador_emojis)
+    one_sprite.cache = SpriteCache(64 * 1024 ** 2)
+    one_sprite.build_atlas(subs[:1], 1.0)
+    renderer.cache.resize(one_sprite.cache.current_bytes * 5)
+
+    atlas = renderer.build_atlas(subs, 1.0)
+
+    assert len(atlas) == 30
+    assert renderer.cache.current_bytes <= renderer.cache.max_bytes
+    assert len(renderer.cache) < 30
+    # Sprite descartado pelo LRU: rasterizado de novo no uso
+    sprite, _ = renderer.get_subtitle_sprite(subs[0])
+    assert sprite.width > 0
@@ -0,0 +1,27 @@
+"""
+Cachê de sprites: o orçamento "sprite_cache_mb" é relido sem reiniciar o processo.
+"""
+import numpy as np
+from PIL import Image
+
+from modules.config_global import global_config
+from modules.subiitels.cache_sprites import SpriteCache
+
+
+def sprite(mb):
+    side = int((mb * 1024 ** 2 / 4) ** 0.5)
+    return (Image.new("RGBA", (side, side)), 0, side, side, np.zeros(0, dtype=np.uint8))
+
+
+def test_apply_config_follows_the_setting(monkeypatch):
+    cache = SpriteCache(8 * 1024 ** 2)
+    for key in range(3):
+        cache.put(key, sprite(2))
+    assert len(cache) == 3
+
+    monkeypatch.setattr(global_config, "settings", {**global_config.settings, "sprite_cache_mb": 3})
+    cache.apply_config()
+
+    assert cache.max_bytes == 3 * 1024 ** 2
+    assert list(cache._entries) == [2]
+    assert cache.evictions == 2
@@ -3,6 +3,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import psutil
 from modules.config_global import global_config
+from modules.blur_engine import BLUR_QUALITY_LEVELS
 from ui.dialog_imagem_video import DialogImagemVideo
 from ui.componentes_custom import ToggleSwitch
 from ui.lotes import AbaLotes, GerenciadorFilas, PoolLotesUI
@@ -10,6 +11,31 @@ from ui.notifications import TabNotifications
 
 
 class DialogoConfiguracoes(tk.Toplevel):
+    # Backends de codificação disponíveis (valor salvo no JSON -> texto exibido)
+    ENCODER_BACKENDS = {
+        "moviepy": "MoviePy (padrão)",
+        "ffmpeg_pipe": "FFmpeg direto (pipe)",
+    }
+
+    # Motores de contorno das legendas (valor salvo no JSON -> texto exibido)
+    OUTLINE_METHODS = {
+        "dilate": "Clássico (rápido)",
+        "stroke": "Arredondado (FreeType)",
+        "legacy": "Antigo (lento)",
+    }
+
+    # Modos do enhancement GFPGAN (valor salvo no JSON -> texto exibido)
+    ENHANCEMENT_MODES = {
+        "full": "Frame inteiro (padrão)",
+        "tracked": "Só as faces (experimental)",
+    }
+
+    # Modos do executor global (valor salvo no JSON -> texto exibido)
+    EXECUTOR_MODES = {
+        "thread": "Threads (padrão)",
+        "process": "Processos (usa todos os núcleos)",
+    }
+
     def __init__(self, parent):
         super().__init__(parent)
         self.title("Configurações Globais")
@@ -112,6 +138,110 @@ class DialogoConfiguracoes(tk.Toplevel):
         ttk.Entry(jobs_row, textvariable=self.jobs_var, width=6, font=("Segoe UI", 10)).pack(side="left", padx=10)
         ttk.Label(jobs_row, text="(1-10)", font=("Segoe UI", 8), foreground="gray").pack(side="left")
         
+        # Agendamento automático
+        self.adaptive_var = tk.BooleanVar(value=global_config.get("adaptive_scheduling"))
+        adaptive_row = ttk.Frame(perf_frame)
+        adaptive_row.pack(anchor="w", pady=(0, 8), fill="x")
+        ToggleSwitch(adaptive_row, self.adaptive_var).pack(side="left", padx=(0, 10))
+        ttk.Label(adaptive_row, text="Ajustar jobs e threads automaticamente", font=("Segoe UI", 10)).pack(side="left")
+        
+        # Modo de execução
+        mode_row = ttk.Frame(perf_frame)
+        mode_row.pack(fill="x", pady=8)
+        ttk.Label(mode_row, text="Modo de Execução:", font=("Segoe UI", 10, "bold")).pack(side="left")
+        current_mode = global_config.get("executor_mode")
+        self.executor_mode_var = tk.StringVar(value=self.EXECUTOR_MODES.get(current_mode, self.EXECUTOR_MODES["thread"]))
+        ttk.Combobox(
+            mode_row,
+            textvariable=self.executor_mode_var,
+            values=list(self.EXECUTOR_MODES.values()),
+            state="readonly",
+            width=30,
+            font=("Segoe UI", 10)
+        ).pack(side="left", padx=10)
+        
+        # Qualidade do Blur
+        blur_row = ttk.Frame(perf_frame)
+        blur_row.pack(fill="x", pady=8)
+        ttk.Label(blur_row, text="Qualidade do Blur:", font=("Segoe UI", 10, "bold")).pack(side="left")
+        current_blur = global_config.get("blur_scale")
+        self.blur_quality_var = tk.StringVar(value=BLUR_QUALITY_LEVELS.get(current_blur, BLUR_QUALITY_LEVELS[0.25]))
+        ttk.Combobox(
+            blur_row,
+            textvariable=self.blur_quality_var,
+            values=list(BLUR_QUALITY_LEVELS.values()),
+            state="readonly",
+            width=24,
+            font=("Segoe UI", 10)
+        ).pack(side="left", padx=10)
+        ttk.Label(blur_row, text="(menor = mais rápido)", font=("Segoe UI", 8), foreground="gray").pack(side="left")
+        
+        # Encoder
+        encoder_row = ttk.Frame(perf_frame)
+        encoder_row.pack(fill="x", pady=8)
+        ttk.Label(encoder_row, text="Encoder:", font=("Segoe UI", 10, "bold")).pack(side="left")
+        current_encoder = global_config.get("encoder_backend")
+        self.encoder_var = tk.StringVar(value=self.ENCODER_BACKENDS.get(current_encoder, self.ENCODER_BACKENDS["moviepy"]))
+        ttk.Combobox(
+            encoder_row,
+            textvariable=self.encoder_var,
+            values=list(self.ENCODER_BACKENDS.values()),
+            state="readonly",
+            width=24,
+            font=("Segoe UI", 10)
+        ).pack(side="left", padx=10)
+        
+        # Contorno das legendas
+        outline_row = ttk.Frame(perf_frame)
+        outline_row.pack(fill="x", pady=8)
+        ttk.Label(outline_row, text="Contorno da Legenda:", font=("Segoe UI", 10, "bold")).pack(side="left")
+        current_outline = global_config.get("subtitle_outline")
+        self.outline_var = tk.StringVar(value=self.OUTLINE_METHODS.get(current_outline, self.OUTLINE_METHODS["dilate"]))
+        ttk.Combobox(
+            outline_row,
+            textvariable=self.outline_var,
+            values=list(self.OUTLINE_METHODS.values()),
+            state="readonly",
+            width=24,
+            font=("Segoe UI", 10)
+        ).pack(side="left", padx=10)
+        
+        # Modo do enhancement (GFPGAN)
+        enhancement_row = ttk.Frame(perf_frame)
+        enhancement_row.pack(fill="x", pady=8)
+        ttk.Label(enhancement_row, text="Enhancement:", font=("Segoe UI", 10, "bold")).pack(side="left")
+        current_enhancement = global_config.get("enhancement_mode")
+        self.enhancement_mode_var = tk.StringVar(value=self.ENHANCEMENT_MODES.get(current_enhancement, self.ENHANCEMENT_MODES["full"]))
+        ttk.Combobox(
+            enhancement_row,
+            textvariable=self.enhancement_mode_var,
+            values=list(self.ENHANCEMENT_MODES.values()),
+            state="readonly",
+            width=24,
+            font=("Segoe UI", 10)
+        ).pack(side="left", padx=10)
+        
+        # Cachê em disco dos frames melhorados
+        self.enhancement_cache_var = tk.BooleanVar(value=global_config.get("enhancement_cache"))
+        enhancement_cache_row = ttk.Frame(perf_frame)
+        enhancement_cache_row.pack(anchor="w", pady=(8, 0), fill="x")
+        ToggleSwitch(enhancement_cache_row, self.enhancement_cache_var).pack(side="left", padx=(0, 10))
+        ttk.Label(enhancement_cache_row, text="Reaproveitar frames melhorados da mesma fonte (cachê em disco)", font=("Segoe UI", 10)).pack(side="left")
+        
+        # Renderização segmentada (vídeos longos)
+        self.segment_parallel_var = tk.BooleanVar(value=global_config.get("segment_parallel"))
+        segment_row = ttk.Frame(perf_frame)
+        segment_row.pack(anchor="w", pady=(8, 0), fill="x")
+        ToggleSwitch(segment_row, self.segment_parallel_var).pack(side="left", padx=(0, 10))
+        ttk.Label(segment_row, text="Dividir vídeos longos em segmentos paralelos", font=("Segoe UI", 10)).pack(side="left")
+        
+        # Relatório de tempo por etapa
+        self.render_metrics_var = tk.BooleanVar(value=global_config.get("render_metrics"))
+        metrics_row = ttk.Frame(perf_frame)
+        metrics_row.pack(anchor="w", pady=(8, 0), fill="x")
+        ToggleSwitch(metrics_row, self.render_metrics_var).pack(side="left", padx=(0, 10))
+        ttk.Label(metrics_row, text="Salvar tempo de cada etapa (.metrics.json)", font=("Segoe UI", 10)).pack(side="left")
+        
         # --- Imagem para Vídeo ---
         image_frame = ttk.LabelFrame(container, text=" 🎬 Conversão Imagem → Vídeo ", padding=15)
         image_frame.pack(fill="x", pady=10)
@@ -146,9 +276,18 @@ class DialogoConfiguracoes(tk.Toplevel):
             jobs = int(self.jobs_var.get())
             duration = int(self.duration_var.get())
             
-            # Verificar se parallel_jobs mudou para resetar o pool
+            executor_mode = next(
+                (key for key, label in self.EXECUTOR_MODES.items() if label == self.executor_mode_var.get()),
+                "thread"
+            )
+            
+            # Verificar se parallel_jobs, o modo de execução ou o agendamento mudaram para resetar o pool
             old_jobs = global_config.get("parallel_jobs")
-            jobs_changed = (old_jobs != jobs)
+            jobs_changed = (
+                old_jobs != jobs
+                or global_config.get("executor_mode") != executor_mode
+                or global_config.get("adaptive_scheduling") != self.adaptive_var.get()
+            )
             
             # Obter configurações de notificação da aba
             notification_settings = self.tab_notifications.get_settings()
@@ -156,6 +295,31 @@ class DialogoConfiguracoes(tk.Toplevel):
             # Salvar configurações gerais
             global_config.set("num_threads", threads)
             global_config.set("parallel_jobs", jobs)
+            global_config.set("executor_mode", executor_mode)
+            global_config.set("adaptive_scheduling", self.adaptive_var.get())
+            encoder_backend = next(
+                (key for key, label in self.ENCODER_BACKENDS.items() if label == self.encoder_var.get()),
+                "moviepy"
+            )
+            global_config.set("encoder_backend", encoder_backend)
+            subtitle_outline = next(
+                (key for key, label in self.OUTLINE_METHODS.items() if label == self.outline_var.get()),
+                "dilate"
+            )
+            global_config.set("subtitle_outline", subtitle_outline)
+            enhancement_mode = next(
+                (key for key, label in self.ENHANCEMENT_MODES.items() if label == self.enhancement_mode_var.get()),
+                "full"
+            )
+            global_config.set("enhancement_mode", enhancement_mode)
+            global_config.set("enhancement_cache", self.enhancement_cache_var.get())
+            global_config.set("segment_parallel", self.segment_parallel_var.get())
+            global_config.set("render_metrics", self.render_metrics_var.get())
+            blur_scale = next(
+                (scale for scale, label in BLUR_QUALITY_LEVELS.items() if label == self.blur_quality_var.get()),
+                0.25
+            )
+            global_config.set("blur_scale", blur_scale)
             global_config.set("image_to_video_duration", duration)
             global_config.set("global_image_to_video_settings", self.global_image_var.get())
             
@@ -163,6 +327,10 @@ class DialogoConfiguracoes(tk.Toplevel):
             global_config.set("notification_sound_path", notification_settings["notification_sound_path"])
             global_config.set("notification_volume", notification_settings["notification_volume"])
             
+            # Orçamento do cachê de sprites ("sprite_cache_mb") vale já, sem reiniciar
+            from modules.subiitels.cache_sprites import sprite_cache
+            sprite_cache.apply_config()
+            
             # Resetar o executor global se parallel_jobs mudou
             if jobs_changed:
                 from modules.global_executor import global_executor
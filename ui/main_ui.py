@@ -8,6 +8,7 @@ from ui.subtitles import Subtitles
 from ui.audio import AudioSettings
 from ui.output import OutputVideo
 from modules.config_global import global_config
+from modules.text_formatter import TextFormatter
 from ui.footer import Footer
 from ui.marca_da_agua import WatermarkUI
 from ui.mesclagem_front import MesclagemFront
@@ -27,6 +28,8 @@ class EditorUI(tk.Tk):
         self.geometry("900x880")
         self.processar_pasta_var = tk.BooleanVar()
         self.tabs_data = []
+        # Fontes resolvidas (e ausentes avisadas) na abertura, fora do tempo do primeiro render
+        TextFormatter.discover_fonts()
 
         self.theme_manager = ThemeManager(self)
         self.global_tab_pool = MediaPoolManager() # Pool global para processamento de abas
@@ -8,6 +8,7 @@ from modules.process_pasta_var import FolderProcessor
 import threading
 import time
 from modules.notifier import Notifier
+from modules.render_metrics import load_summary
 
 class OutputVideo(ttk.LabelFrame):
     def __init__(self, parent, video_controls, video_borders, subtitle_manager, emoji_manager, audio_settings_ui, watermark_ui, mesclagem_ui, processar_pasta_var=None, editor_ui_ref=None):
@@ -185,7 +186,11 @@ class OutputVideo(ttk.LabelFrame):
         success, result = self.editor.render_video(input_path, output_folder, style, color, subtitles, emoji_manager, audio_settings)
         
         if success:
-            self.status_label.config(text=f"Concluído! Salvo em: {result}")
+            summary = load_summary(result)
+            if summary:
+                self.status_label.config(text=f"Concluído! Salvo em: {result} ({summary})")
+            else:
+                self.status_label.config(text=f"Concluído! Salvo em: {result}")
             messagebox.showinfo("Sucesso", f"Vídeo renderizado com sucesso!\nSalvo em: {result}")
         else:
             self.status_label.config(text=f"Erro: {result}")
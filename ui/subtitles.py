@@ -9,6 +9,7 @@ from PIL import Image, ImageTk, ImageDraw
 from modules.subiitels.renderizador_legendas import RenderizadorLegendas
 from modules.subiitels.calculo_posicao import canvas_para_video
 from modules.video_editor import VideoEditor
+from modules.subiitels.indice_temporal import SubtitleTimeline, timing_signature
 
 # Componentes de UI
 from ui.componente_emojis import ComponenteEmojis
@@ -37,6 +38,7 @@ class Subtitles(ttk.Frame):
         self.drag_offset_x = 0
         self.drag_offset_y = 0
         self.subtitle_bbox_cache = []
+        self._timelines = {}  # inclusive_end -> (assinatura dos tempos, SubtitleTimeline)
         
         # Estado de Drag-and-Drop para Marca d'Água
         self.dragging_watermark = False
@@ -388,10 +390,20 @@ class Subtitles(ttk.Frame):
             is_preview=True,
             emoji_scale=self.comp_emojis.emoji_scale.get(),
             current_time=self.video_controls.video_selector.current_time,
-            video_duration=video_duration
+            video_duration=video_duration,
+            subtitle_index=self._get_timeline(subtitles, video_duration)
         )
 
     # --- Lógica de Preview e Drag (Mantida aqui por ser o orquestrador do Canvas) ---
+    def _get_timeline(self, subtitles, video_duration=None, inclusive_end=False):
+        """Índice temporal das legendas, refeito só quando os tempos das legendas mudam"""
+        signature = timing_signature(subtitles, video_duration)
+        cached = self._timelines.get(inclusive_end)
+        if cached is None or cached[0] != signature:
+            cached = (signature, SubtitleTimeline(subtitles, video_duration, inclusive_end=inclusive_end))
+            self._timelines[inclusive_end] = cached
+        return cached[1]
+
     def update_preview(self):
         video_path = self.video_controls.video_selector.current_video_path
         if not video_path: return
@@ -473,18 +485,17 @@ class Subtitles(ttk.Frame):
             
             current_time = self.video_controls.video_selector.current_time
             
-            for idx, sub in enumerate(subtitles):
+            # SÓ desenha se estiver no tempo OU se for a selecionada (facilitando edição)
+            # Preview do editor: intervalo fechado [início, fim] e sem trocar o fim padrão pela duração
+            visible = set(self._get_timeline(subtitles, inclusive_end=True).active_indices(current_time))
+            visible.update(
+                idx for idx in (self.selected_subtitle_idx, self.dragging_subtitle_idx)
+                if idx is not None and 0 <= idx < len(subtitles)
+            )
+            
+            for idx in sorted(visible):
+                sub = subtitles[idx]
                 is_selected = (idx == self.selected_subtitle_idx or idx == self.dragging_subtitle_idx)
-                
-                # SÓ desenha se estiver no tempo OU se for a selecionada (facilitando edição)
-                start = sub.get("start_time", 0.0)
-                end = sub.get("end_time", 1000.0)
-                
-                if not is_selected and not (start <= current_time <= end):
-                    # Placeholder para o bbox cache se não for renderizado?
-                    # Na verdade, precisamos do bbox cache para detecção de clique.
-                    # Vamos adicionar apenas se renderizar.
-                    continue
 
                 self.renderer.draw_subtitle(draw, sub, scale_factor=scale, emoji_scale=self.comp_emojis.emoji_scale.get(), offset_x=offset_x, offset_y=offset_y)
                 bbox = self.renderer.get_subtitle_bbox(sub, scale_factor=scale, emoji_scale=self.comp_emojis.emoji_scale.get(), offset_x=offset_x, offset_y=offset_y)
@@ -492,8 +503,9 @@ class Subtitles(ttk.Frame):
                 if is_selected:
                     draw.rectangle(bbox, outline="yellow", width=2)
                 
+                # (índice da legenda, bbox no canvas): só as legendas desenhadas entram no cachê
                 canvas_bbox = (bbox[0] + img_x, bbox[1] + img_y, bbox[2] + img_x, bbox[3] + img_y)
-                self.subtitle_bbox_cache.append(canvas_bbox)
+                self.subtitle_bbox_cache.append((idx, canvas_bbox))
             
             
             # Renderizar legenda temporária (preview em tempo real)
@@ -657,8 +669,7 @@ class Subtitles(ttk.Frame):
                 return
 
         # 3. Verificar Legendas Permanentes
-        for i in range(len(self.subtitle_bbox_cache)-1, -1, -1):
-            bbox = self.subtitle_bbox_cache[i]
+        for i, bbox in reversed(self.subtitle_bbox_cache):
             if bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]:
                 # Cálculo de offset dinâmico
                 v_w_p = 360.0 * self.video_borders.video_w_ratio_var.get()
@@ -1,9 +1,21 @@
 import tkinter as tk
 from tkinter import ttk
 from modules.video_selector import VideoSelector
+from modules import video_enhancement
+from modules.config_global import global_config
 from ui.componentes_custom import ToggleSwitch
 
 class VideoControls(ttk.LabelFrame):
+    # Estado do carregamento do GFPGAN (video_enhancement.get_warmup_status -> texto exibido)
+    WARMUP_LABELS = {
+        "idle": "",
+        "loading": "⏳ carregando modelo...",
+        "ready": "✓ modelo pronto",
+        "unavailable": "⚠ GFPGAN indisponível",
+    }
+    # Intervalo (ms) entre consultas ao estado enquanto o modelo carrega
+    WARMUP_POLL_MS = 500
+
     def __init__(self, parent, processar_pasta_var, preview_canvas):
         super().__init__(parent, text="Controles de Vídeo")
         self.pack(fill="x", pady=5, padx=10)
@@ -63,10 +75,33 @@ class VideoControls(ttk.LabelFrame):
         row_enh.pack(side="left")
         ToggleSwitch(row_enh, self.enable_enhancement).pack(side="left", padx=(0, 8))
         ttk.Label(row_enh, text="Melhorar Qualidade", font=("Segoe UI", 9)).pack(side="left")
+        self.warmup_label = ttk.Label(row_enh, text="", font=("Segoe UI", 8))
+        self.warmup_label.pack(side="left", padx=(6, 0))
+        # Ao ligar o enhancement, o modelo começa a carregar em segundo plano
+        self.enable_enhancement.trace_add("write", self.on_enhancement_toggled)
         
         self.duration = 0
         self.is_seeking = False
 
+    def on_enhancement_toggled(self, *args):
+        if not self.enable_enhancement.get():
+            self.warmup_label.config(text="")
+            return
+        if global_config.get("executor_mode") == "process":
+            # Os renders rodam em outros processos, cada um com o próprio modelo: carregar
+            # aqui só ocuparia memória na interface
+            self.warmup_label.config(text="")
+            return
+        video_enhancement.warmup_async()
+        self.update_warmup_status()
+
+    def update_warmup_status(self):
+        status = video_enhancement.get_warmup_status()
+        if self.enable_enhancement.get():
+            self.warmup_label.config(text=self.WARMUP_LABELS.get(status, ""))
+        if status == "loading":
+            self.after(self.WARMUP_POLL_MS, self.update_warmup_status)
+
     def on_slider_press(self, event):
         self.is_dragging_slider = True
 